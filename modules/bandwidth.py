@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Bandwidth Manager
+=================
+Token buckets shared by every transfer path (yt-dlp hooks, manual requests
+downloads, Bilibili CDN streams, native HLS segments):
+
+- global limit, optionally overridden by time-of-day schedule windows
+- per-host limits (matched by domain suffix, shared across subdomains)
+- per-task limit
+
+Settings (all in KB/s, 0 = unlimited):
+    "bandwidth_limit_kb": 0
+    "bandwidth_host_limits_kb": {"bilivideo.com": 2048}
+    "bandwidth_schedule": [{"start": "08:00", "end": "18:00", "limit_kb": 1024}]
+Task: "speed_limit_kb".
+"""
+
+import time
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+KB = 1024
+REFRESH_INTERVAL = 1.0  # how often schedule windows are re-evaluated
+
+
+class TokenBucket:
+    """
+    Rate limiter allowing debt: a caller takes its bytes right away and then
+    sleeps until the bucket is back in credit, so concurrent callers share the
+    rate fairly. rate 0 = unlimited.
+    """
+
+    def __init__(self, rate=0):
+        self._lock = threading.Lock()
+        self.rate = 0
+        self.capacity = 0
+        self.tokens = 0.0
+        self.stamp = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self._lock:
+            rate = max(0, int(rate or 0))
+            if rate == self.rate:
+                return
+            self.rate = rate
+            self.capacity = max(rate, 64 * KB)  # one second of burst
+            self.tokens = min(self.tokens, self.capacity) if self.tokens else self.capacity
+            self.stamp = time.monotonic()
+
+    def reserve(self, nbytes):
+        """Take nbytes; returns how long the caller must sleep (seconds)."""
+        with self._lock:
+            if not self.rate:
+                return 0.0
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= nbytes
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def consume(self, nbytes):
+        wait = self.reserve(nbytes)
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _parse_clock(text):
+    """'08:30' -> minutes since midnight."""
+    h, _, m = str(text).partition(':')
+    return int(h) * 60 + int(m or 0)
+
+
+def scheduled_limit(schedule, default, now=None):
+    """Limit (KB/s) of the first schedule window containing `now`, else default."""
+    now = now or datetime.now()
+    minute = now.hour * 60 + now.minute
+    for window in schedule or []:
+        try:
+            start, end = _parse_clock(window["start"]), _parse_clock(window["end"])
+        except (KeyError, ValueError):
+            continue
+        inside = start <= minute < end if start <= end else (minute >= start or minute < end)  # past midnight
+        if inside:
+            return window.get("limit_kb", 0) or 0
+    return default
+
+
+class Limiter:
+    """Throttle for one transfer: call it with the byte count of each chunk."""
+
+    def __init__(self, manager, buckets):
+        self.manager = manager
+        self.buckets = buckets
+        self._seen = {}
+
+    @property
+    def rate(self):
+        """Tightest active limit in bytes/s (0 = unlimited)."""
+        self.manager.refresh()
+        rates = [b.rate for b in self.buckets if b.rate]
+        return min(rates) if rates else 0
+
+    @property
+    def active(self):
+        return bool(self.rate)
+
+    def __call__(self, nbytes):
+        if nbytes <= 0:
+            return
+        self.manager.refresh()
+        wait = max(b.reserve(nbytes) for b in self.buckets)
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_progress(self, d):
+        """yt-dlp progress hook: throttle by the growth of downloaded_bytes."""
+        if d.get('status') != 'downloading':
+            return
+        name = d.get('filename') or d.get('tmpfilename')
+        done = d.get('downloaded_bytes') or 0
+        last = self._seen.get(name, 0)
+        self._seen[name] = done
+        if done > last:
+            self(done - last)
+
+
+class BandwidthManager:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.global_bucket = TokenBucket()
+        self.base_limit_kb = 0
+        self.schedule = []
+        self.host_limits_kb = {}
+        self._host_buckets = {}
+        self._refreshed = 0.0
+
+    def configure(self, settings):
+        with self._lock:
+            self.base_limit_kb = settings.get("bandwidth_limit_kb", 0) or 0
+            self.schedule = settings.get("bandwidth_schedule") or []
+            self.host_limits_kb = {k.lower(): v for k, v in (settings.get("bandwidth_host_limits_kb") or {}).items()}
+            for domain, bucket in self._host_buckets.items():
+                bucket.set_rate(self.host_limits_kb.get(domain, 0) * KB)
+            self._refreshed = 0.0
+        self.refresh()
+
+    def refresh(self, now=None):
+        """Apply the schedule window for the current time to the global bucket."""
+        mono = time.monotonic()
+        if now is None and mono - self._refreshed < REFRESH_INTERVAL:
+            return
+        self._refreshed = mono
+        self.global_bucket.set_rate(scheduled_limit(self.schedule, self.base_limit_kb, now) * KB)
+
+    def _host_bucket(self, host):
+        host = (host or "").lower()
+        for domain, limit in self.host_limits_kb.items():
+            if limit and (host == domain or host.endswith("." + domain)):
+                with self._lock:
+                    if domain not in self._host_buckets:
+                        self._host_buckets[domain] = TokenBucket(limit * KB)
+                    return self._host_buckets[domain]
+        return None
+
+    def limiter(self, url, task_bucket=None):
+        """
+        Throttle for a transfer from url, combining global, host and task limits.
+        task_bucket: from task_bucket(), shared by all transfers of one task.
+        """
+        try:
+            host = urlparse(url).hostname
+        except ValueError:
+            host = None
+        buckets = [self.global_bucket]
+        host_bucket = self._host_bucket(host)
+        if host_bucket:
+            buckets.append(host_bucket)
+        if task_bucket:
+            buckets.append(task_bucket)
+        return Limiter(self, buckets)
+
+
+def task_bucket(limit_kb):
+    """Bucket for one task's own limit (None when unlimited)."""
+    return TokenBucket(limit_kb * KB) if limit_kb else None
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """Process-wide manager, so parallel downloads share the same buckets."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = BandwidthManager()
+    return _manager
@@ -2,11 +2,139 @@
 """
 BBDown Engine - Priority Bilibili Downloader
 Wrapper for BBDown.exe CLI.
+
+- progress: BBDown's console lines (phase headers such as 开始下载P2视频 and
+  "45.20% 5.60 MB/s" progress bars) are parsed into overall percent, speed and
+  phase across all parts
+- batching: several parts of a video go to ONE BBDown process (-p 1,3-5 / ALL),
+  downloaded with its multi-thread / aria2c options
+- output: every run gets its own temporary work dir inside the save folder;
+  the media files BBDown leaves there are moved into place, so history gets
+  real paths and sizes (and nothing else written to the folder meanwhile)
 """
 import os
+import re
+import shutil
 import subprocess
 import json
 import sys
+import tempfile
+import time
+
+MEDIA_EXTS = {".mp4", ".mkv", ".flv", ".m4a", ".mp3", ".flac", ".aac", ".webm"}
+WORK_DIR_PREFIX = ".bbdown-"
+PROGRESS_INTERVAL = 0.2  # min seconds between progress callbacks (phase changes always report)
+
+# Share of one part per phase: video first, then audio, then the mux
+_PHASE_SPAN = {"video": (0.0, 0.8), "audio": (0.8, 0.95), "mux": (0.95, 1.0)}
+_PHASE_LABEL = {"parse": "Parsing", "video": "Video", "audio": "Audio", "mux": "Muxing", "done": "Done"}
+
+_PERCENT_RE = re.compile(r'(\d{1,3}(?:\.\d+)?)\s*%')
+_SPEED_RE = re.compile(r'(\d+(?:\.\d+)?\s*[KMG]i?B/s)', re.I)
+_START_RE = re.compile(r'开始下载P(\d+)(视频|音频)')
+_PARTS_RE = re.compile(r'共计\s*(\d+)\s*个分P')
+
+
+def page_spec(numbers):
+    """BBDown -p value for 1-based part numbers: [1, 3, 4, 5] -> "1,3-5"."""
+    numbers = sorted(set(numbers))
+    runs = []
+    for n in numbers:
+        if runs and n == runs[-1][1] + 1:
+            runs[-1][1] = n
+        else:
+            runs.append([n, n])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in runs)
+
+
+def _unique_path(path):
+    base, ext = os.path.splitext(path)
+    counter = 1
+    while os.path.exists(path):
+        path = f"{base} ({counter}){ext}"
+        counter += 1
+    return path
+
+
+def move_outputs(work_dir, save_dir):
+    """
+    Move the media files under work_dir to the same relative place in save_dir
+    (multi-part output is <videoTitle>/[P01]...). Existing files are never
+    overwritten. Returns the new paths, oldest first.
+    """
+    found = []
+    for root, _, files in os.walk(work_dir):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in MEDIA_EXTS:
+                path = os.path.join(root, name)
+                found.append((os.path.getmtime(path), path))
+    moved = []
+    for _, path in sorted(found):
+        target = _unique_path(os.path.join(save_dir, os.path.relpath(path, work_dir)))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+        moved.append(target)
+    return moved
+
+
+class ProgressParser:
+    """
+    Turns BBDown output lines into (percent, message) updates.
+    Overall percent = (finished parts + fraction of the current part) / parts.
+    """
+
+    def __init__(self, parts=1):
+        self.parts = max(1, parts)
+        self.part_index = 0      # parts started so far
+        self.current_part = None
+        self.phase = "parse"
+        self.percent = 0.0       # within the current phase
+        self.speed = ""
+
+    def overall(self):
+        lo, hi = _PHASE_SPAN.get(self.phase, (0.0, 0.0))
+        if self.phase == "done":
+            return 100.0
+        frac = lo + (hi - lo) * self.percent / 100
+        done = max(0, self.part_index - 1)
+        return min(100.0, (done + frac) / self.parts * 100)
+
+    def message(self):
+        label = _PHASE_LABEL.get(self.phase, self.phase)
+        if self.parts > 1 and self.current_part and self.phase in _PHASE_SPAN:
+            label += f" P{self.current_part}"
+        text = f"{label}: {self.percent:.1f}%" if self.phase in ("video", "audio") else label
+        return f"{text} ({self.speed})" if self.speed and self.phase in ("video", "audio") else text
+
+    def feed(self, line):
+        """Update from one output line. Returns True if the phase changed."""
+        m = _PARTS_RE.search(line)
+        if m:
+            self.parts = max(self.parts, int(m.group(1)))
+        m = _START_RE.search(line)
+        if m:
+            part, kind = m.group(1), m.group(2)
+            if part != self.current_part:
+                self.current_part = part
+                self.part_index += 1
+            self.phase, self.percent, self.speed = ("video" if kind == "视频" else "audio"), 0.0, ""
+            return True
+        if "混流" in line or "合并" in line:
+            changed = self.phase != "mux"
+            self.phase, self.percent = "mux", 0.0
+            return changed
+        if "任务完成" in line:
+            self.phase = "done"
+            return True
+        if self.phase in ("video", "audio"):
+            m = _PERCENT_RE.search(line)
+            if m:
+                self.percent = min(100.0, float(m.group(1)))
+                s = _SPEED_RE.search(line)
+                if s:
+                    self.speed = s.group(1)
+        return False
+
 
 class BBDownEngine:
     def __init__(self, bbdown_path="BBDown.exe"):
@@ -20,7 +148,7 @@ class BBDownEngine:
             os.path.join(os.getcwd(), "tools"),
             os.path.dirname(sys.executable)
         ]
-        
+
         # Also check relative to this module
         dirs.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -30,7 +158,7 @@ class BBDownEngine:
             f = os.path.join(d, target)
             if os.path.exists(f):
                 return f
-        
+
         # Check PATH
         try:
             subprocess.run([target, "--version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -41,61 +169,94 @@ class BBDownEngine:
     def is_available(self):
         return self.bbdown_path is not None
 
-    def download(self, url, save_dir, callback=None):
+    def build_command(self, url, save_dir, pages=None, multi_thread=True, use_aria2c=False):
         """
-        Download using BBDown.
-        callback(percent, msg)
+        BBDown command line.
+        pages: None (what the URL selects), "ALL", or a -p spec like "1,3-5".
         """
-        if not self.is_available():
-            return False, "BBDown executable not found."
-
-        if callback: callback(0, "Starting BBDown...")
-        
-        # BBDown commands
-        # --work-dir <dir>: set work dir
-        # --multi-thread: enable multi-thread
-        # --video-only / --audio-only: (optional)
-        
         cmd = [
             self.bbdown_path,
             url,
             "--work-dir", save_dir,
             "--file-pattern", "<videoTitle>", # Simple pattern
+            "--multi-file-pattern", "<videoTitle>/[P<pageNumberWithZero>]<pageTitle>",
             "--nop" # No parse (interact)
         ]
+        if pages:
+            cmd += ["-p", pages]
+        if multi_thread:
+            cmd.append("--multi-thread")
+        if use_aria2c:
+            cmd.append("--use-aria2c")
+        return cmd
+
+    def download(self, url, save_dir, callback=None, pages=None, parts=1,
+                 multi_thread=True, use_aria2c=False, cancel_check=None):
+        """
+        Download using BBDown (all selected parts in one process).
+        callback(percent, msg); parts = number of parts expected (for overall progress).
+        Returns (success, msg, files) with the media files BBDown produced,
+        moved from a per-run work dir into save_dir.
+        """
+        if not self.is_available():
+            return False, "BBDown executable not found.", []
 
-        print(f"[BBDown] Running: {' '.join(cmd)}")
-        
+        if callback: callback(0, "Starting BBDown...")
+        work_dir = None
+        parser = ProgressParser(parts)
         try:
+            os.makedirs(save_dir, exist_ok=True)
+            work_dir = tempfile.mkdtemp(prefix=WORK_DIR_PREFIX, dir=save_dir)
+            cmd = self.build_command(url, work_dir, pages, multi_thread, use_aria2c)
+            print(f"[BBDown] Running: {' '.join(cmd)}")
+
             # Creation flags to hide window on Windows
             creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-            
+
+            # Text mode splits on "\r" too, so progress-bar redraws arrive as lines
             process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 universal_newlines=True,
-                encoding='utf-8', 
+                encoding='utf-8',
                 errors='ignore',
                 creationflags=creation_flags
             )
-            
+
+            last_report = 0.0
+            tail = []
             while True:
                 line = process.stdout.readline()
                 if not line and process.poll() is not None:
                     break
-                
-                if line:
-                    line = line.strip()
-                    # Parse progress if possible
-                    # BBDown output format: Progress: 25.55% ...
-                    if "%" in line:
-                         if callback: callback(50, f"BBDown: {line[-20:]}") # Generic update
-            
-            if process.returncode == 0:
-                return True, "Success"
-            else:
-                return False, "BBDown returned error code"
+                if cancel_check and cancel_check():
+                    process.kill()
+                    process.wait()
+                    return False, "Cancelled", []
+
+                line = line.strip()
+                if not line:
+                    continue
+                tail = (tail + [line])[-5:]
+                phase_changed = parser.feed(line)
+                now = time.monotonic()
+                if callback and (phase_changed or now - last_report >= PROGRESS_INTERVAL):
+                    last_report = now
+                    callback(parser.overall(), f"BBDown: {parser.message()}")
+
+            if process.returncode != 0:
+                print(f"[BBDown] Exit code {process.returncode}: {' | '.join(tail)}")
+                return False, f"BBDown returned error code {process.returncode}", []
+            files = move_outputs(work_dir, save_dir)
+            if not files:
+                return False, "BBDown produced no media files", []
+            if callback: callback(100, "BBDown: Done")
+            return True, "Success", files
 
         except Exception as e:
-            return False, f"BBDown Error: {e}"
+            return False, f"BBDown Error: {e}", []
+        finally:
+            # Partial output of failed/cancelled runs goes with the work dir
+            if work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
@@ -1,21 +1,172 @@
 import hashlib
-import urllib.request
 import urllib.parse
-import urllib.error
 import json
 import time
 import os
 import re
-from functools import reduce
+import threading
+from functools import reduce, lru_cache
+
+from . import http_client, host_limiter
+
+# WBI keys rotate about once a day; refresh well before that
+WBI_KEY_TTL = 6 * 3600
+# playurl codes meaning "bad signature / risk control" -> keys are stale
+WBI_RETRY_CODES = (-352, -403, -412)
+PLAYURL_API = "https://api.bilibili.com/x/player/wbi/playurl"
+
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+]
+
+# DASH codecid -> codec family
+CODEC_AVC, CODEC_HEVC, CODEC_AV1 = 7, 12, 13
+CODEC_PRIORITY = {
+    "h264": [CODEC_AVC, CODEC_HEVC, CODEC_AV1],   # compatibility first
+    "av1": [CODEC_AV1, CODEC_HEVC, CODEC_AVC],
+}
+# Quality ids that need special players; only used when nothing else exists
+DOLBY_VISION_QN = 126
+
+# Process-wide state shared by every client
+_wbi_keys = {"img_key": None, "sub_key": None, "fetched_at": 0}
+_wbi_lock = threading.Lock()
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _mixin_key(orig):
+    return reduce(lambda s, i: s + orig[i], MIXIN_KEY_ENC_TAB, '')[:32]
+
+
+def _wbi_cache_path():
+    """wbi_keys.json inside the app data directory."""
+    try:
+        from . import platform_utils
+        base = platform_utils.get_app_data_dir("Tsufutube")
+    except ImportError:
+        base = os.path.join(os.path.expanduser("~"), ".config", "Tsufutube")
+    return os.path.join(base, "wbi_keys.json")
+
+
+def _load_wbi_keys_from_disk():
+    try:
+        with open(_wbi_cache_path(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("img_key") and data.get("sub_key") and time.time() - data.get("fetched_at", 0) < WBI_KEY_TTL:
+            _wbi_keys.update(img_key=data["img_key"], sub_key=data["sub_key"], fetched_at=data["fetched_at"])
+    except: pass
+
+
+def _save_wbi_keys_to_disk():
+    try:
+        path = _wbi_cache_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(_wbi_keys, f)
+    except Exception as e:
+        print(f"[Bilibili] Could not save WBI keys: {e}")
+
+
+def qn_for_height(height_limit):
+    """playurl qn to request for a resolution cap (4K needs fourk=1 and login)."""
+    if height_limit >= 2160: return 120
+    if height_limit >= 1440: return 116
+    if height_limit >= 1080: return 80
+    if height_limit >= 720: return 64
+    if height_limit >= 480: return 32
+    return 16
+
+
+def select_video_stream(videos, height_limit=1080, codec_pref="auto"):
+    """
+    Pick one entry of dash['video'].
+    Highest resolution under the cap, then:
+    - "h264"/"av1": preferred codec first, best bitrate within it
+    - "auto": smallest bandwidth (HEVC/AV1 are usually 30-50% smaller)
+    """
+    if not videos:
+        return None
+    pool = [v for v in videos if v.get('id') != DOLBY_VISION_QN] or list(videos)
+    capped = [v for v in pool if (v.get('height') or 0) <= height_limit]
+    if not capped:
+        # Everything is above the cap: take the smallest resolution offered
+        lowest = min(v.get('height') or 0 for v in pool)
+        capped = [v for v in pool if (v.get('height') or 0) == lowest]
+    best_height = max(v.get('height') or 0 for v in capped)
+    same_height = [v for v in capped if (v.get('height') or 0) == best_height]
+
+    order = CODEC_PRIORITY.get(codec_pref)
+    if order:
+        def rank(v):
+            cid = v.get('codecid')
+            return (-(order.index(cid) if cid in order else len(order)), v.get('bandwidth') or 0)
+        return max(same_height, key=rank)
+    return min(same_height, key=lambda v: v.get('bandwidth') or 0)
+
+
+def select_audio_stream(dash, lossless=False):
+    """Best audio entry: FLAC (Hi-Res) when lossless is wanted and available, else highest bitrate AAC."""
+    if lossless:
+        flac = (dash.get('flac') or {}).get('audio')
+        if flac:
+            return flac
+    audios = dash.get('audio') or []
+    if audios:
+        return max(audios, key=lambda a: a.get('bandwidth') or 0)
+    dolby = (dash.get('dolby') or {}).get('audio') or []
+    return dolby[0] if dolby else None
+
+
+def get_client(cookie_path=None):
+    """
+    Shared BilibiliAPI per cookie file. The cookie file is re-parsed only when
+    its modification time changes.
+    """
+    with _clients_lock:
+        client = _clients.get(cookie_path)
+        if client is None:
+            client = _clients[cookie_path] = BilibiliAPI(cookie_path=cookie_path)
+    client.refresh_cookies()
+    return client
+
 
 class BilibiliAPI:
     def __init__(self, cookie_path=None):
         self.user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
         self.cookies = {}
-        if cookie_path and os.path.exists(cookie_path):
-            self.load_cookies(cookie_path)
+        self.cookie_path = cookie_path
+        self._cookie_mtime = None
+        self._cookie_lock = threading.Lock()
+        self.refresh_cookies()
+
+    def refresh_cookies(self):
+        """
+        (Re)load the cookie file if it changed since the last load. The new jar
+        replaces self.cookies in one assignment, so requests running in parallel
+        (shared client) always send a complete set.
+        """
+        path = self.cookie_path
+        with self._cookie_lock:
+            try:
+                mtime = os.path.getmtime(path) if path else None
+            except OSError:
+                mtime = None
+            if mtime == self._cookie_mtime:
+                return
+            self._cookie_mtime = mtime
+            self.cookies = self._read_cookie_file(path) if mtime is not None else {}
             
     def load_cookies(self, path):
+        self.cookies = {**self.cookies, **self._read_cookie_file(path)}
+
+    def _read_cookie_file(self, path):
+        """{name: value} from a Netscape cookie file (empty on any error)."""
+        cookies = {}
         try:
             with open(path, 'r', encoding='utf-8') as f:
                 content = f.read()
@@ -23,8 +174,9 @@ class BilibiliAPI:
                     if line.startswith('#') or not line.strip(): continue
                     parts = line.split('\t')
                     if len(parts) >= 7:
-                        self.cookies[parts[5]] = parts[6]
+                        cookies[parts[5]] = parts[6]
         except: pass
+        return cookies
 
     def _get_headers(self, referer=None):
         h = {
@@ -38,31 +190,18 @@ class BilibiliAPI:
         return h
 
     def _request(self, url, params=None, referer=None):
-        if params:
-            url += '?' + urllib.parse.urlencode(params)
-        
-        req = urllib.request.Request(url, headers=self._get_headers(referer))
         try:
-            with urllib.request.urlopen(req, timeout=15) as response:
-                return json.loads(response.read().decode('utf-8'))
-        except urllib.error.HTTPError as e:
-            try:
-                body = e.read().decode('utf-8')
-                return json.loads(body)
-            except:
-                return {'code': e.code, 'message': f"HTTP {e.code}"}
+            resp = http_client.api_request('GET', url, params=params, headers=self._get_headers(referer), timeout=15)
         except Exception as e:
             return {'code': -1, 'message': str(e)}
+        try:
+            return resp.json()
+        except:
+            return {'code': resp.status_code, 'message': f"HTTP {resp.status_code}"}
 
     # --- WBI SIGNING ALGORITHM ---
     def get_mixin_key(self, orig):
-        mixinKeyEncTab = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
-        return reduce(lambda s, i: s + orig[i], mixinKeyEncTab, '')[:32]
+        return _mixin_key(orig)
 
     def enc_wbi(self, params: dict, img_key: str, sub_key: str):
         mixin_key = self.get_mixin_key(img_key + sub_key)
@@ -76,7 +215,25 @@ class BilibiliAPI:
         params['w_rid'] = wbi_sign
         return params
 
-    def get_wbi_keys(self):
+    def get_wbi_keys(self, force=False):
+        """
+        WBI (img_key, sub_key), cached process-wide for WBI_KEY_TTL and
+        persisted to disk so a restart does not need the nav round-trip.
+        """
+        with _wbi_lock:
+            if not force:
+                if not _wbi_keys["img_key"]:
+                    _load_wbi_keys_from_disk()
+                if _wbi_keys["img_key"] and time.time() - _wbi_keys["fetched_at"] < WBI_KEY_TTL:
+                    return _wbi_keys["img_key"], _wbi_keys["sub_key"]
+
+            img_key, sub_key = self._fetch_wbi_keys()
+            if img_key:
+                _wbi_keys.update(img_key=img_key, sub_key=sub_key, fetched_at=time.time())
+                _save_wbi_keys_to_disk()
+            return img_key, sub_key
+
+    def _fetch_wbi_keys(self):
         # customized request to allow ignoring cookies
         def fetch_nav(use_cookie=True):
             headers = self._get_headers()
@@ -84,14 +241,13 @@ class BilibiliAPI:
                 headers.pop('Cookie', None)
             
             try:
-                req = urllib.request.Request('https://api.bilibili.com/x/web-interface/nav', headers=headers)
-                with urllib.request.urlopen(req, timeout=10) as response:
-                    return json.loads(response.read().decode('utf-8'))
+                return http_client.api_request('GET', 'https://api.bilibili.com/x/web-interface/nav', headers=headers, timeout=10).json()
             except: return None
 
         resp = fetch_nav(True)
-        # If failed with cookies (e.g. -101 or expired), try without cookies
-        if not resp or resp.get('code') != 0:
+        # If failed with cookies (e.g. expired), try without cookies.
+        # -101 (not logged in) still carries wbi_img, so no retry is needed then.
+        if not resp or not (resp.get('data') or {}).get('wbi_img'):
             print(f"WBI Nav with cookie failed: {resp.get('code') if resp else 'NetErr'}. Retrying no-cookie.")
             resp = fetch_nav(False)
 
@@ -118,7 +274,17 @@ class BilibiliAPI:
         return self._request('https://api.bilibili.com/x/web-interface/view', {'bvid': bvid}, referer=f'https://www.bilibili.com/video/{bvid}')
 
     def get_play_url(self, bvid, cid, qn=80):
-        img_key, sub_key = self.get_wbi_keys()
+        resp = self._get_play_url(bvid, cid, qn)
+        if resp.get('code') in WBI_RETRY_CODES:
+            # Risk control answers with HTTP 200: tell the host limiter it is being throttled
+            host_limiter.report(PLAYURL_API, 412)
+            # Cached keys may have rotated early - refresh once and retry
+            print(f"[Bilibili] playurl code {resp.get('code')}, refreshing WBI keys.")
+            resp = self._get_play_url(bvid, cid, qn, force_keys=True)
+        return resp
+
+    def _get_play_url(self, bvid, cid, qn=80, force_keys=False):
+        img_key, sub_key = self.get_wbi_keys(force=force_keys)
         if not img_key: return {'code': -999, 'message': 'Failed to get WBI keys'}
         
         params = {
@@ -132,24 +298,44 @@ class BilibiliAPI:
             'web_location': 1315873 # Common web location ID
         }
         signed_params = self.enc_wbi(params, img_key, sub_key)
-        return self._request('https://api.bilibili.com/x/player/wbi/playurl', signed_params, referer=f'https://www.bilibili.com/video/{bvid}')
+        return self._request(PLAYURL_API, signed_params, referer=f'https://www.bilibili.com/video/{bvid}')
         
-    def download_file(self, url, dest_path, referer, progress_callback=None):
+    def download_file(self, url, dest_path, referer, progress_callback=None, throttle=None, hasher=None):
+        """
+        Stream one resource to dest_path. hasher (hashing.StreamHasher) ends up
+        holding the hash of exactly the bytes written; DASH tracks are muxed by
+        FFmpeg afterwards, so that hash only describes the file when it is kept as-is.
+        """
         try:
-            req = urllib.request.Request(url, headers=self._get_headers(referer))
-            with urllib.request.urlopen(req, timeout=30) as u, open(dest_path, 'wb') as f:
-                meta = u.info()
-                file_size = int(meta.get("Content-Length", 0))
+            if hasher: hasher.reset()
+            with http_client.get(url, headers=self._get_headers(referer), stream=True, timeout=(15, 30)) as u, open(dest_path, 'wb') as f:
+                u.raise_for_status()
+                file_size = int(u.headers.get("Content-Length", 0))
                 downloaded = 0
-                block_sz = 8192
-                while True:
-                    buffer = u.read(block_sz)
-                    if not buffer: break
+                for buffer in u.iter_content(chunk_size=65536):
+                    if not buffer: continue
                     downloaded += len(buffer)
                     f.write(buffer)
+                    if hasher: hasher.update(buffer)
+                    if throttle: throttle(len(buffer))
                     if progress_callback and file_size:
                         progress_callback(downloaded, file_size)
             return True
         except Exception as e:
             print(f"DL Error: {e}")
             return False
+
+    @staticmethod
+    def stream_urls(entry):
+        """baseUrl plus its backupUrl mirrors for one DASH video/audio entry."""
+        urls = [entry.get('baseUrl') or entry.get('base_url')]
+        urls += entry.get('backupUrl') or entry.get('backup_url') or []
+        return [u for u in urls if u]
+
+    def download_stream(self, urls, dest_path, referer, progress_callback=None, cancel_check=None, throttle=None,
+                        hasher=None):
+        """Download from the fastest CDN mirror, switching if it stalls."""
+        from .mirror_selector import get_selector
+        return get_selector().download(urls, dest_path, self._get_headers(referer),
+                                       progress_callback=progress_callback, cancel_check=cancel_check,
+                                       throttle=throttle, hasher=hasher)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk URL Import
+===============
+Turns a text/CSV/JSON file or pasted multi-line text into a clean URL list
+for the download queue:
+
+- extract_urls(text): every http(s) URL in free text, in order
+- read_file(path):    .json (list / objects with url / entries), .csv (any
+                      cell), anything else as plain text
+- dedupe(urls, existing): drops repeats and URLs already queued or in
+                      history, compared by url_router canonical key so
+                      youtu.be/X and watch?v=X count as the same video
+"""
+
+import os
+import re
+import csv
+import json
+
+from . import url_router
+
+URL_RE = re.compile(r'https?://[^\s"\'<>|]+', re.IGNORECASE)
+_TRAILING = ".,;:!?)]}'\""
+
+# Keys of JSON objects that hold a URL or a nested list of them
+_URL_KEYS = ("url", "webpage_url", "link", "href")
+_LIST_KEYS = ("entries", "urls", "items", "videos", "links")
+
+
+def extract_urls(text):
+    """All http(s) URLs in text, in order of appearance."""
+    urls = []
+    for match in URL_RE.finditer(text or ""):
+        url = match.group(0).rstrip(_TRAILING)
+        if url.count("(") < url.count(")"):
+            url = url.rstrip(")")
+        if len(url) > len("https://"):
+            urls.append(url)
+    return urls
+
+
+def _walk_json(node, out):
+    if isinstance(node, str):
+        out.extend(extract_urls(node))
+    elif isinstance(node, list):
+        for item in node:
+            _walk_json(item, out)
+    elif isinstance(node, dict):
+        for key in _URL_KEYS:
+            if isinstance(node.get(key), str):
+                out.extend(extract_urls(node[key])[:1])
+                return
+        for key in _LIST_KEYS:
+            if isinstance(node.get(key), list):
+                _walk_json(node[key], out)
+
+
+def parse_text(text, kind="txt"):
+    """URLs from file content of the given kind ("json", "csv" or anything else for plain text)."""
+    if kind == "json":
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return extract_urls(text)
+        out = []
+        _walk_json(data, out)
+        return out
+    if kind == "csv":
+        out = []
+        for row in csv.reader(text.splitlines()):
+            for cell in row:
+                out.extend(extract_urls(cell))
+        return out
+    return extract_urls(text)
+
+
+def read_file(path):
+    """URLs from a .txt/.csv/.json (or any text) file."""
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        text = f.read()
+    kind = os.path.splitext(path)[1].lower().lstrip(".")
+    return parse_text(text, kind)
+
+
+def _key(url_or_key):
+    # History items store "PLATFORM|id" keys; everything else is a URL
+    if "://" not in url_or_key and "|" in url_or_key:
+        return url_or_key
+    return "|".join(url_router.canonical_key(url_or_key))
+
+
+def dedupe(urls, existing=()):
+    """
+    (new_urls, skipped): urls without repeats and without anything in existing
+    (URLs or canonical "PLATFORM|id" keys). Order is preserved.
+    """
+    seen = {_key(e) for e in existing if e}
+    new, skipped = [], 0
+    for url in urls:
+        key = _key(url)
+        if key in seen:
+            skipped += 1
+            continue
+        seen.add(key)
+        new.append(url)
+    return new, skipped
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
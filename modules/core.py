@@ -9,15 +9,24 @@ import shutil
 import sys
 import tempfile
 import uuid # [FIX] Unique cookie filenames
+import threading
+
+from .utils import parse_range_spec
+from . import retry_policy
+from . import strategy_router
+from . import url_router
+from .media_info import MediaInfo
+from . import hashing
 
 # --- LAZY IMPORT WRAPPER ---
 yt_dlp = None
 instaloader = None
-# from bilibili_api import BilibiliAPI (Moved to lazy load)
-BilibiliAPI = None
-DouyinDownloader = None
+# from . import bilibili_api (Moved to lazy load)
+bilibili_api = None
+douyin_api = None
 PlaywrightEngine = None
-DailymotionDownloader = None
+dailymotion_api = None
+tiktok_api = None
 
 # Import platform utilities for cross-platform support
 try:
@@ -25,6 +34,41 @@ try:
 except ImportError:
     platform_utils = None
 
+try:
+    from . import direct_media
+except ImportError:
+    direct_media = None
+
+try:
+    from . import http_client
+except ImportError:
+    http_client = None
+
+try:
+    from . import hls_downloader
+except ImportError:
+    hls_downloader = None
+
+try:
+    from . import transfer_tuner
+except ImportError:
+    transfer_tuner = None
+
+try:
+    from . import bandwidth
+except ImportError:
+    bandwidth = None
+
+try:
+    from . import host_limiter
+except ImportError:
+    host_limiter = None
+
+try:
+    from . import process_worker
+except ImportError:
+    process_worker = None
+
 def lazy_import_ytdlp():
     global yt_dlp
     if yt_dlp is None:
@@ -66,6 +110,7 @@ class DownloaderEngine:
         self.is_cancelled = False
         self.last_update_time = 0
         self.current_process = None # [CANCEL FIX]
+        self.task_bucket = None # Per-task bandwidth limit, shared by all transfers of the task
 
     # [CANCEL FIX] Context Manager to capture subprocess (FFmpeg) spawned by yt-dlp
     class CaptureSubprocess:
@@ -135,10 +180,32 @@ class DownloaderEngine:
             else: return False, "FFmpeg Error"
         except Exception as e: return False, str(e)
 
-    def _convert_m3u8_to_mp4(self, m3u8_path, output_path):
+    def _download_hls_native(self, url, output_path, headers=None, settings=None, height_limit=1080, progress=None, text=None):
+        """
+        Fetch an HLS stream with the concurrent segment downloader.
+        Returns (success, msg), or None when the playlist needs plain FFmpeg
+        (live, SAMPLE-AES, separate audio...) or the module is unavailable.
+        """
+        if not hls_downloader or not os.path.exists(self.ffmpeg_path): return None
+        hls = hls_downloader.HLSDownloader(
+            self.ffmpeg_path, headers=headers,
+            max_workers=(settings or {}).get("hls_concurrency", hls_downloader.DEFAULT_WORKERS),
+            cancel_check=lambda: self.is_cancelled, throttle=self._throttle(url),
+            on_process=lambda proc: setattr(self, "current_process", proc))  # cancel() kills the muxer
+        try:
+            return hls.download(url, output_path, height_limit=height_limit, progress_callback=progress, text=text)
+        except hls_downloader.HLSUnsupported as e:
+            print(f"[Core] Native HLS not usable ({e}), using FFmpeg.")
+        except Exception as e:
+            print(f"[Core] Native HLS error: {e}")
+        return None
+
+    def _convert_m3u8_to_mp4(self, m3u8_path, output_path, base_url=None, headers=None):
         """
-        Convert m3u8 file to mp4 using FFmpeg.
+        Convert m3u8 file to mp4.
         m3u8 from Playwright sniffing often needs re-muxing to play correctly.
+        Segments are fetched concurrently by hls_downloader when possible,
+        otherwise FFmpeg reads the playlist itself.
         
         NOTE: yt-dlp sometimes downloads the video correctly but saves with .m3u8 extension.
         We check if the file is actually a text playlist or already a binary video.
@@ -179,6 +246,23 @@ class DownloaderEngine:
             print("[Core] FFmpeg not found, cannot convert m3u8")
             return False
         
+        # Native concurrent segment fetch (needs absolute or resolvable segment URLs)
+        try:
+            with open(m3u8_path, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+            has_http_base = bool(base_url) and re.match(r'https?://', base_url, re.I)
+            if not has_http_base and hls_downloader and hls_downloader.has_relative_uris(text):
+                # Relative URIs would resolve to local paths; FFmpeg reads them next to the playlist
+                print("[Core] Native HLS skipped: relative segment URIs without an HTTP base URL")
+            else:
+                result = self._download_hls_native(base_url or m3u8_path, output_path, headers=headers, text=text)
+                if result is not None:
+                    if result[0]: return True
+                    print(f"[Core] Native HLS failed: {result[1]}. Trying FFmpeg...")
+        except Exception as e:
+            print(f"[Core] Native HLS skipped: {e}")
+        if self.is_cancelled: return False
+        
         try:
             # FFmpeg command: read m3u8 playlist and convert to mp4
             # -allowed_extensions ALL: allow m3u8 to work with non-standard extensions
@@ -205,24 +289,24 @@ class DownloaderEngine:
             full_cmd = [self.ffmpeg_path] + cmd_args
             print(f"[Core] Converting m3u8 playlist: {' '.join(full_cmd[:5])}...")
             
-            result = subprocess.run(
+            # No hard timeout: long streams are fine, cancel() kills current_process
+            self.current_process = subprocess.Popen(
                 full_cmd,
-                stdout=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 startupinfo=startupinfo,
-                creationflags=creation_flags,
-                timeout=600  # 10 minute timeout
+                creationflags=creation_flags
             )
+            _, stderr = self.current_process.communicate()
+            returncode = self.current_process.returncode
+            self.current_process = None
             
-            if result.returncode == 0 and os.path.exists(output_path):
+            if returncode == 0 and os.path.exists(output_path):
                 return True
             else:
-                print(f"[Core] FFmpeg conversion failed: {result.stderr.decode('utf-8', errors='ignore')[:500]}")
+                print(f"[Core] FFmpeg conversion failed: {stderr.decode('utf-8', errors='ignore')[:500]}")
                 return False
                 
-        except subprocess.TimeoutExpired:
-            print("[Core] M3U8 conversion timed out")
-            return False
         except Exception as e:
             print(f"[Core] M3U8 conversion error: {e}")
             return False
@@ -246,15 +330,125 @@ class DownloaderEngine:
     # =========================================================================
 
     def _identify_platform(self, url):
-        if not url: return "UNKNOWN"
-        if "instagram.com" in url: return "INSTAGRAM"
-        if "tiktok.com" in url: return "TIKTOK"
-        if "douyin.com" in url: return "DOUYIN"
-        if "dailymotion.com" in url or "dai.ly" in url: return "DAILYMOTION"
-        if "bilibili.com" in url: return "BILIBILI_CN"
-        if "facebook.com" in url and ("stories" in url or "your_story" in url): return "FACEBOOK_STORY"
-        return "GENERAL"
+        return url_router.identify(url)
+
+    # Platforms downloaded through our own API clients: yt-dlp never sees them,
+    # so the download archive has to be checked/written here.
+    ARCHIVE_PLATFORMS = ("TIKTOK", "DOUYIN", "DAILYMOTION", "BILIBILI")
+
+    def _archive_path(self, settings):
+        return os.path.join(settings.get("config_path", "."), "archive.txt")
+
+    def _in_archive(self, url, settings):
+        entry = url_router.archive_id(url)
+        if not entry: return False
+        try:
+            with open(self._archive_path(settings), "r", encoding="utf-8") as f:
+                return any(line.strip() == entry for line in f)
+        except OSError:
+            return False
+
+    def _record_archive(self, url, settings):
+        entry = url_router.archive_id(url)
+        if not entry or self._in_archive(url, settings): return
+        try:
+            with open(self._archive_path(settings), "a", encoding="utf-8") as f:
+                f.write(entry + "\n")
+        except OSError as e:
+            print(f"[Core] Could not write archive: {e}")
     
+    def _get_unique_name(self, directory, filename, ext):
+        """Return filename (without ext) that does not collide in directory: 'name', 'name (1)', ..."""
+        counter = 1
+        new_filename = filename
+        while True:
+            cand_path = os.path.join(directory, f"{new_filename}.{ext}")
+            if not os.path.exists(cand_path):
+                return new_filename
+            new_filename = f"{filename} ({counter})"
+            counter += 1
+
+    def _stream_to_file(self, url, target_file, headers, callbacks, timeout=(15, 120), hasher=None):
+        """
+        Stream an HTTP resource to disk with throttled progress updates.
+        hasher (hashing.StreamHasher) is fed each chunk as it is written.
+        Returns (success, message). Partial files are removed on failure/cancel.
+        """
+        throttle = self._throttle(url)
+        try:
+            with http_client.get(url, headers=headers or {}, stream=True, timeout=timeout) as r:
+                r.raise_for_status()
+                total = int(r.headers.get('content-length', 0))
+                done = 0
+                last_ui = 0
+                with open(target_file, 'wb') as f:
+                    for chunk in r.iter_content(chunk_size=65536):
+                        if self.is_cancelled:
+                            break
+                        if chunk:
+                            f.write(chunk)
+                            if hasher: hasher.update(chunk)
+                            done += len(chunk)
+                            if throttle: throttle(len(chunk))
+                            now = time.time()
+                            if total > 0 and now - last_ui >= 0.1:
+                                last_ui = now
+                                per = (done / total) * 100
+                                callbacks.get('on_progress', lambda x,y:None)(per, f"{per:.1f}% | {done / (1024*1024):.1f} MB")
+            if self.is_cancelled:
+                raise Exception("Cancelled")
+            return True, "Success"
+        except Exception as e:
+            try:
+                if os.path.exists(target_file): os.remove(target_file)
+            except: pass
+            return False, str(e)
+
+    def _attach_hash(self, hist, hasher, settings):
+        """Store the hash computed during the transfer in the history item (+ optional b2sum sidecar)."""
+        if hist and hasher and hasher.count:
+            hist["hash"] = hasher.value()
+            if settings.get("hash_sidecar"): hashing.write_sidecar(hist["path"], hist["hash"])
+        return hist
+
+    def _cut_downloaded_file(self, final_path, task, callbacks):
+        """
+        'download_then_cut': trim final_path in place (keeps the full file if the cut fails).
+        No-op for other cut methods ('direct_cut' already downloaded only the range).
+        Returns True if final_path was replaced by the cut.
+        """
+        if task.get("cut_method", "download_then_cut") != "download_then_cut":
+            return False
+        try:
+            callbacks.get('on_status', lambda x:None)("MSG_CUT_WAIT")
+            callbacks.get('on_progress', lambda x,y:None)(101, "MSG_CUT_WAIT")
+
+            folder = os.path.dirname(final_path)
+            name, ext = os.path.splitext(os.path.basename(final_path))
+            cut_out = os.path.join(folder, f"{name}_cut{ext}")
+
+            t_start = str(timedelta(seconds=task.get("start_time", 0)))
+            end_t = task.get("end_time", 0)
+            t_end = str(timedelta(seconds=end_t)) if end_t > 0 else None
+
+            if task.get("cut_correct_mode"):
+                # Mode: Advanced (Re-encode)
+                callbacks.get('on_status', lambda x:None)("MSG_CUT_ACCURATE")
+                success, msg = self.accurate_cut(final_path, cut_out, t_start, t_end)
+            else:
+                # Mode: Fast (Stream Copy)
+                success, msg = self.fast_cut(final_path, cut_out, t_start, t_end)
+
+            if success and os.path.exists(cut_out):
+                # The cut keeps the original name (base_name already carries "(Cut)")
+                try: os.remove(final_path)
+                except: pass
+                os.rename(cut_out, final_path)
+                return True
+        except Exception as e:
+            print(f"Cut Error: {e}")
+        return False
+
     def _auto_extract_cookies(self, browser_name, callbacks):
         if not browser_name or browser_name.lower() == "none": return None
         if os.path.exists(self.temp_cookie_file) and (time.time() - os.path.getmtime(self.temp_cookie_file)) < 1800:
@@ -384,13 +578,13 @@ class DownloaderEngine:
             return {"title": f"[{platform}] Content", "extractor_key": platform}
         
         # [BILIBILI CN] Use Custom API for Info
-        if platform == "BILIBILI_CN" and BilibiliAPI:
+        if platform == "BILIBILI" and bilibili_api:
             match = re.search(r'(BV\w+)', url)
             if match:
                 bvid = match.group(1)
                 try:
-                    # Initialize with NO COOKIE first to avoid slow file read, or read if efficient
-                    client = BilibiliAPI(cookie_path=os.path.join(self.temp_dir, "browser_cookies.txt"))
+                    # Shared client: cookie file is parsed once, WBI keys are cached
+                    client = bilibili_api.get_client(os.path.join(self.temp_dir, "browser_cookies.txt"))
                     info = client.get_video_info(bvid)
                     if info and info.get('code') == 0:
                         d = info['data']
@@ -400,7 +594,8 @@ class DownloaderEngine:
                             "duration": d.get("duration", 0),
                             "thumbnail": d.get("pic", ""),
                             "webpage_url": f"https://www.bilibili.com/video/{bvid}",
-                            "extractor_key": "Bilibili"
+                            "extractor_key": "Bilibili",
+                            "page_count": len(d.get("pages") or []) or 1,
                         }
                 except: pass
 
@@ -409,15 +604,14 @@ class DownloaderEngine:
         
         # [DOUYIN] Custom API - BEFORE generic yt-dlp
         if platform == "DOUYIN":
-            global DouyinDownloader
-            if DouyinDownloader is None:
-                try: from .douyin_api import DouyinDownloader
+            global douyin_api
+            if douyin_api is None:
+                try: from . import douyin_api
                 except ImportError: pass
                 
-            if DouyinDownloader:
+            if douyin_api:
                 try:
-                    dd = DouyinDownloader(headless=True)
-                    info, err = dd.get_video_info(url)
+                    info, err = douyin_api.get_client().get_video_info(url)
                     if info: return info, None
                 except Exception as e:
                     pass
@@ -425,15 +619,14 @@ class DownloaderEngine:
 
         # [DAILYMOTION] Custom API - BEFORE generic yt-dlp
         if platform == "DAILYMOTION":
-            global DailymotionDownloader
-            if DailymotionDownloader is None:
-                try: from .dailymotion_api import DailymotionDownloader
+            global dailymotion_api
+            if dailymotion_api is None:
+                try: from . import dailymotion_api
                 except ImportError: pass
             
-            if DailymotionDownloader:
+            if dailymotion_api:
                 try:
-                    dm = DailymotionDownloader()
-                    info, err = dm.get_video_info(url)
+                    info, err = dailymotion_api.get_client().get_video_info(url)
                     if info: return info, None
                 except: pass
             # Fallthrough to yt-dlp if custom API fails
@@ -447,17 +640,27 @@ class DownloaderEngine:
             # Return None for result, and error string
             return None, str(e)
 
+    ERROR_MESSAGES = {
+        "ERR_WBI": "Bilibili chặn (Lỗi 412). Vui lòng cập nhật Cookie.",
+        "ERR_COOKIE": "Video yêu cầu xác thực (Bot/Cookie/Tuổi). Vui lòng cập nhật Cookie.",
+        "ERR_BOT": "Video yêu cầu xác thực (Bot/Cookie/Tuổi). Vui lòng cập nhật Cookie.",
+        "ERR_PRIVATE": "Video riêng tư. Cần Cookie của tài khoản có quyền xem.",
+        "ERR_SYSTEM": "Thiếu file ffmpeg.",
+        "ERR_NOT_FOUND": "Video không tồn tại hoặc đã bị xóa.",
+        "ERR_GEO": "Video bị chặn theo khu vực. Hãy thử Proxy/Geo Bypass.",
+        "ERR_DRM": "Video có DRM, không thể tải.",
+        "ERR_LIVE_PENDING": "Livestream/Premiere chưa bắt đầu.",
+        "ERR_RATE_LIMIT": "Bị giới hạn tốc độ (429). Vui lòng thử lại sau.",
+    }
+
     def _classify_error(self, e):
         msg = str(e).lower()
-        if "412" in msg: return "ERR_WBI", "Bilibili chặn (Lỗi 412). Vui lòng cập nhật Cookie."
-        
-        # Cookie/Login related errors - return specific code for smart guidance
-        cookie_keywords = ["sign in", "confirm your age", "age-restricted", "member-only", "private", "login required", "cookies", "bot"]
-        if any(k in msg for k in cookie_keywords): 
-            return "ERR_COOKIE", "Video yêu cầu xác thực (Bot/Cookie/Tuổi). Vui lòng cập nhật Cookie."
-        
-        if "ffmpeg" in msg: return "ERR_SYSTEM", "Thiếu file ffmpeg."
-        return "ERR_UNKNOWN", f"Lỗi: {msg[:100]}..."
+        err_type = retry_policy.classify(msg)
+        if err_type == "ERR_SYSTEM" and "ffmpeg" not in msg:
+            return err_type, f"Lỗi hệ thống: {msg[:100]}"
+        if err_type in self.ERROR_MESSAGES:
+            return err_type, self.ERROR_MESSAGES[err_type]
+        return err_type, f"Lỗi: {msg[:100]}..."
 
     # =========================================================================
     #  PHẦN 3: ENGINE LOGIC (ĐÃ SỬA LỖI BUG POSTPROCESSORS)
@@ -465,6 +668,25 @@ class DownloaderEngine:
 
     
     def extract_playlist_flat(self, url):
+        # [DAILYMOTION] Paginated Data API: a whole playlist/channel in a few requests
+        global dailymotion_api, tiktok_api
+        if self._identify_platform(url) == "DAILYMOTION":
+            if dailymotion_api is None:
+                try: from . import dailymotion_api
+                except ImportError: pass
+            if dailymotion_api and dailymotion_api.parse_collection(url):
+                info, err = dailymotion_api.get_client().list_videos(url)
+                if info: return MediaInfo.from_info(info)
+                print(f"[Core] Dailymotion list API failed ({err}). Falling back to yt-dlp...")
+        # [TIKTOK] Profile pages: paced TikWM cursor pagination (links cached for the downloads)
+        if self._identify_platform(url) == "TIKTOK":
+            if tiktok_api is None:
+                try: from . import tiktok_api
+                except ImportError: pass
+            if tiktok_api and tiktok_api.parse_user(url):
+                info, err = tiktok_api.get_client().list_user_videos(url)
+                if info: return MediaInfo.from_info(info)
+                print(f"[Core] TikTok user API failed ({err}). Falling back to yt-dlp...")
         lazy_import_ytdlp()
         ydl_opts = {
             'extract_flat': True, 
@@ -474,33 +696,73 @@ class DownloaderEngine:
         }
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                return ydl.extract_info(url, download=False)
+                # Entries are only read for url/title: keep compact records, not full dicts
+                return MediaInfo.from_info(ydl.extract_info(url, download=False))
         except Exception as e:
             print(f"Playlist error: {e}")
             return None
 
+    def _throttle(self, url):
+        """Bandwidth limiter for one transfer of the current task (None if unavailable)."""
+        if not bandwidth: return None
+        return bandwidth.get_manager().limiter(url, self.task_bucket)
+
     def download_single(self, task, settings, callbacks):
         self.is_cancelled = False
+        # [OPTIONAL] Run the task in a warm worker process (extraction off the GUI process/GIL)
+        workers = settings.get("process_workers", 0)
+        if workers and process_worker and not process_worker.in_worker():
+            pool = process_worker.get_pool(workers, self.ffmpeg_path)
+            return pool.run(task, settings, callbacks, cancel_check=lambda: self.is_cancelled)
+        
+        if bandwidth:
+            bandwidth.get_manager().configure(settings)
+            self.task_bucket = bandwidth.task_bucket(task.get("speed_limit_kb", 0))
+        
+        # Short links (b23.tv, vm.tiktok.com, v.douyin.com) are expanded once and cached
+        url = url_router.resolve(task["url"])
+        if url != task["url"]:
+            task = dict(task, url=url, original_url=task["url"])
+        
+        platform = self._identify_platform(url)
+        use_archive = settings.get("use_archive", False) and platform in self.ARCHIVE_PLATFORMS
+        if use_archive and self._in_archive(url, settings):
+            print(f"[Core] {url_router.archive_id(url)} already in archive, skipping")
+            return True, "Đã tải trước đó (archive), bỏ qua", None
         
+        success, msg, hist = self._dispatch(task, platform, settings, callbacks)
+        if success and hist:
+            for item in hist if isinstance(hist, list) else [hist]:
+                item.setdefault("key", "|".join(url_router.canonical_key(item.get("url") or url)))
+            if use_archive: self._record_archive(url, settings)
+        return success, msg, hist
+
+    def _dispatch(self, task, platform, settings, callbacks):
         # Cookie handling is now done directly in _download_general_ytdlp
         # using either cookiefile (priority) or cookiesfrombrowser (fallback)
         
-        platform = self._identify_platform(task["url"])
         print(f"[Core DEBUG] URL: {task['url']}")
         print(f"[Core DEBUG] Platform Identified: '{platform}'")
         
+        # [FAST PATH] URL already points at a media file/manifest -> no extraction needed
+        if direct_media and direct_media.detect_media_kind(task["url"]):
+            success, msg, hist = self._download_direct_media(task, settings, callbacks)
+            if success or self.is_cancelled: return success, msg, hist
+            print(f"[Core] Direct media path failed ({msg}). Falling back to yt-dlp...")
+            return self._download_general_ytdlp(task, settings, callbacks)
+
         if platform == "INSTAGRAM": return self._download_instagram(task, settings, callbacks)
         elif platform == "DOUYIN": return self._download_douyin(task, settings, callbacks)
         elif platform == "TIKTOK": return self._download_tiktok(task, settings, callbacks)
         elif platform == "DAILYMOTION": return self._download_dailymotion(task, settings, callbacks)
-        elif platform == "BILIBILI_CN":
+        elif platform == "BILIBILI" and not url_router.needs_resolve(task["url"]):
             # [BILIBILI CN] Custom API Downloader (Fixed 412)
-            global BilibiliAPI
-            if BilibiliAPI is None:
-                try: from .bilibili_api import BilibiliAPI
+            global bilibili_api
+            if bilibili_api is None:
+                try: from . import bilibili_api
                 except ImportError: pass
 
-            if BilibiliAPI:
+            if bilibili_api:
                 return self._download_bilibili(task, settings, callbacks)
             else:
                 return False, "Thiếu module bilibili_api.py", None
@@ -513,15 +775,26 @@ class DownloaderEngine:
         Specialized TikTok Downloader using TikWM API (SnapTik-like).
         Falls back to yt-dlp if API fails.
         """
+        router = strategy_router.get_router()
+        domain = strategy_router.domain_of(task["url"])
+        if not router.should_try(domain, "tikwm"):
+            print("[TikTok] TikWM keeps failing lately. Using yt-dlp directly...")
+            return self._download_general_ytdlp(task, settings, callbacks)
+        
         callbacks.get('on_status', lambda x:None)("Đang lấy link TikTok (No Watermark)...")
+        t0 = time.monotonic()
         
         try:
             # Lazy import
-            try: from .tiktok_api import TikTokDownloader
-            except ImportError: raise Exception("Module tiktok_api missing")
+            global tiktok_api
+            if tiktok_api is None:
+                try: from . import tiktok_api
+                except ImportError: raise Exception("Module tiktok_api missing")
             
-            tt = TikTokDownloader()
+            # Shared client: a link resolved while checking the URL is reused here
+            tt = tiktok_api.get_client()
             info, error = tt.get_video_info(task["url"])
+            if not (info and info.get("url")): router.record(domain, "tikwm", False)
             
             if info and info.get("url"):
                 # [FIX] Handle Relative URLs
@@ -544,22 +817,10 @@ class DownloaderEngine:
                 clean_base_name = sanitize_filename(base_name)
                 abs_save_path = os.path.abspath(save_path)
                 
-                # Unique name
-                def get_unique_name(directory, filename, ext):
-                    counter = 1
-                    new_filename = filename
-                    while True:
-                        cand_path = os.path.join(directory, f"{new_filename}.{ext}")
-                        if not os.path.exists(cand_path):
-                            return new_filename
-                        new_filename = f"{filename} ({counter})"
-                        counter += 1
-                
-                unique_base_name = get_unique_name(abs_save_path, clean_base_name, "mp4")
+                unique_base_name = self._get_unique_name(abs_save_path, clean_base_name, "mp4")
                 target_file = os.path.join(abs_save_path, f"{unique_base_name}.mp4")
                 
                 # Manual Download
-                import requests
                 callbacks.get('on_status', lambda x:None)("Đang tải video...")
                 
                 # Download with retry
@@ -568,8 +829,9 @@ class DownloaderEngine:
                     "Referer": "https://www.tiktok.com/" 
                 }
                 
-                s = requests.Session()
-                with s.get(dl_url, headers=headers, stream=True, timeout=30) as r:
+                throttle = self._throttle(dl_url)
+                hasher = hashing.StreamHasher()
+                with http_client.get(dl_url, headers=headers, stream=True, timeout=30) as r:
                     r.raise_for_status()
                     total = int(r.headers.get('content-length', 0))
                     dl = 0
@@ -581,7 +843,9 @@ class DownloaderEngine:
                                 return False, "Đã hủy", None
                             if chunk:
                                 f.write(chunk)
+                                hasher.update(chunk)
                                 dl += len(chunk)
+                                if throttle: throttle(len(chunk))
                                 if total > 0 and dl % (1024*1024) < 65536:
                                     per = (dl/total)*100
                                     callbacks.get('on_progress', lambda x,y:None)(per, f"{per:.1f}%")
@@ -598,31 +862,9 @@ class DownloaderEngine:
                 callbacks.get('on_status', lambda x:None)("Hoàn tất!")
                 callbacks.get('on_progress', lambda x,y:None)(100, "100%")
                 
-                # Process Cuts? (Copy paste logic or refactor?)
-                # For brevity, let's reuse Cut Logic if possible or replicate simple cut
-                # Reuse code logic is better but tricky to inject into _download_general_ytdlp
-                # We will duplicate simple cut logic here for stability
-                
                 final_path = target_file
-                
-                # Perform Cut Logic Duplication (Simplified)
-                if cut_mode and task.get("cut_method", "download_then_cut") == "download_then_cut":
-                     callbacks.get('on_status', lambda x:None)("MSG_CUT_WAIT")
-                     
-                     folder = os.path.dirname(final_path)
-                     name, ext = os.path.splitext(os.path.basename(final_path))
-                     cut_out = os.path.join(folder, f"{name}_cut{ext}")
-                     
-                     t_start = str(timedelta(seconds=task.get("start_time", 0)))
-                     end_t = task.get("end_time", 0)
-                     t_end = str(timedelta(seconds=end_t)) if end_t > 0 else None
-                     
-                     success, msg = self.fast_cut(final_path, cut_out, t_start, t_end) if not task.get("cut_correct_mode") else self.accurate_cut(final_path, cut_out, t_start, t_end)
-                     
-                     if success and os.path.exists(cut_out):
-                         try: os.remove(final_path)
-                         except: pass
-                         os.rename(cut_out, final_path)
+                if cut_mode and self._cut_downloaded_file(final_path, task, callbacks):
+                    hasher = None  # the cut rewrote the file
                 
                 # History
                 size_mb = os.path.getsize(final_path) / (1024 * 1024)
@@ -635,16 +877,21 @@ class DownloaderEngine:
                     "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
                     "url": task["url"] # [NEW] Save Original URL
                 }
+                self._attach_hash(hist, hasher, settings)
+                router.record(domain, "tikwm", True, time.monotonic() - t0)
                 return True, "Success", hist
                 
         except Exception as e:
             print(f"[TikTok] Custom API failed: {e}. Fallback to generic.")
+            if tiktok_api: tiktok_api.get_client().invalidate(task["url"])
+            if not self.is_cancelled: router.record(domain, "tikwm", False)
         
         # Fallback
         return self._download_general_ytdlp(task, settings, callbacks)
 
     def _download_general_ytdlp(self, task, settings, callbacks, extra_opts=None):
         lazy_import_ytdlp()
+        manual_hasher, manual_file = None, None  # set when the manual fallback writes the file itself
         
         # [DEBUG] Print FFmpeg Path and Version
         print(f"[Core DEBUG] Checking FFmpeg Path: '{self.ffmpeg_path}'")
@@ -715,9 +962,18 @@ class DownloaderEngine:
         # But we are inside _download_general_ytdlp, we don't know duration yet unless passed.
         # Check if 'info' peek gave us duration.
         
+        # Adaptive fragment concurrency, learned per site across downloads
+        tuning = None
+        if transfer_tuner and settings.get("adaptive_fragments", True):
+            tuning = transfer_tuner.get_tuner().start(transfer_tuner.site_key(task["url"]))
+        # Shared bandwidth buckets: ratelimit caps this download, the hook shares the global budget
+        throttle = self._throttle(task["url"])
+
         # Hooks Progress
         def progress_hook(d):
             if self.is_cancelled: raise yt_dlp.utils.DownloadError("Cancelled")
+            if tuning: tuning.on_progress(d)
+            if throttle: throttle.on_progress(d)
             
             # [CAPTURE]
             if d['status'] == 'finished':
@@ -754,6 +1010,8 @@ class DownloaderEngine:
             'live_from_start': True,
             # [REMOVED] sleep_interval settings were causing extra delays
         }
+        if tuning: ydl_opts.update(tuning.options)
+        if throttle and throttle.rate: ydl_opts['ratelimit'] = throttle.rate
         
 
         
@@ -848,14 +1106,47 @@ class DownloaderEngine:
             # It will retry ONCE without cookies to see if download is possible
             info = None
             retry_without_cookies = False
+            plan = retry_policy.RetryPlan(settings.get("fallback_budget", retry_policy.FALLBACK_BUDGET))
+            
+            # [ROUTING] Sites where yt-dlp keeps failing but the browser fallback works go straight to it
+            router = strategy_router.get_router()
+            domain = strategy_router.domain_of(task["url"])
+            browser_stats = router.stats(domain, "browser") or {}
+            skip_ytdlp = (router.order(domain, ["ytdlp", "browser"])[0] == "browser"
+                          and browser_stats.get("rate", 0) > strategy_router.PRIOR_RATE)
             
             while True:
                 try:
+                    if skip_ytdlp:
+                        print(f"[Core] {domain}: yt-dlp failed here before, going straight to browser fallback.")
+                        raise yt_dlp.utils.DownloadError(f"yt-dlp skipped for {domain}")
+                    t0 = time.monotonic()
                     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                         info = ydl.extract_info(task["url"], download=False)
+                    if host_limiter: host_limiter.report(task["url"], 200)
+                    router.record(domain, "ytdlp", True, time.monotonic() - t0)
                     break # Success
                 except yt_dlp.utils.DownloadError as e:
                     err_msg = str(e).lower()
+                    err_class = "ERR_UNKNOWN" if skip_ytdlp else retry_policy.classify(err_msg)
+                    print(f"[Core] Extraction error class: {err_class}")
+                    if self.is_cancelled: raise e
+                    if not skip_ytdlp: router.record(domain, "ytdlp", False)
+                    
+                    # [POLICY] 404 / geo / DRM / private...: nothing below can help, fail fast
+                    if retry_policy.is_hopeless(err_class): raise e
+                    
+                    # [RETRY] Throttling / network hiccups: back off and retry before any fallback
+                    status_code = host_limiter.throttle_status(err_msg) if host_limiter else None
+                    if status_code: host_limiter.report(task["url"], status_code)
+                    delay = plan.retry_delay(err_class)
+                    if delay is not None:
+                        if status_code: delay = max(delay, host_limiter.get(task["url"]).backoff_remaining())
+                        print(f"[Core] {err_class}: retrying in {delay:.0f}s...")
+                        callbacks.get('on_status', lambda x:None)(f"Lỗi tạm thời ({err_class}). Thử lại sau {delay:.0f}s...")
+                        end = time.time() + delay
+                        while time.time() < end and not self.is_cancelled: time.sleep(0.2)
+                        continue
                     
                     # [FIX] Enhanced Fallback Logic
                     # If we are using browser cookies (Method 2) and ANY error occurs (extraction failed, database locked, etc)
@@ -863,9 +1154,8 @@ class DownloaderEngine:
                     # We simply retry ONCE without any cookies to see if the video is public.
                     has_cookies = 'cookiesfrombrowser' in ydl_opts or 'cookiefile' in ydl_opts
                     
-                    # Special check: If error is just 404/Not Found, retrying won't help, but it's harmless.
-                    # Critical check: If we haven't retried yet and we were using cookies
-                    if has_cookies and not retry_without_cookies:
+                    # Critical check: If we haven't retried yet, we were using cookies and the error class allows it
+                    if has_cookies and not retry_without_cookies and not skip_ytdlp and plan.allows(err_class, retry_policy.NO_COOKIES):
                         # ATTEMPT 2: Retry without browser cookies
                         print(f"[Core] Cookie/Download error ({err_msg}). Retrying WITHOUT cookies...")
                         callbacks.get('on_status', lambda x:None)("Lỗi Cookie/Tải! Thử lại không cần Cookie...")
@@ -877,19 +1167,20 @@ class DownloaderEngine:
                         retry_without_cookies = True
                         continue # Loop again
                     else:
-                        # [FALLBACK LEVEL 1] Universal DrissionPage / BrowserEngine
-                        print(f"[Core] yt-dlp failed ({err_msg}). Attempting Browser Fallback (DrissionPage)...")
-                        callbacks.get('on_status', lambda x:None)("Lỗi yt-dlp. Đang thử Browser Fallback...")
-                        
                         global PlaywrightEngine
-                        if PlaywrightEngine is None:
-                            try: from .playwright_engine import PlaywrightEngine
-                            except ImportError: PlaywrightEngine = None
-                            
                         fallback_success = False
                         
+                        # [FALLBACK LEVEL 1] Universal DrissionPage / BrowserEngine
+                        if plan.allows(err_class, retry_policy.BROWSER):
+                            print(f"[Core] yt-dlp failed ({err_msg}). Attempting Browser Fallback (DrissionPage)...")
+                            callbacks.get('on_status', lambda x:None)("Lỗi yt-dlp. Đang thử Browser Fallback...")
+                            
+                            if PlaywrightEngine is None:
+                                try: from .playwright_engine import PlaywrightEngine
+                                except ImportError: PlaywrightEngine = None
+                        
                         # --- TRY DRISSIONPAGE ---
-                        if PlaywrightEngine:
+                        if PlaywrightEngine and plan.allows(err_class, retry_policy.BROWSER):
                             try:
                                 pw = PlaywrightEngine(headless=True)
                                 sniff_data = pw.sniff_video(task["url"])
@@ -915,7 +1206,7 @@ class DownloaderEngine:
                                 print(f"[Core] Browser Fallback Error: {pe}")
 
                         # --- TRY UNDETECTED CHROMEDRIVER (UC) [LEVEL 2] ---
-                        if not fallback_success:
+                        if not fallback_success and plan.allows(err_class, retry_policy.UC):
                             print("[Core] Browser Fallback failed/skipped. Attempting Undetected-Chromedriver (UC)...")
                             callbacks.get('on_status', lambda x:None)("Đang thử cơ chế mạnh nhất (UC)...")
                             
@@ -943,6 +1234,9 @@ class DownloaderEngine:
                             except Exception as uce:
                                 print(f"[Core] UC Error: {uce}")
 
+                        if plan.allows(err_class, retry_policy.BROWSER) or plan.allows(err_class, retry_policy.UC):
+                            router.record(domain, "browser", fallback_success)
+                        
                         if fallback_success:
                             # Set special flag for UI
                             callbacks.get('on_status', lambda x:None)("Fallback thành công! Đang tải...")
@@ -961,7 +1255,7 @@ class DownloaderEngine:
                         
                         # [FALLBACK LEVEL 3] OAuth2 for Bot Verification
                         # If error is specifically "Sign in / Bot" and we haven't tried OAuth2 yet
-                        if "sign in" in err_msg or "bot" in err_msg:
+                        if ("sign in" in err_msg or "bot" in err_msg) and plan.allows(err_class, retry_policy.OAUTH):
                             print(f"[Core] Bot detection ({err_msg}). Attempting OAuth2...")
                             callbacks.get('on_status', lambda x:None)("Phát hiện Bot Check. Đang thử OAuth2... (Xem Terminal)")
                             
@@ -1009,6 +1303,11 @@ class DownloaderEngine:
                                 print(f"[Core] OAuth2 failed: {oe}")
                                 # Proceed to raise e
 
+                        # The learned route was wrong this time: give yt-dlp its normal chance
+                        if skip_ytdlp:
+                            skip_ytdlp = False
+                            continue
+
                         # If ALL fallbacks failed, re-raise original error
                         raise e
             
@@ -1039,17 +1338,7 @@ class DownloaderEngine:
             # [FIX] Sanitize extension (remove leading dot)
             clean_ext = final_ext.lstrip('.')
 
-            def get_unique_name(directory, filename, ext):
-                counter = 1
-                new_filename = filename
-                while True:
-                    cand_path = os.path.join(directory, f"{new_filename}.{ext}")
-                    if not os.path.exists(cand_path):
-                        return new_filename
-                    new_filename = f"{filename} ({counter})"
-                    counter += 1
-            
-            unique_base_name = get_unique_name(abs_save_path, clean_base_name, clean_ext)
+            unique_base_name = self._get_unique_name(abs_save_path, clean_base_name, clean_ext)
             
             # 4. Gán lại vào outtmpl để yt-dlp dùng tên này
             # IMPORTANT: Use the original save_path to keep relative paths if user intended, 
@@ -1092,15 +1381,20 @@ class DownloaderEngine:
                             
                             err_msg = str(e).lower()
                             print(f"[Core] yt-dlp Download Error: {err_msg}")
+                            status_code = host_limiter.throttle_status(err_msg) if host_limiter else None
+                            if status_code: host_limiter.report(task["url"], status_code)
                             
                             # Check if we should try fallback
                             # If it was ALREADY a fallback (PlaywrightFallback), stepping into this block logic below handles it (manual download)
                             # But if it was a standard yt-dlp download that failed, 'info' is safe to overwrite or ignore.
                             
                             should_try_fallback = False
+                            err_class = retry_policy.classify(err_msg)
                             if info.get('extractor') == 'PlaywrightFallback':
                                 # Already in fallback mode, proceed to manual download logic below
                                 pass 
+                            elif not plan.allows(err_class, retry_policy.BROWSER):
+                                print(f"[Core] {err_class}: browser fallback cannot help, failing fast.")
                             else:
                                 # Standard download failed. Trigger fallback sniffing.
                                 print(f"[Core] Standard Download Failed. Triggering Browser Fallback...")
@@ -1143,8 +1437,7 @@ class DownloaderEngine:
                                 print(f"[Core] yt-dlp failed on fallback link ({e}). Trying manual download...")
                                 callbacks.get('on_status', lambda x:None)("Thử tải trực tiếp (Manual Download)...")
                                 
-                                # Use requests to download
-                                import requests
+                                # Use the shared HTTP pool to download
                                 target_url = info['url']
                                 headers = ydl_opts.get('http_headers', {})
                                 # Ensure we have UA
@@ -1158,7 +1451,6 @@ class DownloaderEngine:
                                 
                                 try:
                                     # [FIX] Enhanced Manual Download
-                                    s = requests.Session()
                                     # Ensure critical headers
                                     if 'Referer' not in headers:
                                          if "tiktok.com" in target_url or "tiktokcdn" in target_url:
@@ -1166,20 +1458,10 @@ class DownloaderEngine:
                                     
                                     print(f"[Core] Manual DL Headers: {headers.keys()}")
                                     
-                                    with s.get(target_url, headers=headers, stream=True, timeout=(15, 120)) as r:
-                                        r.raise_for_status()
-                                        total_size = int(r.headers.get('content-length', 0))
-                                        dl_size = 0
-                                        with open(target_file, 'wb') as f:
-                                            for chunk in r.iter_content(chunk_size=65536):
-                                                if self.is_cancelled: break
-                                                if chunk:
-                                                    f.write(chunk)
-                                                    dl_size += len(chunk)
-                                                    # UI update (throttle)
-                                                    if total_size > 0 and dl_size % (1024*1024) < 65536: # Update roughly every MB
-                                                        per = (dl_size / total_size) * 100
-                                                        callbacks.get('on_progress', lambda x,y:None)(per, f"{per:.1f}%")
+                                    manual_hasher = hashing.StreamHasher()
+                                    m_ok, m_msg = self._stream_to_file(target_url, target_file, headers, callbacks, hasher=manual_hasher)
+                                    if not m_ok: raise Exception(m_msg)
+                                    manual_file = target_file
                                     
                                     if not self.is_cancelled:
                                         # [FIX] Final Size Check
@@ -1227,7 +1509,10 @@ class DownloaderEngine:
                 callbacks.get('on_progress', lambda x,y:None)(101, "Đang chuyển đổi...")
                 
                 mp4_path = final_path.rsplit('.', 1)[0] + '.mp4'
-                convert_success = self._convert_m3u8_to_mp4(final_path, mp4_path)
+                # Playlist URL resolves relative segment paths
+                m3u8_url = info.get('url') if isinstance(info, dict) else None
+                convert_success = self._convert_m3u8_to_mp4(final_path, mp4_path, base_url=m3u8_url,
+                                                            headers=ydl_opts.get('http_headers'))
                 
                 if convert_success and os.path.exists(mp4_path):
                     # Delete original m3u8 file
@@ -1246,51 +1531,9 @@ class DownloaderEngine:
             if cut_mode:
                 print(f"[DEBUG-CUT] Mode={cut_mode}, Method={cut_method}, Path={final_path}, Exists={os.path.exists(final_path) if final_path else 'None'}")
             
-            if cut_mode and cut_method == "download_then_cut" and final_path and os.path.exists(final_path):
-                 try:
-                     # Send status
-                     callbacks.get('on_status', lambda x:None)("MSG_CUT_WAIT")
-                     callbacks.get('on_progress', lambda x,y:None)(101, "MSG_CUT_WAIT")
-                     
-                     start_t = task.get("start_time", 0)
-                     end_t = task.get("end_time", 0)
-                     
-                     # Generate temp output path
-                     folder = os.path.dirname(final_path)
-                     name, ext = os.path.splitext(os.path.basename(final_path))
-                     cut_out = os.path.join(folder, f"{name}_cut{ext}")
-                     
-                     cut_out = os.path.join(folder, f"{name}_cut{ext}")
-                     
-                     # Run FFmpeg
-                     # Prepare timestamps
-                     t_start = str(timedelta(seconds=start_t))
-                     t_end = str(timedelta(seconds=end_t)) if end_t > 0 else None
-                     
-                     if task.get("cut_correct_mode"):
-                         # Mode: Advanced (Re-encode)
-                         callbacks.get('on_status', lambda x:None)("MSG_CUT_ACCURATE") 
-                         success, msg = self.accurate_cut(final_path, cut_out, t_start, t_end)
-                     else:
-                         # Mode: Fast (Stream Copy)
-                         success, msg = self.fast_cut(final_path, cut_out, t_start, t_end)
-                     
-                     if success and os.path.exists(cut_out):
-                         # Delete original full video
-                         try: os.remove(final_path)
-                         except: pass
-                         
-                         # Rename cut video to original name (or keep as is? User expects the result)
-                         # Since base_name already has "(Cut)" appended if cut_mode is True (see line 373),
-                         # the current final_path HAS "(Cut)".
-                         # So we should swap cut_out to final_path to maintain the expected filename.
-                         os.rename(cut_out, final_path)
-                     else: 
-                         # Cut failed, keep full video but warn?
-                         pass
-                 except Exception as e:
-                     print(f"Cut Error: {e}")
-                     pass
+            if cut_mode and final_path and os.path.exists(final_path):
+                if self._cut_downloaded_file(final_path, task, callbacks):
+                    manual_hasher = None  # the cut rewrote the file
 
 
             # History Item
@@ -1306,6 +1549,8 @@ class DownloaderEngine:
                     "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
                     "url": task["url"]  # [NEW] Save Original URL
                 }
+                if final_path == manual_file:
+                    self._attach_hash(hist, manual_hasher, settings)
             return True, "Success", hist
 
         except Exception as e:
@@ -1325,9 +1570,19 @@ class DownloaderEngine:
                     f.write(f"TRACEBACK:\n{traceback.format_exc()}\n")
             except: pass
             
+            if tuning: tuning.on_error(e)
             err_type, friendly_msg = self._classify_error(e)
             return False, friendly_msg, None
 
+    @staticmethod
+    def _dtype_height_limit(dtype):
+        """Resolution cap for dtypes like "video_720", "video_4k" (default 1080)."""
+        if "4k" in dtype: return 2160
+        if "2k" in dtype: return 1440
+        for h in (1080, 720, 480, 360, 240, 144):
+            if str(h) in dtype: return h
+        return 1080
+
     def _configure_format(self, opts, dtype, subs, dl_sub, settings):
         if dtype == "sub_only":
             opts.update({'skip_download': True, 'writesubtitles': True, 'subtitleslangs': subs if subs else ['all'], 'writethumbnail': False})
@@ -1344,16 +1599,7 @@ class DownloaderEngine:
                 'preferredcodec': target
             })
         else: # Video
-            # Parse limits based on dtype which contains strings like "video_720", "video_480" etc.
-            limit = 1080 # Default
-            if "4k" in dtype: limit = 2160
-            elif "2k" in dtype: limit = 1440
-            elif "1080" in dtype: limit = 1080
-            elif "720" in dtype: limit = 720
-            elif "480" in dtype: limit = 480
-            elif "360" in dtype: limit = 360
-            elif "240" in dtype: limit = 240
-            elif "144" in dtype: limit = 144
+            limit = self._dtype_height_limit(dtype)
 
             ext = settings.get("default_video_ext", "mp4")
             
@@ -1461,26 +1707,285 @@ class DownloaderEngine:
             return False, "Không thấy video", None
         except Exception as e: return False, str(e), None
 
+    def _select_bilibili_pages(self, url, task, pages):
+        """Pages to download: task["parts"] range, all for playlist mode, else ?p=N (default P1)."""
+        if task.get("parts"):
+            return [pages[i - 1] for i in parse_range_spec(task["parts"], len(pages))]
+        if task.get("is_plist"):
+            return list(pages)
+        m = re.search(r'[?&]p=(\d+)', url)
+        n = int(m.group(1)) if m else 1
+        return [pages[n - 1] if 1 <= n <= len(pages) else pages[0]]
+
+    def get_bilibili_pages(self, url, settings=None):
+        """Part list ([{'cid','page','part',...}]) of a Bilibili video, [] on error."""
+        global bilibili_api
+        if bilibili_api is None:
+            try: from . import bilibili_api
+            except ImportError: return []
+        match = re.search(r'(BV\w+)', url_router.resolve(url))
+        if not match: return []
+        try:
+            client = bilibili_api.get_client((settings or {}).get("cookie_file") or None)
+            info = client.get_video_info(match.group(1))
+            if info and info.get('code') == 0:
+                return info['data'].get('pages') or []
+        except Exception as e:
+            print(f"[Bilibili] Page list error: {e}")
+        return []
+
+    def get_bilibili_multipart(self, url, settings=None):
+        """
+        Parts of a multi-part BV video, else [] (no BV id, single part, API error):
+        those URLs go through the normal playlist expansion instead.
+        """
+        if not re.search(r'BV\w+', url_router.resolve(url)):
+            return []
+        pages = self.get_bilibili_pages(url, settings)
+        return pages if len(pages) > 1 else []
+
+    def _download_bilibili_part(self, client, bvid, cid, title, task, settings, report, status):
+        """
+        Download one part (cid) of a Bilibili video.
+        report(label, curr, total) receives track progress, status(msg) status text.
+        Returns (success, msg, history_item).
+        """
+        video_referer = f"https://www.bilibili.com/video/{bvid}"
+        dtype = task.get("dtype", "video_1080")
+        is_audio_only = "audio" in dtype
+        height_limit = self._dtype_height_limit(dtype)
+        
+        # 2. Get Play URL
+        status("Đang lấy link tải (WBI Signed)...")
+        play = client.get_play_url(bvid, cid, qn=bilibili_api.qn_for_height(height_limit))
+        
+        if not play or play.get('code') != 0:
+             return False, f"Lỗi lấy playurl (Code {play.get('code') if play else 'None'}): {play.get('message') if play else 'Unknown'}", None
+        
+        dash = play['data'].get('dash')
+        if not dash: return False, "Không tìm thấy luồng DASH (Cần Video+Audio). Có thể cần Cookie.", None
+        
+        # Select video/audio by resolution cap, codec priority and bandwidth
+        lossless = is_audio_only and ("lossless" in dtype or "flac" in dtype)
+        video = bilibili_api.select_video_stream(dash.get('video'), height_limit,
+                                                 settings.get("video_codec_priority", "auto"))
+        audio = bilibili_api.select_audio_stream(dash, lossless=lossless)
+        if not audio or (not video and not is_audio_only):
+            return False, "Không tìm thấy luồng DASH (Cần Video+Audio). Có thể cần Cookie.", None
+        if video:
+            print(f"[Bilibili] {cid} Video: {video.get('height')}p codecid={video.get('codecid')} "
+                  f"{(video.get('bandwidth') or 0) // 1000}kbps | Audio: {(audio.get('bandwidth') or 0) // 1000}kbps")
+        
+        # baseUrl + backupUrl mirrors
+        video_urls = client.stream_urls(video) if video else []
+        audio_urls = client.stream_urls(audio)
+        cancelled = lambda: self.is_cancelled
+        
+        # 3. Download
+        save_path = settings.get("save_path", ".")
+        
+        # Extensions
+        if is_audio_only:
+            if "mp3" in dtype: target_ext = "mp3"
+            elif "m4a" in dtype: target_ext = "m4a" 
+            elif "wav" in dtype: target_ext = "wav"
+            elif "lossless" in dtype or "flac" in dtype: target_ext = "flac"
+            else: target_ext = settings.get("default_audio_ext", "mp3")
+            final_ext = target_ext
+        else:
+            final_ext = "mp4" # Force mp4 for video merge
+
+        # Unique Name
+        base_name = self._get_unique_name(save_path, f"{title} [Bilibili]", final_ext)
+        final_path = os.path.join(save_path, f"{base_name}.{final_ext}")
+        
+        # Temppaths (unique: parts download in parallel)
+        tmp_id = f"{cid}_{uuid.uuid4().hex[:8]}"
+        v_tmp = os.path.join(self.temp_dir, f"bili_vid_{tmp_id}.m4s")
+        a_tmp = os.path.join(self.temp_dir, f"bili_aud_{tmp_id}.m4s")
+        
+        try:
+            if is_audio_only:
+                # --- AUDIO MODE ---
+                status("Đang tải Audio track...")
+                if not client.download_stream(audio_urls, a_tmp, video_referer, lambda c,t: report("Audio",c,t), cancelled,
+                                          throttle=self._throttle(audio_urls[0])):
+                     return False, "Lỗi tải Audio track", None
+                
+                status(f"Đang convert sang {final_ext.upper()}...")
+                
+                # Convert using existing tool helper or raw command
+                self.extract_audio(a_tmp, final_path, format=final_ext, bitrate="192k")
+                
+                return True, "Thành công", {
+                    "platform": "Bilibili", "title": base_name, "path": final_path,
+                    "format": final_ext.upper(), "size": "Unknown", "date": datetime.now().strftime("%Y-%m-%d %H:%M")
+                }
+            
+            # --- VIDEO MODE ---
+            # DL Video (Pass referer)
+            status("Đang tải Video track...")
+            if not client.download_stream(video_urls, v_tmp, video_referer, lambda c,t: report("Video",c,t), cancelled,
+                                          throttle=self._throttle(video_urls[0])):
+                 return False, "Lỗi tải Video track (403/412?). Update Cookie.", None
+            
+            # DL Audio (Pass referer)
+            status("Đang tải Audio track...")
+            if not client.download_stream(audio_urls, a_tmp, video_referer, lambda c,t: report("Audio",c,t), cancelled,
+                                          throttle=self._throttle(audio_urls[0])):
+                 return False, "Lỗi tải Audio track", None
+            
+            # Merge
+            status("Đang ghép file (FFmpeg)...")
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-i", v_tmp, "-i", a_tmp,
+                "-c:v", "copy", "-c:a", "aac",
+                final_path
+            ]
+            subprocess.run(cmd, check=True, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
+            
+            return True, "Thành công", {
+                "platform": "Bilibili", "title": base_name, "path": final_path,
+                "format": "MP4", "size": "Unknown", "date": datetime.now().strftime("%Y-%m-%d %H:%M")
+            }
+        finally:
+            # Cleanup
+            for tmp in (v_tmp, a_tmp):
+                try:
+                    if os.path.exists(tmp): os.remove(tmp)
+                except: pass
+
     def _download_facebook_story(self, task, settings, callbacks):
         return False, "Chưa hỗ trợ FB Story", None
 
     # =========================================================================
     #  PHẦN 4: CUSTOM HANDLERS (BILIBILI, DOUYIN, DAILYMOTION)
     # =========================================================================
+    def _download_direct_media(self, task, settings, callbacks, media_url=None, headers=None, title=None, platform_label="Direct", probe=False):
+        """
+        Download a URL that already points at media, skipping yt-dlp extraction.
+        Progressive files are streamed straight to disk, HLS/DASH manifests are
+        remuxed by FFmpeg. Returns (success, msg, history_item); on failure the
+        caller is expected to fall back to _download_general_ytdlp.
+        """
+        if not direct_media: return False, "Thiếu module direct_media", None
+        media_url = media_url or task["url"]
+        headers = dict(headers or {})
+        headers.setdefault("User-Agent", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+
+        dtype = task.get("dtype", "video_1080")
+        if dtype == "sub_only": return False, "Link media trực tiếp không có phụ đề", None
+
+        kind = direct_media.detect_media_kind(media_url)
+        content_type = ""
+        if probe or not kind:
+            kind, probe_info = direct_media.probe_media_kind(media_url, headers=headers)
+            content_type = probe_info.get("content_type", "")
+        if not kind: return False, "Không phải link media trực tiếp", None
+
+        callbacks.get('on_status', lambda x:None)("Đang tải trực tiếp (bỏ qua trích xuất)...")
+
+        # Setup paths
+        save_path = task.get("save_path") or settings.get("save_path", ".")
+        abs_save_path = os.path.abspath(save_path)
+        base_name = task.get("name", "") or title or task.get("info_title") or ""
+        if not base_name:
+            base_name = os.path.splitext(os.path.basename(media_url.split("?")[0]))[0] or "video"
+        if task.get("cut_mode"): base_name += " (Cut)"
+
+        lazy_import_ytdlp()
+        clean_base_name = yt_dlp.utils.sanitize_filename(base_name)
+        media_ext = direct_media.guess_extension(media_url, content_type, kind)
+
+        is_audio_only = "audio" in dtype
+        if is_audio_only:
+            if dtype == "audio_opus": final_ext = "opus"
+            elif dtype == "audio_mp3": final_ext = "mp3"
+            elif dtype == "audio_lossless": final_ext = settings.get("default_audio_ext", "flac")
+            else: final_ext = "m4a"
+        else:
+            final_ext = media_ext
+
+        unique_base_name = self._get_unique_name(abs_save_path, clean_base_name, final_ext)
+        final_path = os.path.join(abs_save_path, f"{unique_base_name}.{final_ext}")
+        # Audio-only: fetch media to temp first, then convert
+        dl_path = os.path.join(self.temp_dir, f"direct_{uuid.uuid4().hex}.{media_ext}") if is_audio_only else final_path
+
+        # Only bytes we write ourselves can be hashed inline; HLS/DASH outputs are FFmpeg remuxes (no hash)
+        hasher = hashing.StreamHasher() if kind == direct_media.KIND_PROGRESSIVE and not is_audio_only else None
+        if kind == direct_media.KIND_PROGRESSIVE:
+            ok, msg = self._stream_to_file(media_url, dl_path, headers, callbacks, hasher=hasher)
+            if ok and os.path.getsize(dl_path) < 5120:
+                # Error page / expired link instead of media
+                try: os.remove(dl_path)
+                except: pass
+                ok, msg = False, "Direct download returned invalid small file"
+        else:
+            result = None
+            if kind == direct_media.KIND_HLS:
+                result = self._download_hls_native(media_url, dl_path, headers=headers, settings=settings,
+                                                   height_limit=self._dtype_height_limit(dtype),
+                                                   progress=lambda p: callbacks.get('on_progress', lambda x,y:None)(p, f"{p:.1f}%"))
+            if result is not None:
+                ok, msg = result
+            else:
+                callbacks.get('on_progress', lambda x,y:None)(101, "Đang tải luồng (FFmpeg)...")
+                header_blob = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+                cmd = ['-y', '-headers', header_blob, '-i', media_url, '-c', 'copy']
+                if kind == direct_media.KIND_HLS: cmd += ['-bsf:a', 'aac_adtstoasc']
+                ok, msg = self.execute_ffmpeg_cmd(cmd + [dl_path], task.get("duration", 0) or 0,
+                                                  lambda p: callbacks.get('on_progress', lambda x,y:None)(p, f"{p:.1f}%"))
+
+        if self.is_cancelled: return False, "Đã hủy", None
+        if not ok or not os.path.exists(dl_path): return False, msg, None
+
+        if is_audio_only:
+            callbacks.get('on_status', lambda x:None)(f"Đang convert sang {final_ext.upper()}...")
+            self.extract_audio(dl_path, final_path, format=final_ext, bitrate="192k")
+            try: os.remove(dl_path)
+            except: pass
+            if not os.path.exists(final_path): return False, "Lỗi convert audio", None
+
+        # This path always fetches the whole file, so 'direct_cut' is applied afterwards too
+        if task.get("cut_mode") and self._cut_downloaded_file(final_path, dict(task, cut_method="download_then_cut"), callbacks):
+            hasher = None  # the cut rewrote the file
+
+        callbacks.get('on_status', lambda x:None)("Hoàn tất!")
+        callbacks.get('on_progress', lambda x,y:None)(100, "100%")
+
+        size_mb = os.path.getsize(final_path) / (1024 * 1024)
+        return True, "Success", self._attach_hash({
+            "platform": platform_label,
+            "title": unique_base_name,
+            "path": final_path,
+            "format": final_ext.upper(),
+            "size": f"{size_mb:.2f} MB",
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "url": task["url"]
+        }, hasher, settings)
+
     def _download_dailymotion(self, task, settings, callbacks):
         url = task["url"]
         callbacks.get('on_status', lambda x: None)("Đang tải Dailymotion (API)...")
         
-        global DailymotionDownloader
-        if DailymotionDownloader is None:
-            try: from .dailymotion_api import DailymotionDownloader
+        global dailymotion_api
+        if dailymotion_api is None:
+            try: from . import dailymotion_api
             except ImportError: return False, "Thiếu Dailymotion API", None
             
         try:
-            dm = DailymotionDownloader()
+            dm = dailymotion_api.get_client()
             info, err = dm.get_video_info(url)
             if not info: return False, f"Lỗi Dailymotion: {err}", None
             
+            # HLS manifest from the API: concurrent native segment fetch
+            success, msg, hist = self._download_direct_media(task, settings, callbacks, media_url=info["url"],
+                                                             headers=dm.headers, title=info["title"],
+                                                             platform_label="Dailymotion")
+            if success or self.is_cancelled: return success, msg, hist
+            print(f"[Core] Dailymotion direct HLS failed ({msg}). Falling back to yt-dlp...")
+            
             # Pass to generic downloader with direct URL
             direct_task = task.copy()
             direct_task["url"] = info["url"]
@@ -1491,6 +1996,11 @@ class DownloaderEngine:
         except Exception as e:
             return False, str(e), None
 
+    _DOUYIN_HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Referer": "https://www.douyin.com/",
+    }
+
     def _download_douyin(self, task, settings, callbacks):
         url = task["url"]
         
@@ -1505,18 +2015,24 @@ class DownloaderEngine:
              if not user_name and task.get("info_title"):
                  direct_task["name"] = task["info_title"]
              
+             # Resolved CDN link -> transfer immediately, no extraction
+             success, msg, hist = self._download_direct_media(task, settings, callbacks, media_url=task["resolved_url"],
+                                                              headers=self._DOUYIN_HEADERS, title=direct_task.get("name"),
+                                                              platform_label="Douyin", probe=True)
+             if success or self.is_cancelled: return success, msg, hist
+             print(f"[Douyin] Direct transfer of cached link failed ({msg}). Using yt-dlp...")
              return self._download_general_ytdlp(direct_task, settings, callbacks)
 
         callbacks.get('on_status', lambda x: None)("Đang tải Douyin (API)...")
         
-        global DouyinDownloader
-        if DouyinDownloader is None:
-            try: from .douyin_api import DouyinDownloader
+        global douyin_api
+        if douyin_api is None:
+            try: from . import douyin_api
             except ImportError: return False, "Thiếu module douyin_api", None
 
         try:
-            dd = DouyinDownloader(headless=True)
-            info, err = dd.get_video_info(url)
+            # Shared client: HTTP resolve first, result cached from the URL check
+            info, err = douyin_api.get_client().get_video_info(url)
             
             if not info:
                 # [FIX] Fallback to generic yt-dlp (which has Playwright/UC fallback)
@@ -1530,14 +2046,19 @@ class DownloaderEngine:
                  print("[Douyin] No video URL found. Falling back...")
                  return self._download_general_ytdlp(task, settings, callbacks)
             
-            # Use yt-dlp generic to download direct URL -> easiest integration with existing hooks
             callbacks.get('on_status', lambda x: None)("Đang tải xuống video...")
             
+            # Direct CDN link -> stream it without a yt-dlp extraction round
+            success, msg, hist = self._download_direct_media(task, settings, callbacks, media_url=video_url,
+                                                             headers=self._DOUYIN_HEADERS, title=info.get("title"),
+                                                             platform_label="Douyin", probe=True)
+            if success or self.is_cancelled: return success, msg, hist
+            
             # Create a localized task for the direct URL
             direct_task = task.copy()
             direct_task["url"] = video_url
             # Force filename 
-            direct_task["name"] = task.get("name", info.get("title"))
+            direct_task["name"] = task.get("name") or info.get("title")
             
             # Call generic downloader on the direct URL
             return self._download_general_ytdlp(direct_task, settings, callbacks)
@@ -1551,27 +2072,41 @@ class DownloaderEngine:
         
         # [BBDown PRIORITY]
         try:
-            from .bbdown_engine import BBDownEngine
+            from .bbdown_engine import BBDownEngine, page_spec
             bb = BBDownEngine()
             if bb.is_available():
                 callbacks.get('on_status', lambda x: None)("Phát hiện BBDown. Đang tải bằng cơ chế ưu tiên...")
                 
                 save_path = settings.get("save_path", ".")
-                # BBDown handles filename automatically usually, but we can set work dir
+                # Multi-part selections: all parts in ONE BBDown process (-p 1,3-5 / ALL)
+                pages, parts = None, 1
+                if task.get("parts") or task.get("is_plist"):
+                    total = len(self.get_bilibili_pages(url, settings)) or 1
+                    picked = parse_range_spec(task.get("parts"), total)
+                    pages = "ALL" if len(picked) == total else page_spec(picked)
+                    parts = len(picked)
                 
-                success, msg = bb.download(url, save_path, 
-                    callback=lambda p, m: callbacks.get('on_progress', lambda x,y:None)(p, m)
+                success, msg, files = bb.download(url, save_path, 
+                    callback=lambda p, m: callbacks.get('on_progress', lambda x,y:None)(p, m),
+                    pages=pages, parts=parts,
+                    multi_thread=settings.get("bbdown_multi_thread", True),
+                    use_aria2c=settings.get("bbdown_aria2c", False),
+                    cancel_check=lambda: self.is_cancelled
                 )
+                if self.is_cancelled: return False, "Đã hủy", None
                 
                 if success:
-                    return True, "BBDown Success", {
+                    date = datetime.now().strftime("%Y-%m-%d %H:%M")
+                    items = [{
                         "platform": "Bilibili (BBDown)", 
-                        "title": "BBDown Video", 
-                        "path": save_path,
-                        "format": "MP4", 
-                        "size": "Unknown", 
-                        "date": datetime.now().strftime("%Y-%m-%d %H:%M")
-                    }
+                        "title": os.path.splitext(os.path.basename(f))[0], 
+                        "path": f,
+                        "format": os.path.splitext(f)[1].lstrip(".").upper(), 
+                        "size": f"{os.path.getsize(f) / (1024 * 1024):.2f} MB", 
+                        "date": date,
+                        "url": url
+                    } for f in files]
+                    return True, "BBDown Success", items if len(items) > 1 else items[0]
                 else:
                     print(f"[Core] BBDown failed: {msg}. Falling back to API...")
             else:
@@ -1585,10 +2120,9 @@ class DownloaderEngine:
         match = re.search(r'(BV\w+)', url)
         if not match: return False, "Link không hợp lệ (Thiếu BV ID)", None
         bvid = match.group(1)
-        video_referer = f"https://www.bilibili.com/video/{bvid}"
         
         try:
-            client = BilibiliAPI(cookie_path=settings.get("cookie_file"))
+            client = bilibili_api.get_client(settings.get("cookie_file") or None)
             
             # 1. Get Info
             info = client.get_video_info(bvid)
@@ -1598,107 +2132,62 @@ class DownloaderEngine:
                 
             v_data = info['data']
             title = v_data['title']
-            cid = v_data['cid']
-            duration = v_data['duration']
-            
-            # 2. Get Play URL
-            callbacks.get('on_status', lambda x: None)("Đang lấy link tải (WBI Signed)...")
-            play = client.get_play_url(bvid, cid, qn=80) # 1080p target
-            
-            if not play or play.get('code') != 0:
-                 return False, f"Lỗi lấy playurl (Code {play.get('code') if play else 'None'}): {play.get('message') if play else 'Unknown'}", None
+            safe_title = "".join([c for c in title if c.isalpha() or c.isdigit() or c==' ']).strip()
             
-            dash = play['data'].get('dash')
-            if not dash: return False, "Không tìm thấy luồng DASH (Cần Video+Audio). Có thể cần Cookie.", None
+            # Multi-part (分P): pick the requested pages
+            pages = v_data.get('pages') or [{'cid': v_data['cid'], 'page': 1, 'part': title}]
+            selected = self._select_bilibili_pages(url, task, pages)
             
-            # Select best video/audio
-            video_url = dash['video'][0]['baseUrl']
-            audio_url = dash['audio'][0]['baseUrl']
+            def part_title(page):
+                if len(pages) <= 1: return safe_title
+                part = "".join([c for c in page.get('part', '') if c.isalpha() or c.isdigit() or c==' ']).strip()
+                return f"{safe_title} P{page.get('page')} {part}".strip()
             
-            # 3. Download
-            save_path = settings.get("save_path", ".")
-            safe_title = "".join([c for c in title if c.isalpha() or c.isdigit() or c==' ']).strip()
+            if len(selected) == 1:
+                page = selected[0]
+                def report(label, curr, total):
+                    per = (curr/total)*100
+                    callbacks.get('on_progress', lambda x,y:None)(per, f"{label}: {per:.1f}%")
+                return self._download_bilibili_part(client, bvid, page['cid'], part_title(page), task, settings,
+                                                    report, callbacks.get('on_status', lambda x: None))
             
-            # Determine Output Type
-            dtype = task.get("dtype", "video_1080")
-            is_audio_only = "audio" in dtype
+            # 2. Parts in parallel (bounded), shared client = shared WBI keys/cookies
+            from concurrent.futures import ThreadPoolExecutor
+            workers = max(1, min(int(settings.get("bili_part_workers", 3)), len(selected)))
+            callbacks.get('on_status', lambda x: None)(f"Đang tải {len(selected)} phần ({workers} luồng song song)...")
             
-            # Extensions
-            if is_audio_only:
-                if "mp3" in dtype: target_ext = "mp3"
-                elif "m4a" in dtype: target_ext = "m4a" 
-                elif "wav" in dtype: target_ext = "wav"
-                elif "lossless" in dtype or "flac" in dtype: target_ext = "flac"
-                else: target_ext = settings.get("default_audio_ext", "mp3")
-                final_ext = target_ext
-            else:
-                final_ext = "mp4" # Force mp4 for video merge
-
-            # Unique Name
-            base_name = f"{safe_title} [Bilibili]"
-            counter = 1
-            while os.path.exists(os.path.join(save_path, f"{base_name}.{final_ext}")):
-                 base_name = f"{safe_title} [Bilibili] ({counter})"
-                 counter += 1
+            progress = {p['cid']: 0.0 for p in selected}
+            progress_lock = threading.Lock()
+            last_ui = [0]
+            video_share = 0.0 if "audio" in task.get("dtype", "video_1080") else 0.8
             
-            final_path = os.path.join(save_path, f"{base_name}.{final_ext}")
+            def make_report(cid):
+                def report(label, curr, total):
+                    # Video track = first 80% of a part, audio = last 20%
+                    frac = curr / total
+                    frac = frac * video_share if label == "Video" else video_share + frac * (1 - video_share)
+                    with progress_lock:
+                        progress[cid] = frac
+                        now = time.time()
+                        if now - last_ui[0] < 0.2: return
+                        last_ui[0] = now
+                        per = sum(progress.values()) / len(progress) * 100
+                    callbacks.get('on_progress', lambda x,y:None)(per, f"{len(selected)} phần: {per:.1f}%")
+                return report
             
-            # Temppaths
-            v_tmp = os.path.join(self.temp_dir, "bili_vid.m4s")
-            a_tmp = os.path.join(self.temp_dir, "bili_aud.m4s")
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(self._download_bilibili_part, client, bvid, p['cid'], part_title(p),
+                                       task, settings, make_report(p['cid']), lambda x: None)
+                           for p in selected]
+                results = [f.result() for f in futures]
             
-            def report_progress(curr, total, label):
-                 per = (curr/total)*100
-                 callbacks.get('on_progress', lambda x,y:None)(per, f"{label}: {per:.1f}%")
-
-            if is_audio_only:
-                # --- AUDIO MODE ---
-                callbacks.get('on_status', lambda x: None)("Đang tải Audio track...")
-                if not client.download_file(audio_url, a_tmp, video_referer, lambda c,t: report_progress(c,t,"Audio")):
-                     return False, "Lỗi tải Audio track", None
-                
-                callbacks.get('on_status', lambda x: None)(f"Đang convert sang {final_ext.upper()}...")
-                
-                # Convert using existing tool helper or raw command
-                self.extract_audio(a_tmp, final_path, format=final_ext, bitrate="192k")
-                
-                if os.path.exists(a_tmp): os.remove(a_tmp)
-                
-                return True, "Thành công", {
-                    "platform": "Bilibili", "title": base_name, "path": final_path,
-                    "format": final_ext.upper(), "size": "Unknown", "date": datetime.now().strftime("%Y-%m-%d %H:%M")
-                }
-            
-            else:
-                # --- VIDEO MODE ---
-                # DL Video (Pass referer)
-                callbacks.get('on_status', lambda x: None)("Đang tải Video track...")
-                if not client.download_file(video_url, v_tmp, video_referer, lambda c,t: report_progress(c,t,"Video")):
-                     return False, "Lỗi tải Video track (403/412?). Update Cookie.", None
-                
-                # DL Audio (Pass referer)
-                callbacks.get('on_status', lambda x: None)("Đang tải Audio track...")
-                if not client.download_file(audio_url, a_tmp, video_referer, lambda c,t: report_progress(c,t,"Audio")):
-                     return False, "Lỗi tải Audio track", None
-                
-                # Merge
-                callbacks.get('on_status', lambda x: None)("Đang ghép file (FFmpeg)...")
-                cmd = [
-                    self.ffmpeg_path, "-y",
-                    "-i", v_tmp, "-i", a_tmp,
-                    "-c:v", "copy", "-c:a", "aac",
-                    final_path
-                ]
-                subprocess.run(cmd, check=True, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0)
-                
-                # Cleanup
-                if os.path.exists(v_tmp): os.remove(v_tmp)
-                if os.path.exists(a_tmp): os.remove(a_tmp)
-                
-                return True, "Thành công", {
-                    "platform": "Bilibili", "title": base_name, "path": final_path,
-                    "format": "MP4", "size": "Unknown", "date": datetime.now().strftime("%Y-%m-%d %H:%M")
-                }
+            items = [h for ok, _, h in results if ok and h]
+            errors = [f"P{p.get('page')}: {m}" for p, (ok, m, _) in zip(selected, results) if not ok]
+            for e in errors: print(f"[Bilibili] {e}")
+            if not items:
+                return False, errors[0] if errors else "Lỗi Bilibili", None
+            msg = "Thành công" if not errors else f"Thành công {len(items)}/{len(selected)} phần"
+            return True, msg, items
 
         except Exception as e:
             return False, f"Lỗi Bilibili: {str(e)}", None
@@ -1,14 +1,55 @@
-import requests
 import re
-import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import http_client
+
+DATA_API = "https://api.dailymotion.com"
+LIST_FIELDS = "id,title,duration,thumbnail_720_url,owner.screenname"
+PAGE_LIMIT = 100          # max page size of the Data API
+MAX_LIST_ITEMS = 1000     # stop paginating huge channels here
+METADATA_WORKERS = 4      # concurrent player-metadata lookups
+
+# First path segments that are not user/channel names
+_RESERVED = {"video", "embed", "playlist", "playlists", "search", "us", "live", "library", "signin", "signup",
+             "partner", "legal", "about", "topic", "tag", "player", "cdn", "explore", "following"}
+
+
+def parse_collection(url):
+    """('playlist', id) / ('user', name) for list URLs, None for single videos or non-Dailymotion URLs."""
+    m = re.search(r'dailymotion\.com/playlist/([a-z0-9]+)', url)
+    if m:
+        return ("playlist", m.group(1))
+    m = re.search(r'dailymotion\.com/([A-Za-z0-9_.-]+)/?(?:videos/?)?(?:[?#]|$)', url)
+    if m and m.group(1).lower() not in _RESERVED:
+        return ("user", m.group(1))
+    return None
+
+
+def video_info_from_item(item):
+    """Fetcher-format info for one Data API list item (no stream URL: downloads resolve it via metadata)."""
+    d = item.get('duration', 0) or 0
+    return {
+        "id": item.get("id"),
+        "title": item.get("title") or f"Dailymotion {item.get('id')}",
+        "uploader": item.get("owner.screenname", "Dailymotion User"),
+        "thumbnail": item.get("thumbnail_720_url", ""),
+        "duration": d,
+        "duration_string": f"{int(d) // 60}:{int(d) % 60:02d}" if d else "??:??",
+        "url": f"https://www.dailymotion.com/video/{item.get('id')}",
+        "webpage_url": f"https://www.dailymotion.com/video/{item.get('id')}",
+        "extractor_key": "Dailymotion (API)",
+        "_fetcher_tier": 1,
+    }
+
 
 class DailymotionDownloader:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        # Shared keep-alive pool; headers go per request (the session is shared)
+        self.headers = {
              'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
              'Referer': 'https://www.dailymotion.com/'
-        })
+        }
 
     def get_video_info(self, url):
         """
@@ -23,7 +64,7 @@ class DailymotionDownloader:
 
             # 2. Call API
             api_url = f"https://www.dailymotion.com/player/metadata/video/{video_id}"
-            res = self.session.get(api_url, timeout=10)
+            res = http_client.api_request('GET', api_url, headers=self.headers, timeout=10)
             
             if res.status_code != 200:
                 return None, f"API Error {res.status_code}"
@@ -82,3 +123,87 @@ class DailymotionDownloader:
             if match: return match.group(1)
             
         return None
+
+    # ------------------------------------------------------------------
+    # Many videos at once
+    # ------------------------------------------------------------------
+    def _data_api(self, path, params, timeout=10):
+        res = http_client.api_request('GET', f"{DATA_API}{path}", params=params, headers=self.headers, timeout=timeout)
+        if res.status_code != 200:
+            raise Exception(f"Data API Error {res.status_code}")
+        return res.json()
+
+    def get_videos_batch(self, video_ids, timeout=10):
+        """{id: info} for many ids via the Data API (100 ids per request)."""
+        ids = list(dict.fromkeys(video_ids))
+        found = {}
+        for i in range(0, len(ids), PAGE_LIMIT):
+            chunk = ids[i:i + PAGE_LIMIT]
+            data = self._data_api("/videos", {"fields": LIST_FIELDS, "limit": PAGE_LIMIT, "ids": ",".join(chunk)}, timeout)
+            for item in data.get('list', []):
+                found[item.get("id")] = video_info_from_item(item)
+        return found
+
+    def get_many_video_info(self, urls, max_workers=METADATA_WORKERS):
+        """{url: (info, error)} with stream URLs, player metadata fetched by a bounded pool."""
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as pool:
+            return dict(zip(urls, pool.map(self.get_video_info, urls)))
+
+    def list_videos(self, url, max_items=MAX_LIST_ITEMS, timeout=10, cancel_check=None):
+        """
+        Playlist/channel listing through the paginated Data API.
+        cancel_check() is polled before each page.
+        Returns (playlist_info, error); playlist_info['entries'] are fetcher-format video infos.
+        """
+        collection = parse_collection(url)
+        if not collection:
+            return None, "Not a Dailymotion playlist/channel URL"
+        kind, ident = collection
+        try:
+            if kind == "playlist":
+                meta = self._data_api(f"/playlist/{ident}", {"fields": "name,owner.screenname"}, timeout)
+                title, uploader = meta.get("name"), meta.get("owner.screenname")
+            else:
+                title = uploader = ident
+            entries, page = [], 1
+            while len(entries) < max_items:
+                if cancel_check and cancel_check():
+                    return None, "Cancelled"
+                data = self._data_api(f"/{kind}/{ident}/videos",
+                                      {"fields": LIST_FIELDS, "limit": PAGE_LIMIT, "page": page}, timeout)
+                entries.extend(video_info_from_item(item) for item in data.get("list", []))
+                if not data.get("has_more"):
+                    break
+                page += 1
+        except Exception as e:
+            return None, f"Dailymotion API Exception: {str(e)}"
+        if not entries:
+            return None, "Dailymotion list is empty"
+        return {
+            "_type": "playlist",
+            "id": ident,
+            "title": title or f"Dailymotion {ident}",
+            "uploader": uploader or "Dailymotion User",
+            "webpage_url": url,
+            "playlist_count": len(entries),
+            "thumbnail": entries[0].get("thumbnail"),
+            "entries": entries[:max_items],
+            "extractor_key": "Dailymotion (API)",
+            "_fetcher_tier": 1,
+        }, None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client (one header set, shared keep-alive pool)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DailymotionDownloader()
+    return _client
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Direct Media Detector
+=====================
+Recognizes URLs that already point at a media resource (progressive file or
+HLS/DASH manifest) so the engine can skip yt-dlp extraction entirely.
+
+Detection is two-step:
+1. URL pattern (extension / mime hints in the query string) - free, no network
+2. Optional HEAD probe on the Content-Type - one round-trip, used for resolved
+   CDN links (Douyin, TikTok, ...) that carry no extension.
+"""
+
+import re
+from urllib.parse import urlparse
+
+# Media kinds returned by the detector
+KIND_PROGRESSIVE = "progressive"  # Plain file, stream bytes to disk
+KIND_HLS = "hls"                  # .m3u8 playlist
+KIND_DASH = "dash"                # .mpd manifest
+
+_PROGRESSIVE_EXTS = ("mp4", "webm", "m4v", "mov", "mkv", "m4a", "mp3", "flv")
+_EXT_RE = re.compile(r'\.(' + '|'.join(_PROGRESSIVE_EXTS + ("m3u8", "mpd")) + r')$', re.IGNORECASE)
+
+# Some CDNs hide the type in the query string instead of the path
+# e.g. douyinvod ...?mime_type=video_mp4
+_QUERY_MIME_RE = re.compile(r'(?:^|&)(?:mime_type|mime)=(video|audio)[_/%2Fa-z0-9-]+', re.IGNORECASE)
+
+_CONTENT_TYPES = {
+    "application/vnd.apple.mpegurl": KIND_HLS,
+    "application/x-mpegurl": KIND_HLS,
+    "audio/mpegurl": KIND_HLS,
+    "audio/x-mpegurl": KIND_HLS,
+    "application/dash+xml": KIND_DASH,
+}
+
+
+def detect_media_kind(url):
+    """
+    Classify URL by pattern only (no network).
+    Returns KIND_* or None if the URL does not look like a media resource.
+    """
+    if not url or not url.lower().startswith(("http://", "https://")):
+        return None
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return None
+
+    match = _EXT_RE.search(parsed.path)
+    if match:
+        ext = match.group(1).lower()
+        if ext == "m3u8": return KIND_HLS
+        if ext == "mpd": return KIND_DASH
+        return KIND_PROGRESSIVE
+
+    if parsed.query and _QUERY_MIME_RE.search(parsed.query):
+        return KIND_PROGRESSIVE
+    return None
+
+
+def kind_from_content_type(content_type):
+    """Map a Content-Type header value to KIND_* (or None for HTML/JSON/etc)."""
+    if not content_type:
+        return None
+    ctype = content_type.split(";")[0].strip().lower()
+    if ctype in _CONTENT_TYPES:
+        return _CONTENT_TYPES[ctype]
+    if ctype.startswith(("video/", "audio/")):
+        return KIND_PROGRESSIVE
+    return None
+
+
+def probe_media_kind(url, headers=None, timeout=10):
+    """
+    Detect media kind by pattern first, then by a HEAD request.
+    Returns (kind, info) where info has 'content_type', 'size' and 'url'
+    (final URL after redirects). kind is None if not direct media.
+    """
+    kind = detect_media_kind(url)
+    info = {"content_type": "", "size": 0, "url": url}
+    try:
+        from . import http_client
+        resp = http_client.head(url, headers=headers or {}, timeout=timeout)
+        # Some CDNs reject HEAD (403/405) - keep the pattern result in that case
+        if resp.status_code < 400:
+            info["content_type"] = resp.headers.get("Content-Type", "")
+            info["size"] = int(resp.headers.get("Content-Length", 0) or 0)
+            info["url"] = resp.url or url
+            probed = kind_from_content_type(info["content_type"])
+            if probed:
+                kind = probed
+            elif info["content_type"].startswith(("text/html", "application/json")):
+                kind = None
+    except Exception as e:
+        print(f"[DirectMedia] HEAD probe failed: {e}")
+    return kind, info
+
+
+def guess_extension(url, content_type="", kind=None):
+    """Best-effort output extension for a direct media URL."""
+    if kind in (KIND_HLS, KIND_DASH):
+        return "mp4"
+    try:
+        match = _EXT_RE.search(urlparse(url).path)
+        if match:
+            return match.group(1).lower()
+    except ValueError:
+        pass
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if ctype.startswith("audio/"):
+        return {"audio/mpeg": "mp3", "audio/mp4": "m4a", "audio/webm": "webm"}.get(ctype, "m4a")
+    if ctype == "video/webm":
+        return "webm"
+    return "mp4"
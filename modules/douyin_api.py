@@ -1,21 +1,118 @@
 # -*- coding: utf-8 -*-
 """
-Douyin video extractor using DrissionPage.
-Uses system Chrome/Edge browser for automation.
+Douyin video extractor.
+Plain HTTP first: the share page embeds the video JSON (_ROUTER_DATA on
+iesdouyin.com, RENDER_DATA on douyin.com), so most videos resolve in one
+request. DrissionPage (system Chrome/Edge) is only launched when that fails.
 """
 import os
 import re
+import json
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from urllib.parse import unquote
+
+from . import http_client
+from . import url_router
 
 # Lazy load DrissionPage
 ChromiumPage = None
 
+SHARE_PAGE = "https://www.iesdouyin.com/share/video/{}/"
+WEB_PAGE = "https://www.douyin.com/video/{}"
+MOBILE_UA = "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1"
+DESKTOP_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+RESULT_TTL = 10 * 60      # play links are signed; re-resolve after this
+MAX_CACHED = 200
+PAGE_TIMEOUT = (5, 15)
+
+_ROUTER_RE = re.compile(r'window\._ROUTER_DATA\s*=\s*(\{.*?\})\s*</script>', re.S)
+_RENDER_RE = re.compile(r'<script id="RENDER_DATA" type="application/json">(.*?)</script>', re.S)
+
+# One Chromium at a time: each instance costs hundreds of MB
+_browser_lock = threading.Lock()
+
+
+def _find(node, match):
+    """First dict in a JSON tree for which match(d) is true (depth first)."""
+    if isinstance(node, dict):
+        if match(node):
+            return node
+        node = list(node.values())
+    if isinstance(node, list):
+        for child in node:
+            found = _find(child, match)
+            if found is not None:
+                return found
+    return None
+
+
+def _first(urls):
+    return urls[0] if urls else ""
+
+
+def parse_router_data(html):
+    """Video info from the iesdouyin.com share page (window._ROUTER_DATA), or None."""
+    m = _ROUTER_RE.search(html or "")
+    if not m:
+        return None
+    try:
+        data = json.loads(m.group(1))
+    except ValueError:
+        return None
+    item = _find(data, lambda d: "aweme_id" in d and isinstance(d.get("video"), dict))
+    if not item:
+        return None
+    video = item["video"]
+    play = _first((video.get("play_addr") or {}).get("url_list"))
+    if not play:
+        return None
+    return {
+        "id": item.get("aweme_id"),
+        "desc": item.get("desc", ""),
+        "url": play.replace("/playwm/", "/play/"),  # watermark-free variant of the same file
+        "thumbnail": _first((video.get("cover") or {}).get("url_list")),
+        "duration": (video.get("duration") or 0) / 1000,
+        "uploader": (item.get("author") or {}).get("nickname") or "Douyin User",
+    }
+
+
+def parse_render_data(html):
+    """Video info from the douyin.com video page (RENDER_DATA, URL-encoded JSON), or None."""
+    m = _RENDER_RE.search(html or "")
+    if not m:
+        return None
+    try:
+        data = json.loads(unquote(m.group(1)))
+    except ValueError:
+        return None
+    item = _find(data, lambda d: "awemeId" in d and isinstance(d.get("video"), dict))
+    if not item:
+        return None
+    video = item["video"]
+    play = _first([a.get("src") for a in video.get("playAddr") or [] if a.get("src")])
+    if not play:
+        return None
+    if play.startswith("//"):
+        play = "https:" + play
+    return {
+        "id": item.get("awemeId"),
+        "desc": item.get("desc", ""),
+        "url": play,
+        "thumbnail": video.get("cover") or video.get("originCover") or "",
+        "duration": (video.get("duration") or 0) / 1000,
+        "uploader": (item.get("authorInfo") or {}).get("nickname") or "Douyin User",
+    }
+
 
 class DouyinDownloader:
     def __init__(self, headless=True):
         self.headless = headless
         self.page = None
-        self._check_dependencies()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()   # aweme id -> (deadline, info)
 
     def _check_dependencies(self):
         global ChromiumPage
@@ -27,11 +124,78 @@ class DouyinDownloader:
                 print("[Douyin] DrissionPage not installed.")
                 ChromiumPage = None
 
+    def _cached(self, key):
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                return dict(hit[1])
+            self._cache.pop(key, None)
+        return None
+
+    def _store(self, key, info):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + RESULT_TTL, dict(info))
+            self._cache.move_to_end(key)
+            while len(self._cache) > MAX_CACHED:
+                self._cache.popitem(last=False)
+
     def get_video_info(self, url):
         """
         Main entry point. Extracts video info from Douyin URL.
+        Tries the HTTP resolver first and launches the browser only if it fails.
+        Results are cached per video id, so a check followed by a download
+        resolves once.
         Returns dict with keys: title, url, thumbnail, duration, uploader, extractor_key
         """
+        url = url_router.resolve(url)
+        aweme_id = url_router.parse(url).id
+        key = aweme_id or url
+        info = self._cached(key)
+        if info:
+            return info, None
+
+        info = self._fetch_http(aweme_id) if aweme_id else None
+        if info:
+            self._store(key, info)
+            return info, None
+
+        with _browser_lock:
+            info, error = self._fetch_browser(url)
+        if info:
+            self._store(key, info)
+        return info, error
+
+    def _fetch_http(self, aweme_id):
+        """Resolve through the pages' embedded JSON (no browser). None on failure."""
+        pages = (
+            (SHARE_PAGE.format(aweme_id), MOBILE_UA, parse_router_data),
+            (WEB_PAGE.format(aweme_id), DESKTOP_UA, parse_render_data),
+        )
+        for page_url, agent, parser in pages:
+            try:
+                resp = http_client.get(page_url, headers={"User-Agent": agent, "Referer": "https://www.douyin.com/"},
+                                       timeout=PAGE_TIMEOUT)
+                found = parser(resp.text) if resp.status_code < 400 else None
+            except Exception as e:
+                print(f"[Douyin] HTTP resolve failed ({page_url}): {e}")
+                continue
+            if found:
+                print(f"[Douyin] Resolved {aweme_id} over HTTP")
+                return {
+                    "id": found["id"] or aweme_id,
+                    "title": self._clean_title(found["desc"]),
+                    "url": found["url"],
+                    "thumbnail": found["thumbnail"],
+                    "duration": found["duration"],
+                    "uploader": found["uploader"],
+                    "extractor_key": "Douyin (HTTP)"
+                }
+        print(f"[Douyin] No embedded video data for {aweme_id}, using browser...")
+        return None
+
+    def _fetch_browser(self, url):
+        """Extract through a DrissionPage-driven Chromium (slow fallback)."""
+        self._check_dependencies()
         if ChromiumPage is None:
             return None, "Module 'DrissionPage' missing. Run: pip install DrissionPage"
 
@@ -77,7 +241,6 @@ class DouyinDownloader:
                     if result: break
                 except Exception as dom_err:
                     print(f"[Douyin] DOM attempt {attempt+1} failed: {dom_err}")
-                    import time
                     time.sleep(1)
             
             # Close browser
@@ -214,3 +377,16 @@ class DouyinDownloader:
         except Exception as e:
             print(f"[Douyin] DOM extraction error: {e}")
             return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide downloader (shared result cache for fetcher and downloads)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DouyinDownloader(headless=True)
+    return _client
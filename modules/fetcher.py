@@ -5,14 +5,27 @@ Fast Video Info Fetcher - Tiered Strategy
 Tier 1: Platform APIs (YouTube oEmbed, Bilibili API) - ~100-500ms
 Tier 2: yt-dlp extract_flat                          - ~1-3s
 Tier 3: Full yt-dlp extraction (fallback)            - ~5-10s
+
+Tiers are hedged: a slow Tier 1 is raced against Tier 2, first good result wins.
+Losing tiers are cancelled cooperatively (yt-dlp before its next request, list
+APIs before their next page); a request already in flight still runs out.
+Tier order is learned per site (strategy_router): tiers that keep failing for a
+domain are skipped, the historically best one goes first.
 """
 
 import re
-import json
+import time
+import queue
 import threading
-from urllib.request import urlopen, Request
-from urllib.parse import quote_plus, urlparse
-from urllib.error import URLError, HTTPError
+from collections import deque
+
+from . import http_client
+from . import strategy_router
+from . import url_router
+from .metadata_cache import MetadataCache
+from .media_info import MediaInfo
+from . import dailymotion_api
+from . import tiktok_api
 
 # --- LAZY IMPORT FOR YT-DLP ---
 yt_dlp = None
@@ -41,14 +54,69 @@ def _ensure_ytdlp():
     return yt_dlp
 
 
+# Cancel event of the hedged race the current tier thread runs in
+_tier_state = threading.local()
+_cancellable_ydl = None
+
+
+def _tier_cancelled():
+    """True once the race this tier belongs to has been decided (a winner, or the fetch gave up)."""
+    event = getattr(_tier_state, "cancel", None)
+    return bool(event and event.is_set())
+
+
+def _new_ydl(ytdlp, opts):
+    """YoutubeDL that stops before its next HTTP request once its tier lost the race."""
+    global _cancellable_ydl
+    if _cancellable_ydl is None:
+        class CancellableYDL(ytdlp.YoutubeDL):
+            def urlopen(self, req):
+                if _tier_cancelled():
+                    raise ytdlp.utils.DownloadCancelled("Tier lost the hedged race")
+                return super().urlopen(req)
+        _cancellable_ydl = CancellableYDL
+    return _cancellable_ydl(opts)
+
+
 class FastFetcher:
     """
     Fast video info fetcher with tiered strategy and caching.
+    
+    In hedged mode (default) tiers race instead of running strictly in
+    sequence: if Tier 1 has not answered after a short hedge delay, Tier 2 is
+    started alongside it and the first acceptable result wins. Failures
+    promote the next tier immediately. Hedge delays adapt to the recorded
+    Tier 1 latency of each platform.
     """
     
-    def __init__(self, cache_size=50):
-        self._cache = {}  # url -> info
+    # fetch_many(): per-platform caps inside the bounded pool
+    # (Douyin Tier 1 may fall back to a real browser, TikWM rate-limits aggressively)
+    PLATFORM_CONCURRENCY = {"DOUYIN": 4, "TIKTOK": 2}
+    BATCH_SIZE = {"DAILYMOTION": 50}   # platforms with a multi-id endpoint
+    
+    HEDGE_DELAY_DEFAULT = 1.5   # seconds before Tier 2 joins the race
+    HEDGE_DELAY_MIN = 0.3
+    HEDGE_DELAY_MAX = 5.0
+    LATENCY_SAMPLES = 20        # per (platform, tier)
+    
+    def __init__(self, cache_size=50, hedged=True, cache_path=None, persist_cache=True, router=None):
+        # (platform, video_id) -> compact MediaInfo; memory LRU backed by an on-disk store
+        self._cache = MetadataCache(max_items=cache_size, db_path=cache_path, persist=persist_cache,
+                                    decode=self._compact)
         self._cache_size = cache_size
+        self.hedged = hedged
+        
+        # (platform, tier) -> deque of (seconds, ok)
+        self._latency = {}
+        self._latency_lock = threading.Lock()
+        
+        self._platform_slots = {p: threading.Semaphore(n) for p, n in self.PLATFORM_CONCURRENCY.items()}
+        
+        # Learned tier order per domain; isolated (in-memory) for non-default caches
+        if router is None:
+            router = strategy_router.get_router() if persist_cache and cache_path is None else strategy_router.StrategyRouter(persist=False)
+        self._router = router
+        self._batch_fetchers = {"DAILYMOTION": self._fetch_dailymotion_batch}
         
         # Start prewarming yt-dlp in background immediately
         threading.Thread(target=_prewarm_ytdlp, daemon=True).start()
@@ -62,102 +130,347 @@ class FastFetcher:
         if not url:
             return None, "Empty URL"
         
-        # Check cache first
-        if url in self._cache:
-            print(f"[Fetcher] Cache hit for {url[:50]}...")
-            return self._cache[url], None
-        
+        # b23.tv / vm.tiktok.com / v.douyin.com: expand once (cached) so the key is the video id
+        url = url_router.resolve(url)
         platform = self._identify_platform(url)
-        info = None
-        error = None
+        key = self._canonical_key(url, platform)
+        
+        # Cache lookup; concurrent fetches of the same video share one tiered fetch
+        info, error, cached = self._cache.get_or_load(key, lambda: self._fetch_uncached(url, platform, timeout))
+        if cached:
+            print(f"[Fetcher] Cache hit for {key[0]}:{key[1][:40]}")
+        return info, error
+    
+    def fetch_many(self, urls, on_result=None, max_workers=4, timeout=10):
+        """
+        Fetch info for many URLs with a bounded worker pool.
+        
+        - Cache hits are answered immediately
+        - Platforms with a multi-id endpoint are fetched in batches
+        - Everything else goes through fetch() with per-platform caps
+        
+        on_result(url, info, error) is called from worker threads as each URL
+        completes. Returns {url: (info, error)} once all are done.
+        """
+        results = {}
+        results_lock = threading.Lock()
+        
+        def emit(url, info, error):
+            with results_lock:
+                if url in results:
+                    return
+                results[url] = (info, error)
+            if on_result:
+                try:
+                    on_result(url, info, error)
+                except Exception as e:
+                    print(f"[Fetcher] on_result callback error: {e}")
+        
+        # Dedupe (keep order), answer cache hits, group the rest by platform
+        jobs = []
+        batches = {}
+        seen = set()
+        for url in urls:
+            url = (url or "").strip()
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            platform = self._identify_platform(url)
+            cached = self._cache.get(self._canonical_key(url, platform))
+            if cached is not None:
+                emit(url, cached, None)
+            elif platform in self._batch_fetchers and not ('list=' in url or '/playlist' in url):
+                batches.setdefault(platform, []).append(url)
+            else:
+                jobs.append(("single", platform, url))
+        
+        for platform, batch_urls in batches.items():
+            size = self.BATCH_SIZE.get(platform, 20)
+            for i in range(0, len(batch_urls), size):
+                jobs.append(("batch", platform, batch_urls[i:i + size]))
+        
+        if not jobs:
+            return results
+        
+        job_queue = queue.Queue()
+        for job in jobs:
+            job_queue.put(job)
+        
+        def run_single(platform, url):
+            slot = self._platform_slots.get(platform)
+            if slot:
+                slot.acquire()
+            try:
+                info, error = self.fetch(url, timeout)
+            finally:
+                if slot:
+                    slot.release()
+            emit(url, info, error)
+        
+        def run_batch(platform, batch_urls):
+            try:
+                found = self._batch_fetchers[platform](batch_urls, timeout)
+            except Exception as e:
+                print(f"[Fetcher] Batch {platform} failed: {e}")
+                found = {}
+            for url in batch_urls:
+                info = found.get(url)
+                if info:
+                    emit(url, self._add_to_cache(url, info), None)
+                else:
+                    # Not in batch answer -> regular tiered fetch
+                    run_single(platform, url)
+        
+        def worker():
+            while True:
+                try:
+                    kind, platform, payload = job_queue.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    if kind == "batch":
+                        run_batch(platform, payload)
+                    else:
+                        run_single(platform, payload)
+                except Exception as e:
+                    if kind == "single":
+                        emit(payload, None, str(e))
+        
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(max_workers, len(jobs))))]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return results
+    
+    def _fetch_uncached(self, url, platform, timeout):
+        tiers = self._route_tiers(url, self._build_tiers(url, platform, timeout))
+        
+        if self.hedged:
+            info, error = self._fetch_hedged(platform, tiers)
+        else:
+            info, error = self._fetch_sequential(platform, tiers)
+        
+        if info is None:
+            print(f"[Fetcher] ALL TIERS FAILED. Final error: {error}")
+        return self._compact(info), error
+    
+    def _build_tiers(self, url, platform, timeout):
+        """
+        Return ordered list of (tier_no, label, callable) for this URL.
+        Each callable returns (info, error).
+        """
+        tiers = []
         
         # Detect playlist (skip Tier 1 for playlists - oEmbed doesn't handle them well)
         is_playlist_url = 'list=' in url or '/playlist' in url
         
         # --- TIER 1: Fast Platform APIs (skip for playlists) ---
-        if not is_playlist_url:
-            if platform == "YOUTUBE":
-                print(f"[Fetcher] Tier 1: YouTube oEmbed...")
-                info, error = self._fetch_youtube_oembed(url, timeout)
-                if info:
-                    print(f"[Fetcher] Tier 1 SUCCESS: {info.get('title', '?')[:40]}")
-            elif platform == "BILIBILI":
-                print(f"[Fetcher] Tier 1: Bilibili API...")
-                info, error = self._fetch_bilibili_api(url, timeout)
-                if info:
-                    print(f"[Fetcher] Tier 1 SUCCESS: {info.get('title', '?')[:40]}")
-            elif platform == "DOUYIN":
-                print(f"[Fetcher] Tier 1: Douyin API...")
-                info, error = self._fetch_douyin_api(url)
-                if info:
-                    print(f"[Fetcher] Tier 1 SUCCESS: {info.get('title', '?')[:40]}")
-            elif platform == "DAILYMOTION":
-                print(f"[Fetcher] Tier 1: Dailymotion API...")
-                info, error = self._fetch_dailymotion_api(url)
-                if info:
-                    print(f"[Fetcher] Tier 1 SUCCESS: {info.get('title', '?')[:40]}")
-            elif platform == "TIKTOK":
-                print(f"[Fetcher] Tier 1: TikTok API (SnapTik-like)...")
-                info, error = self._fetch_tiktok_api(url)
-                if info:
-                    print(f"[Fetcher] Tier 1 SUCCESS: {info.get('title', '?')[:40]}")
+        if platform == "DAILYMOTION" and dailymotion_api.parse_collection(url):
+            # Paginated Data API: whole playlist/channel in a few requests
+            tiers.append((1, "Dailymotion list API", lambda: self._fetch_dailymotion_playlist(url, timeout)))
+        elif platform == "TIKTOK" and tiktok_api.parse_user(url):
+            # Paced cursor pagination of the profile; every video's link is cached for the download
+            tiers.append((1, "TikTok user API", lambda: self._fetch_tiktok_user(url)))
+        elif not is_playlist_url:
+            tier1 = {
+                "YOUTUBE": ("YouTube oEmbed", lambda: self._fetch_youtube_oembed(url, timeout)),
+                "BILIBILI": ("Bilibili API", lambda: self._fetch_bilibili_api(url, timeout)),
+                "DOUYIN": ("Douyin API", lambda: self._fetch_douyin_api(url)),
+                "DAILYMOTION": ("Dailymotion API", lambda: self._fetch_dailymotion_api(url)),
+                "TIKTOK": ("TikTok API (SnapTik-like)", lambda: self._fetch_tiktok_api(url)),
+            }.get(platform)
+            if tier1:
+                tiers.append((1, tier1[0], tier1[1]))
         else:
             print(f"[Fetcher] Playlist detected, skipping Tier 1")
         
-        # --- TIER 2: yt-dlp extract_flat (if Tier 1 failed or unsupported) ---
-        if info is None:
-            print(f"[Fetcher] Tier 2: yt-dlp flat... (Tier 1 error: {error})")
-            info, error = self._fetch_ytdlp_flat(url, timeout=30)
-            if info:
-                print(f"[Fetcher] Tier 2 SUCCESS: {info.get('title', '?')[:40]}")
-        
+        # --- TIER 2: yt-dlp extract_flat ---
+        tiers.append((2, "yt-dlp flat", lambda: self._fetch_ytdlp_flat(url, timeout=30)))
         # --- TIER 3: Full yt-dlp extraction (last resort) ---
-        if info is None:
-            print(f"[Fetcher] Tier 3: yt-dlp full... (Tier 2 error: {error})")
-            info, error = self._fetch_ytdlp_full(url, timeout=60)
+        tiers.append((3, "yt-dlp full", lambda: self._fetch_ytdlp_full(url, timeout=60)))
+        return tiers
+    
+    def _route_tiers(self, url, tiers):
+        """Order tiers by what worked for this domain and record each tier's outcome."""
+        domain = strategy_router.domain_of(url)
+        
+        def recorded(label, func):
+            def run():
+                start = time.monotonic()
+                try:
+                    info, error = func()
+                except Exception:
+                    if not _tier_cancelled():
+                        self._router.record(domain, f"fetch:{label}", False)
+                    raise
+                if not _tier_cancelled():  # a cancelled loser says nothing about the tier
+                    self._router.record(domain, f"fetch:{label}", self._is_acceptable(info), time.monotonic() - start)
+                return info, error
+            return run
+        
+        routed = self._router.order(domain, tiers, key=lambda t: f"fetch:{t[1]}")
+        # Full extraction stays the last resort behind any live Tier 1/2
+        routed = [t for t in routed if t[0] < 3] + [t for t in routed if t[0] >= 3]
+        if [t[0] for t in routed] != [t[0] for t in tiers]:
+            print(f"[Fetcher] Learned tier order for {domain}: {[t[0] for t in routed]}")
+        return [(n, label, recorded(label, func)) for n, label, func in routed]
+    
+    def _is_acceptable(self, info):
+        """A tier result is good enough to return to the UI."""
+        return bool(info) and bool(info.get('title') or info.get('entries'))
+    
+    def _run_tier(self, platform, tier_no, label, func):
+        """Run one tier, recording its latency. Never raises."""
+        print(f"[Fetcher] Tier {tier_no}: {label}...")
+        start = time.monotonic()
+        try:
+            info, error = func()
+        except Exception as e:
+            info, error = None, str(e)
+        ok = self._is_acceptable(info)
+        if _tier_cancelled():
+            return None, "Cancelled"
+        self._record_latency(platform, tier_no, time.monotonic() - start, ok)
+        if ok:
+            print(f"[Fetcher] Tier {tier_no} SUCCESS: {info.get('title', '?')[:40]}")
+        elif info is not None:
+            error = error or "Incomplete info"
+            info = None
+        return info, error
+    
+    def _fetch_sequential(self, platform, tiers):
+        """Classic mode: run tiers one after another."""
+        info, error = None, None
+        for tier_no, label, func in tiers:
+            info, error = self._run_tier(platform, tier_no, label, func)
             if info:
-                print(f"[Fetcher] Tier 3 SUCCESS: {info.get('title', '?')[:40]}")
+                break
+            print(f"[Fetcher] Tier {tier_no} failed: {error}")
+        return info, error
+    
+    def _fetch_hedged(self, platform, tiers):
+        """
+        Hedged mode: the first tier in routed order gets a head start of
+        hedge_delay seconds, then the next one joins (unless that is Tier 3,
+        which only runs on failure). A failed tier promotes the next one
+        immediately. The first
+        acceptable result wins; tiers not yet started are never launched and
+        tiers still running are cancelled (their results are discarded and
+        not recorded as failures).
+        """
+        results = queue.Queue()
+        won = threading.Event()
         
-        if info is None:
-            print(f"[Fetcher] ALL TIERS FAILED. Final error: {error}")
+        def worker(tier_no, label, func):
+            _tier_state.cancel = won
+            info, error = self._run_tier(platform, tier_no, label, func)
+            if not won.is_set():
+                results.put((tier_no, info, error))
         
-        # Cache successful result
-        if info:
-            self._add_to_cache(url, info)
+        next_idx = 0
+        running = 0
         
-        return info, error
+        def launch():
+            nonlocal next_idx, running
+            tier_no, label, func = tiers[next_idx]
+            next_idx += 1
+            running += 1
+            threading.Thread(target=worker, args=(tier_no, label, func), daemon=True).start()
+            return tier_no
+        
+        first = launch()
+        # Hedge by position (routing may put Tier 2 first); Tier 3 never joins a race
+        hedge_at = None
+        if next_idx < len(tiers) and tiers[next_idx][0] < 3:
+            hedge_at = time.monotonic() + self._hedge_delay(platform, first)
+        error = None
+        
+        while running:
+            wait = None
+            if hedge_at is not None:
+                wait = max(0.0, hedge_at - time.monotonic())
+            try:
+                tier_no, info, err = results.get(timeout=wait)
+            except queue.Empty:
+                print(f"[Fetcher] Tier {first} slow, hedging with Tier {tiers[next_idx][0]}...")
+                hedge_at = None
+                launch()
+                continue
+            
+            running -= 1
+            if info:
+                won.set()
+                return info, None
+            
+            error = err
+            print(f"[Fetcher] Tier {tier_no} failed: {err}")
+            hedge_at = None
+            # Promote the next tier; Tier 3 waits until nothing is in flight
+            if next_idx < len(tiers) and (running == 0 or tiers[next_idx][0] < 3):
+                launch()
+        
+        won.set()
+        return None, error
+    
+    def _record_latency(self, platform, tier_no, seconds, ok):
+        with self._latency_lock:
+            samples = self._latency.setdefault((platform, tier_no), deque(maxlen=self.LATENCY_SAMPLES))
+            samples.append((seconds, ok))
+    
+    def _hedge_delay(self, platform, tier_no=1):
+        """
+        How long the first tier may run alone. Uses ~p90 of that tier's recent
+        successful latencies for this platform (so a healthy API rarely gets
+        hedged), and shrinks toward the minimum when it keeps failing.
+        """
+        with self._latency_lock:
+            samples = list(self._latency.get((platform, tier_no), ()))
+        if len(samples) < 3:
+            return self.HEDGE_DELAY_DEFAULT
+        good = sorted(s for s, ok in samples if ok)
+        if not good:
+            return self.HEDGE_DELAY_MIN
+        p90 = good[min(len(good) - 1, int(len(good) * 0.9))]
+        fail_ratio = 1 - len(good) / len(samples)
+        delay = p90 * 1.2 * (1 - fail_ratio)
+        return min(self.HEDGE_DELAY_MAX, max(self.HEDGE_DELAY_MIN, delay))
+    
+    def get_latency_stats(self):
+        """{(platform, tier): (samples, success_rate, median_seconds)} for diagnostics."""
+        stats = {}
+        with self._latency_lock:
+            for key, samples in self._latency.items():
+                if not samples:
+                    continue
+                times = sorted(s for s, _ in samples)
+                stats[key] = (len(samples), sum(1 for _, ok in samples if ok) / len(samples), times[len(times) // 2])
+        return stats
     
     def _identify_platform(self, url):
         """Identify platform from URL."""
-        if not url:
-            return "UNKNOWN"
-        url_lower = url.lower()
-        if "youtube.com" in url_lower or "youtu.be" in url_lower:
-            return "YOUTUBE"
-        if "bilibili.com" in url_lower:
-            return "BILIBILI"
-        if "instagram.com" in url_lower:
-            return "INSTAGRAM"
-        if "tiktok.com" in url_lower:
-            return "TIKTOK"
-        if "twitter.com" in url_lower or "x.com" in url_lower:
-            return "TWITTER"
-        if "douyin.com" in url_lower:
-            return "DOUYIN"
-        if "dailymotion.com" in url_lower or "dai.ly" in url_lower:
-            return "DAILYMOTION"
-        return "OTHER"
+        return url_router.identify(url)
+    
+    def _canonical_key(self, url, platform=None):
+        """
+        Cache key shared by every spelling of the same video:
+        youtu.be/X, watch?v=X&t=30 and shorts/X all map to ("YOUTUBE", "X").
+        """
+        return url_router.canonical_key(url)
+    
+    def _get_cached(self, url):
+        """Cached info for url (any spelling), or None."""
+        return self._cache.get(self._canonical_key(url))
     
     def _add_to_cache(self, url, info):
-        """Add to cache with size limit (LRU-like)."""
-        if len(self._cache) >= self._cache_size:
-            # Remove oldest entry
-            try:
-                oldest_key = next(iter(self._cache))
-                del self._cache[oldest_key]
-            except StopIteration:
-                pass
-        self._cache[url] = info
+        """Store info (compacted) under the canonical key for url. Returns the stored record."""
+        info = self._compact(info)
+        self._cache.put(self._canonical_key(url), info)
+        return info
+    
+    def _compact(self, info):
+        """MediaInfo for a raw info dict; full() re-extracts with yt-dlp."""
+        return MediaInfo.from_info(info, loader=self._fetch_ytdlp_full)
     
     # =========================================================================
     # TIER 1: Fast Platform APIs
@@ -172,11 +485,11 @@ class FastFetcher:
             # Extract video ID for thumbnail
             video_id = self._extract_youtube_id(url)
             
-            oembed_url = f"https://www.youtube.com/oembed?url={quote_plus(url)}&format=json"
-            req = Request(oembed_url, headers={"User-Agent": "Mozilla/5.0"})
-            
-            with urlopen(req, timeout=timeout) as response:
-                data = json.loads(response.read().decode('utf-8'))
+            response = http_client.api_request("GET", "https://www.youtube.com/oembed",
+                                               params={"url": url, "format": "json"}, timeout=timeout)
+            if response.status_code >= 400:
+                return None, f"HTTP {response.status_code}"
+            data = response.json()
             
             # Construct info dict compatible with existing code
             info = {
@@ -192,24 +505,13 @@ class FastFetcher:
             }
             return info, None
             
-        except HTTPError as e:
-            return None, f"HTTP {e.code}"
-        except URLError as e:
-            return None, f"Network error: {e.reason}"
         except Exception as e:
             return None, str(e)
     
     def _extract_youtube_id(self, url):
         """Extract YouTube video ID from URL."""
-        patterns = [
-            r'(?:v=|/v/|youtu\.be/)([a-zA-Z0-9_-]{11})',
-            r'(?:embed/|shorts/)([a-zA-Z0-9_-]{11})',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+        route = url_router.parse(url)
+        return route.id if route.platform == "YOUTUBE" else None
     
     def _fetch_bilibili_api(self, url, timeout=10):
         """
@@ -221,14 +523,11 @@ class FastFetcher:
                 return None, "Invalid Bilibili URL (missing BV ID)"
             
             bvid = match.group(1)
-            api_url = f"https://api.bilibili.com/x/web-interface/view?bvid={bvid}"
-            req = Request(api_url, headers={
-                "User-Agent": "Mozilla/5.0",
-                "Referer": "https://www.bilibili.com/"
-            })
-            
-            with urlopen(req, timeout=timeout) as response:
-                data = json.loads(response.read().decode('utf-8'))
+            response = http_client.api_request("GET", "https://api.bilibili.com/x/web-interface/view",
+                                               params={"bvid": bvid},
+                                               headers={"Referer": "https://www.bilibili.com/"},
+                                               timeout=timeout)
+            data = response.json()
             
             if data.get('code') != 0:
                 return None, f"Bilibili API error: {data.get('message', 'Unknown')}"
@@ -244,6 +543,7 @@ class FastFetcher:
                 "duration_string": f"{duration // 60}:{duration % 60:02d}" if duration else "??:??",
                 "webpage_url": f"https://www.bilibili.com/video/{bvid}",
                 "extractor_key": "Bilibili",
+                "page_count": len(d.get("pages") or []) or 1,  # multi-part (分P) videos
                 "_fetcher_tier": 1,
             }
             return info, None
@@ -253,17 +553,17 @@ class FastFetcher:
     
     def _fetch_douyin_api(self, url):
         """
-        Fetch Douyin info using custom DouyinDownloader (DrissionPage).
+        Fetch Douyin info using the shared DouyinDownloader
+        (embedded page JSON over HTTP, DrissionPage only as a fallback).
         """
         try:
             # Lazy import to avoid overhead if not used
             try:
-                from .douyin_api import DouyinDownloader
+                from . import douyin_api
             except ImportError:
                 return None, "Module douyin_api missing"
                 
-            dd = DouyinDownloader(headless=True)
-            info, error = dd.get_video_info(url)
+            info, error = douyin_api.get_client().get_video_info(url)
             
             if info:
                 # Normalize duration_string
@@ -288,13 +588,7 @@ class FastFetcher:
         Fetch Dailymotion info using Dailymotion Metadata API.
         """
         try:
-            try:
-                from .dailymotion_api import DailymotionDownloader
-            except ImportError:
-                return None, "Module dailymotion_api missing"
-                
-            dm = DailymotionDownloader()
-            info, error = dm.get_video_info(url)
+            info, error = dailymotion_api.get_client().get_video_info(url)
             
             if info:
                  # Clean up data for Fetcher format
@@ -307,18 +601,56 @@ class FastFetcher:
         except Exception as e:
             return None, f"Dailymotion Fetch Error: {str(e)}"
 
+    def _fetch_dailymotion_batch(self, urls, timeout=10):
+        """
+        Fetch many Dailymotion videos in one call of the public Data API
+        (/videos?ids=...). Returns {url: info}; the info carries no stream
+        URL, downloads resolve it again through DailymotionDownloader.
+        """
+        ids = {}
+        for url in urls:
+            m = re.search(r'(?:video/|dai\.ly/)([a-z0-9]+)', url)
+            if m:
+                ids.setdefault(m.group(1), []).append(url)
+        if not ids:
+            return {}
+        
+        client = dailymotion_api.get_client()
+        found = {}
+        for vid, info in client.get_videos_batch(ids, timeout).items():
+            for url in ids.pop(vid, []):
+                found[url] = info
+        
+        # Ids the Data API did not list (unlisted etc.): player metadata, bounded pool
+        # (keyed by the URL we asked for: the returned id may be spelled differently)
+        missing = {same_urls[0]: same_urls for same_urls in ids.values()}
+        for url, (info, _) in client.get_many_video_info(list(missing)).items():
+            if info:
+                d = info.get('duration', 0)
+                info['duration_string'] = f"{int(d) // 60}:{int(d) % 60:02d}" if d else "??:??"
+                info['_fetcher_tier'] = 1
+                for same in missing.get(url, ()):
+                    found[same] = info
+        return found
+    
+    def _fetch_dailymotion_playlist(self, url, timeout=10):
+        """
+        Playlist/channel listing via the paginated Data API. Every entry is
+        cached too, so checking or queueing its videos afterwards is instant.
+        """
+        info, error = dailymotion_api.get_client().list_videos(url, timeout=timeout, cancel_check=_tier_cancelled)
+        if info:
+            for entry in info["entries"]:
+                self._add_to_cache(entry["webpage_url"], entry)
+        return info, error
+    
     def _fetch_tiktok_api(self, url):
         """
-        Fetch TikTok info using custom TikTokDownloader (TikWM).
+        Fetch TikTok info using the shared TikTokDownloader (TikWM).
+        The client caches the resolved link, so the download reuses it.
         """
         try:
-            try:
-                from .tiktok_api import TikTokDownloader
-            except ImportError:
-                return None, "Module tiktok_api missing"
-            
-            tt = TikTokDownloader()
-            info, error = tt.get_video_info(url)
+            info, error = tiktok_api.get_client().get_video_info(url)
             
             if info:
                 d = info.get('duration', 0)
@@ -331,6 +663,14 @@ class FastFetcher:
         except Exception as e:
             return None, f"TikTok Fetch Error: {str(e)}"
 
+    def _fetch_tiktok_user(self, url):
+        """Videos of a TikTok profile; each entry is cached like a checked video."""
+        info, error = tiktok_api.get_client().list_user_videos(url, cancel_check=_tier_cancelled)
+        if info:
+            for entry in info["entries"]:
+                self._add_to_cache(entry["webpage_url"], entry)
+        return info, error
+
     # =========================================================================
     # TIER 2: yt-dlp extract_flat
     # =========================================================================
@@ -359,7 +699,7 @@ class FastFetcher:
         
         try:
             print(f"[Fetcher T2] Starting extract_info for {url[:50]}...")
-            with ytdlp.YoutubeDL(ydl_opts) as ydl:
+            with _new_ydl(ytdlp, ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
             print(f"[Fetcher T2] extract_info returned. Info: {bool(info)}")
             
@@ -401,7 +741,7 @@ class FastFetcher:
         }
         
         try:
-            with ytdlp.YoutubeDL(ydl_opts) as ydl:
+            with _new_ydl(ytdlp, ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
             
             if info:
@@ -420,7 +760,7 @@ class FastFetcher:
             return None, str(e)
     
     def clear_cache(self):
-        """Clear the info cache."""
+        """Clear the info cache (memory and disk)."""
         self._cache.clear()
 
 
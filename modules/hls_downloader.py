@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Native HLS Downloader
+=====================
+Fetches HLS (.m3u8) streams without letting FFmpeg pull segments one by one:
+
+- Parses master playlists and picks a variant under the resolution cap
+- Downloads media segments concurrently (bounded window) with retries
+- Decrypts AES-128 segments (yt-dlp's AES, uses pycryptodome when present)
+- Writes segments IN ORDER into FFmpeg's stdin, which only remuxes (-c copy)
+
+Anything unusual (live playlists, SAMPLE-AES, separate audio renditions) raises
+HLSUnsupported so the caller can fall back to plain FFmpeg.
+
+No content hash is produced: the saved file is FFmpeg's remux, not the segment
+bytes, so it cannot be hashed inline (see hashing.py).
+"""
+
+import os
+import re
+import sys
+import time
+import threading
+import subprocess
+from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+
+from . import http_client
+
+DEFAULT_WORKERS = 8
+SEGMENT_RETRIES = 3
+
+_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class HLSUnsupported(Exception):
+    """Playlist feature not handled natively - use FFmpeg instead."""
+
+
+def _attrs(line):
+    """Parse an attribute list: KEY=VALUE,KEY="quoted" -> dict."""
+    payload = line.split(':', 1)[1] if ':' in line else ''
+    return {k: v.strip('"') for k, v in _ATTR_RE.findall(payload)}
+
+
+def is_playlist_text(text):
+    return text.lstrip('\ufeff').lstrip().startswith('#EXTM3U')
+
+
+def has_relative_uris(text):
+    """True if any segment/variant/key/map URI in the playlist is not an absolute http(s) URL."""
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        uris = re.findall(r'URI="([^"]*)"', line) if line.startswith('#') else [line]
+        if any(not re.match(r'https?://', uri, re.I) for uri in uris):
+            return True
+    return False
+
+
+def parse_playlist(text, base_url=""):
+    """
+    Parse master or media playlist text.
+    Returns {"is_master", "variants", "segments", "endlist", "audio_groups"}.
+    Segment: {"url", "duration", "seq", "key", "byterange", "init"}.
+    """
+    result = {"is_master": False, "variants": [], "segments": [], "endlist": False, "audio_groups": {}}
+    seq = 0
+    duration = 0.0
+    key = None
+    init = None
+    byterange = None
+    next_offset = 0
+    pending_variant = None
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith('#EXT-X-STREAM-INF'):
+            a = _attrs(line)
+            res = a.get('RESOLUTION', '')
+            height = int(res.split('x')[1]) if 'x' in res else 0
+            pending_variant = {"bandwidth": int(a.get('BANDWIDTH', 0) or 0), "height": height,
+                               "codecs": a.get('CODECS', ''), "audio": a.get('AUDIO')}
+            result["is_master"] = True
+        elif line.startswith('#EXT-X-MEDIA:'):
+            a = _attrs(line)
+            if a.get('TYPE') == 'AUDIO' and a.get('URI'):
+                result["audio_groups"].setdefault(a.get('GROUP-ID'), []).append(urljoin(base_url, a['URI']))
+        elif line.startswith('#EXT-X-MEDIA-SEQUENCE'):
+            seq = int(line.split(':', 1)[1])
+        elif line.startswith('#EXTINF'):
+            try: duration = float(line.split(':', 1)[1].split(',')[0])
+            except ValueError: duration = 0.0
+        elif line.startswith('#EXT-X-KEY'):
+            a = _attrs(line)
+            method = a.get('METHOD', 'NONE')
+            if method == 'NONE':
+                key = None
+            elif method == 'AES-128':
+                key = {"uri": urljoin(base_url, a.get('URI', '')), "iv": a.get('IV')}
+            else:
+                raise HLSUnsupported(f"Encryption {method}")
+        elif line.startswith('#EXT-X-MAP'):
+            a = _attrs(line)
+            init = {"url": urljoin(base_url, a.get('URI', '')), "byterange": None}
+            if a.get('BYTERANGE'):
+                length, _, offset = a['BYTERANGE'].partition('@')
+                init["byterange"] = (int(offset or 0), int(length))
+        elif line.startswith('#EXT-X-BYTERANGE'):
+            length, _, offset = line.split(':', 1)[1].partition('@')
+            start = int(offset) if offset else next_offset
+            byterange = (start, int(length))
+            next_offset = start + int(length)
+        elif line.startswith('#EXT-X-ENDLIST'):
+            result["endlist"] = True
+        elif not line.startswith('#'):
+            url = urljoin(base_url, line)
+            if pending_variant is not None:
+                pending_variant["url"] = url
+                result["variants"].append(pending_variant)
+                pending_variant = None
+            else:
+                result["segments"].append({"url": url, "duration": duration, "seq": seq,
+                                           "key": key, "byterange": byterange, "init": init})
+                seq += 1
+                duration = 0.0
+                byterange = None
+    return result
+
+
+def select_variant(variants, height_limit=1080):
+    """Highest resolution under the cap (then highest bandwidth); lowest one if all exceed it."""
+    if not variants:
+        return None
+    capped = [v for v in variants if not v["height"] or v["height"] <= height_limit]
+    if capped:
+        return max(capped, key=lambda v: (v["height"], v["bandwidth"]))
+    return min(variants, key=lambda v: (v["height"], v["bandwidth"]))
+
+
+class HLSDownloader:
+    def __init__(self, ffmpeg_path, headers=None, max_workers=DEFAULT_WORKERS, cancel_check=None, throttle=None,
+                 on_process=None):
+        self.ffmpeg_path = ffmpeg_path
+        self.headers = dict(headers or {})
+        self.max_workers = max(1, int(max_workers))
+        self.cancel_check = cancel_check or (lambda: False)
+        self.throttle = throttle  # bandwidth limiter, called with each segment's size
+        self.process = None  # FFmpeg muxer while download() runs
+        self.on_process = on_process  # called with the muxer when it starts and None when it ends (cancel kill path)
+        self._keys = {}
+        self._keys_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Network
+    # ------------------------------------------------------------------
+    def _get(self, url, byterange=None):
+        headers = dict(self.headers)
+        if byterange:
+            start, length = byterange
+            headers["Range"] = f"bytes={start}-{start + length - 1}"
+        last_err = None
+        for attempt in range(SEGMENT_RETRIES):
+            if self.cancel_check():
+                raise Exception("Cancelled")
+            try:
+                r = http_client.get(url, headers=headers, timeout=(10, 30))
+                r.raise_for_status()
+                return r.content
+            except Exception as e:
+                last_err = e
+                time.sleep(0.5 * (attempt + 1))
+        raise Exception(f"Request failed after {SEGMENT_RETRIES} tries: {last_err}")
+
+    def load_playlist(self, url, height_limit=1080, text=None):
+        """Resolve url (or given text) down to a media playlist. Returns parsed media playlist."""
+        if text is None:
+            text = self._get(url).decode('utf-8', errors='ignore')
+        if not is_playlist_text(text):
+            raise HLSUnsupported("Not an m3u8 playlist")
+        parsed = parse_playlist(text, url)
+        if parsed["is_master"]:
+            variant = select_variant(parsed["variants"], height_limit)
+            if not variant:
+                raise HLSUnsupported("Master playlist without variants")
+            if variant.get("audio") and parsed["audio_groups"].get(variant["audio"]):
+                raise HLSUnsupported("Separate audio rendition")
+            print(f"[HLS] Variant: {variant['height']}p {variant['bandwidth'] // 1000}kbps")
+            text = self._get(variant["url"]).decode('utf-8', errors='ignore')
+            parsed = parse_playlist(text, variant["url"])
+        if not parsed["endlist"]:
+            raise HLSUnsupported("Live playlist")
+        if not parsed["segments"]:
+            raise HLSUnsupported("Empty playlist")
+        return parsed
+
+    def _key_bytes(self, uri):
+        with self._keys_lock:
+            if uri not in self._keys:
+                self._keys[uri] = self._get(uri)
+            return self._keys[uri]
+
+    def _fetch_segment(self, seg):
+        data = self._get(seg["url"], seg["byterange"])
+        if self.throttle:
+            self.throttle(len(data))
+        key = seg["key"]
+        if key:
+            from yt_dlp.aes import aes_cbc_decrypt_bytes, unpad_pkcs7
+            iv = bytes.fromhex(key["iv"][2:].zfill(32)) if key.get("iv") else seg["seq"].to_bytes(16, 'big')
+            data = unpad_pkcs7(aes_cbc_decrypt_bytes(data, self._key_bytes(key["uri"]), iv))
+        return data
+
+    # ------------------------------------------------------------------
+    # Download + mux
+    # ------------------------------------------------------------------
+    def download(self, url, output_path, height_limit=1080, progress_callback=None, text=None):
+        """
+        Download the stream at url into output_path (remuxed by FFmpeg).
+        text: playlist content if already downloaded (url is then its base URL).
+        Returns (success, message). Raises HLSUnsupported before any output is written.
+        """
+        playlist = self.load_playlist(url, height_limit, text=text)
+        segments = playlist["segments"]
+        total = len(segments)
+        fmp4 = segments[0]["init"] is not None
+
+        cmd = [self.ffmpeg_path, '-y', '-loglevel', 'error']
+        if not fmp4:
+            cmd += ['-f', 'mpegts']
+        cmd += ['-i', 'pipe:0', '-c', 'copy']
+        if output_path.lower().endswith(('.mp4', '.m4a', '.mov')):
+            cmd += ['-bsf:a', 'aac_adtstoasc']
+        cmd.append(output_path)
+
+        creation_flags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE, creationflags=creation_flags)
+        if self.on_process: self.on_process(self.process)
+        # Drain stderr so FFmpeg never blocks on a full pipe
+        err_chunks = []
+        drain = threading.Thread(target=lambda: err_chunks.append(self.process.stderr.read()), daemon=True)
+        drain.start()
+
+        window = self.max_workers * 2  # bounds memory: at most this many segments buffered
+        written_init = None
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {}
+            for i in range(total):
+                while len(futures) < window and i + len(futures) < total:
+                    j = i + len(futures)
+                    futures[j] = pool.submit(self._fetch_segment, segments[j])
+                data = futures.pop(i).result()
+                if self.cancel_check():
+                    raise Exception("Cancelled")
+
+                init = segments[i]["init"]
+                if init and init is not written_init:
+                    self.process.stdin.write(self._get(init["url"], init["byterange"]))
+                    written_init = init
+                self.process.stdin.write(data)
+
+                if progress_callback:
+                    progress_callback(min((i + 1) / total * 100, 99.9))
+            self.process.stdin.close()
+            self.process.wait()
+            drain.join(5)
+        except Exception as e:
+            try: self.process.kill()
+            except: pass
+            try:
+                if os.path.exists(output_path): os.remove(output_path)
+            except: pass
+            return False, str(e)
+        finally:
+            # Drop queued segments if we bailed out early
+            pool.shutdown(wait=False, cancel_futures=True)
+            proc, self.process = self.process, None
+            if self.on_process: self.on_process(None)
+
+        if proc.returncode != 0 or not os.path.exists(output_path):
+            err = (b"".join(c for c in err_chunks if c)).decode('utf-8', errors='ignore')[:300]
+            return False, f"FFmpeg mux failed: {err}"
+        return True, "Success"
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Per-Host AIMD Limiter
+=====================
+Adaptive concurrency per host, shared by everything that goes through
+http_client (fetcher, downloaders, platform API clients) plus explicit reports
+from yt-dlp and API error codes (Bilibili -352/-412):
+
+- additive increase: +1/limit per successful response (about +1 per "round")
+- multiplicative decrease: halve on 429/412 (and 403 on hosts known to
+  throttle with 403) and pause the host with an exponential backoff (or the
+  server's Retry-After); probes (HEAD / ranged speed tests) never count a 403
+- one decrease per congestion event: throttles arriving while the host is
+  already backing off only extend the pause
+
+Keeps batch runs near the highest rate a site tolerates instead of
+alternating between bans and idling.
+"""
+
+import re
+import time
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+THROTTLE_STATUSES = (429, 403, 412)
+INITIAL_LIMIT = 4
+MIN_LIMIT = 1
+MAX_LIMIT = 16
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+MAX_RETRY_AFTER = 120.0  # never park a host longer than this, whatever the server says
+# Elsewhere a 403 usually means geo-block, expired signature or missing cookie, not congestion
+THROTTLE_403_HOSTS = ("bilibili.com", "bilivideo.com", "bilivideo.cn", "hdslb.com")
+
+_STATUS_RE = re.compile(r'\b(429|403|412)\b')
+
+
+def host_key(url):
+    try:
+        return (urlparse(url).hostname or url).lower()
+    except ValueError:
+        return url.lower()
+
+
+def throttles_with_403(host):
+    return any(host == h or host.endswith("." + h) for h in THROTTLE_403_HOSTS)
+
+
+def _retry_after_seconds(value):
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return None  # HTTP-date form: fall back to our own backoff
+
+
+class HostLimiter:
+    def __init__(self, host, initial=INITIAL_LIMIT, min_limit=MIN_LIMIT, max_limit=MAX_LIMIT):
+        self.host = host
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.in_flight = 0
+        self.backoff_until = 0.0
+        self.strikes = 0  # consecutive congestion events, drives the backoff length
+        self._cond = threading.Condition()
+
+    def backoff_remaining(self):
+        return max(0.0, self.backoff_until - time.monotonic())
+
+    def acquire(self, cancel_check=None):
+        """Wait for a free slot (and the end of any backoff). Returns False if cancelled."""
+        with self._cond:
+            while True:
+                if cancel_check and cancel_check():
+                    return False
+                wait = self.backoff_remaining()
+                if not wait and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return True
+                self._cond.wait(min(wait, 0.5) if wait else 0.5)
+
+    def release(self):
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._cond.notify()
+
+    def on_success(self):
+        with self._cond:
+            if self.backoff_remaining():
+                return
+            self.strikes = 0
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify()
+
+    def on_throttled(self, retry_after=None):
+        """Halve the limit and pause the host. Returns the pause in seconds."""
+        with self._cond:
+            remaining = self.backoff_remaining()
+            if remaining:
+                # Same congestion event (other in-flight requests failing too)
+                if retry_after and retry_after > remaining:
+                    self.backoff_until = time.monotonic() + retry_after
+                return self.backoff_remaining()
+            self.strikes += 1
+            self.limit = max(self.min_limit, self.limit / 2)
+            delay = retry_after if retry_after is not None else min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (self.strikes - 1))
+            self.backoff_until = time.monotonic() + delay
+        print(f"[HostLimiter] {self.host} throttled -> limit {int(self.limit)}, pause {delay:.1f}s")
+        return delay
+
+    def observe(self, status, retry_after=None, probe=False):
+        """Feed an HTTP status code (and Retry-After header) back into the controller."""
+        if status == 403 and (probe or not throttles_with_403(self.host)):
+            return 0.0
+        if status in THROTTLE_STATUSES:
+            return self.on_throttled(_retry_after_seconds(retry_after))
+        if status < 400:
+            self.on_success()
+        return 0.0
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get(url):
+    """Limiter for the host of url (created on first use)."""
+    host = host_key(url)
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = HostLimiter(host)
+        return _limiters[host]
+
+
+@contextmanager
+def slot(url, cancel_check=None):
+    """Hold one concurrency slot of url's host for the duration of the block."""
+    limiter = get(url)
+    if not limiter.acquire(cancel_check):
+        raise Exception("Cancelled")
+    try:
+        yield limiter
+    finally:
+        limiter.release()
+
+
+def report(url, status, retry_after=None):
+    """Report a status seen outside http_client (yt-dlp errors, API error codes)."""
+    return get(url).observe(status, retry_after)
+
+
+def throttle_status(message):
+    """429/403/412 found in an error message, else None."""
+    text = str(message)
+    m = _STATUS_RE.search(text)
+    if m:
+        return int(m.group(1))
+    if "too many requests" in text.lower():
+        return 429
+    return None
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Shared HTTP Client
+==================
+One process-wide connection pool for every platform client (fetcher, Bilibili,
+TikTok, Dailymotion, direct downloads, updater) so API calls reuse keep-alive
+TCP/TLS connections instead of paying a full handshake each time.
+
+- requests.Session + HTTPAdapter: keep-alive pool per host, bounded size
+- Consistent default timeouts and retries (connect errors, 502/503/504)
+- Stateless: server cookies are never stored and session headers are never
+  mutated after creation, so the session is safe to share between threads.
+  Pass per-call headers (Cookie, Referer, ...) explicitly.
+- Optional HTTP/2 for small API requests (httpx[http2], if installed)
+- Every request goes through the per-host AIMD limiter (host_limiter)
+"""
+
+import threading
+
+from . import host_limiter
+
+DEFAULT_TIMEOUT = (10, 30)  # (connect, read) seconds
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+POOL_SIZE = 32
+
+_session = None
+_session_lock = threading.Lock()
+
+_use_http2 = False
+_h2_client = None
+_h2_unavailable = False
+
+
+def _build_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from http.cookiejar import DefaultCookiePolicy
+
+    retry = Retry(
+        total=2, connect=2, read=1, status=2,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = DEFAULT_USER_AGENT
+    # Never keep server cookies: callers send their own Cookie header
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session():
+    """The shared requests.Session (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def configure(http2=None):
+    """Apply user settings. http2=True enables HTTP/2 for api_request() when httpx is available."""
+    global _use_http2
+    if http2 is not None:
+        _use_http2 = bool(http2)
+
+
+def _get_h2_client():
+    global _h2_client, _h2_unavailable
+    if _h2_client is not None or _h2_unavailable:
+        return _h2_client
+    with _session_lock:
+        if _h2_client is None and not _h2_unavailable:
+            try:
+                import httpx
+                import h2  # noqa: F401 (httpx needs it for http2=True)
+                _h2_client = httpx.Client(
+                    http2=True,
+                    headers={"User-Agent": DEFAULT_USER_AGENT},
+                    limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+                )
+            except ImportError:
+                print("[HTTP] httpx[http2] not installed, using HTTP/1.1 pool.")
+                _h2_unavailable = True
+    return _h2_client
+
+
+def _limited(url, send, stream=False, probe=False):
+    """
+    Run send() inside a host_limiter slot and feed the status code back.
+    Streamed responses keep the slot until they are closed, so the limit
+    bounds concurrent downloads, not just request starts.
+    """
+    limiter = host_limiter.get(url)
+    limiter.acquire()
+    try:
+        resp = send()
+    except BaseException:
+        limiter.release()
+        raise
+    limiter.observe(resp.status_code, resp.headers.get("Retry-After"), probe=probe)
+    if not stream:
+        limiter.release()
+        return resp
+
+    close = resp.close
+    released = threading.Event()
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            if not released.is_set():
+                released.set()
+                limiter.release()
+    resp.close = close_and_release
+    return resp
+
+
+def request(method, url, timeout=DEFAULT_TIMEOUT, probe=False, **kwargs):
+    """
+    requests-style call on the shared pool. Use stream=True for downloads (as a
+    context manager: the host slot is held until the response is closed).
+    probe=True marks speed/format probes, whose 403s say nothing about congestion.
+    """
+    return _limited(url, lambda: get_session().request(method, url, timeout=timeout, **kwargs),
+                    stream=kwargs.get("stream", False), probe=probe)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def head(url, **kwargs):
+    kwargs.setdefault("allow_redirects", True)
+    kwargs.setdefault("probe", True)
+    return request("HEAD", url, **kwargs)
+
+
+def api_request(method, url, params=None, headers=None, data=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Small API call (JSON endpoints). Goes over HTTP/2 when enabled and
+    available, otherwise over the shared HTTP/1.1 pool. The returned response
+    supports .status_code, .headers, .text and .json() in both cases.
+    """
+    client = _get_h2_client() if _use_http2 else None
+    if client is not None:
+        import httpx
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        return _limited(url, lambda: client.request(method, url, params=params, headers=headers, data=data,
+                                                    timeout=timeout, follow_redirects=True))
+    return request(method, url, params=params, headers=headers, data=data, timeout=timeout)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Compact Media Info
+==================
+A yt-dlp info dict for one YouTube video carries formats, thumbnails,
+http_headers and subtitle/caption URLs for 100+ languages - easily several MB.
+The app only ever reads a dozen fields, so the fetcher cache, the "Check"
+result and playlist entries keep a MediaInfo instead:
+
+- __slots__ record with the fields the app uses
+- subtitles/captions reduced to (lang, name) pairs
+- playlist entries compacted recursively
+- dict-style read access (get, [], in) so callers written for info dicts work
+- full(): the complete info dict on demand, re-extracted through a loader
+"""
+
+# Fields copied verbatim from the info dict
+FIELDS = ("id", "title", "uploader", "uploader_url", "duration", "duration_string", "thumbnail",
+          "webpage_url", "url", "extractor_key", "page_count", "playlist_count", "_fetcher_tier")
+
+
+def _attr(key):
+    return key.lstrip("_")
+
+
+def _compact_subs(subs):
+    """{lang: [{'ext', 'url', 'name'}, ...]} -> ((lang, name), ...)"""
+    if not subs:
+        return ()
+    pairs = []
+    for lang, tracks in subs.items():
+        name = None
+        for track in tracks or ():
+            if isinstance(track, dict) and track.get("name"):
+                name = track["name"]
+                break
+        pairs.append((lang, name))
+    return tuple(pairs)
+
+
+def _expand_subs(pairs):
+    """Shape expected by the subtitle selector: {lang: [{'name': ...}]}."""
+    return {lang: [{"name": name}] if name else [] for lang, name in pairs}
+
+
+class MediaInfo:
+    __slots__ = tuple(_attr(k) for k in FIELDS) + ("subtitles", "automatic_captions", "entries", "_loader")
+
+    def __init__(self, **fields):
+        for slot in self.__slots__:
+            setattr(self, slot, None)
+        self.subtitles = ()
+        self.automatic_captions = ()
+        for key, value in fields.items():
+            setattr(self, _attr(key), value)
+
+    @classmethod
+    def from_info(cls, info, loader=None):
+        """Compact record for a yt-dlp style info dict (a MediaInfo is returned as is)."""
+        if info is None or isinstance(info, cls):
+            return info
+        rec = cls(**{k: info.get(k) for k in FIELDS})
+        rec.subtitles = _compact_subs(info.get("subtitles"))
+        rec.automatic_captions = _compact_subs(info.get("automatic_captions"))
+        entries = info.get("entries")
+        if entries is not None:
+            rec.entries = tuple(cls.from_info(e) for e in entries if e)
+        rec._loader = loader
+        return rec
+
+    # ------------------------------------------------------------------
+    # dict-style access
+    # ------------------------------------------------------------------
+    def get(self, key, default=None):
+        if key in ("subtitles", "automatic_captions"):
+            pairs = getattr(self, key)
+            return _expand_subs(pairs) if pairs else default
+        if key == "entries":
+            return list(self.entries) if self.entries is not None else default
+        if key not in FIELDS:
+            return default
+        value = getattr(self, _attr(key))
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def to_dict(self):
+        """Plain dict of the populated fields (JSON-serializable)."""
+        data = {k: getattr(self, _attr(k)) for k in FIELDS if getattr(self, _attr(k)) is not None}
+        for key in ("subtitles", "automatic_captions"):
+            if getattr(self, key):
+                data[key] = _expand_subs(getattr(self, key))
+        if self.entries is not None:
+            data["entries"] = [e.to_dict() for e in self.entries]
+        return data
+
+    def __eq__(self, other):
+        if isinstance(other, MediaInfo):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"MediaInfo(id={self.id!r}, title={self.title!r})"
+
+    # ------------------------------------------------------------------
+    # Full info on demand
+    # ------------------------------------------------------------------
+    def full(self):
+        """Complete info dict (formats etc.), re-extracted on each call; None if unavailable."""
+        if self._loader is None:
+            return None
+        info, _ = self._loader(self.webpage_url or self.url)
+        return info
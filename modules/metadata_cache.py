@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Metadata Cache - Two-Level (Memory LRU + SQLite)
+================================================
+Caches video info keyed by a canonical (platform, video_id) tuple so that
+different URL spellings of the same video share one entry, and so that
+re-checking links after a restart is instant.
+
+- Level 1: in-process LRU (OrderedDict), bounded by item count
+- Level 2: on-disk SQLite store in the app data directory
+- Per-platform TTLs (resolved stream URLs expire quickly on some platforms)
+- Signed stream links ('url' on TikTok/Douyin/Dailymotion) stay in memory
+  only; the disk copy is re-resolved at download time
+- Single-flight: concurrent lookups of the same key share one loader call
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Seconds. Platforms whose info carries signed/expiring stream URLs get short TTLs.
+DEFAULT_TTLS = {
+    "YOUTUBE": 6 * 3600,
+    "YOUTUBE_PLAYLIST": 1800,
+    "BILIBILI": 24 * 3600,
+    "DAILYMOTION": 1800,
+    "TIKTOK": 1800,
+    "DOUYIN": 1800,
+}
+DEFAULT_TTL = 3600
+
+# Heavy yt-dlp fields not worth persisting (huge and/or quickly expiring)
+_DISK_SKIP_KEYS = ("formats", "requested_formats", "thumbnails", "http_headers", "heatmap", "_format_sort_fields")
+# Platforms whose top-level 'url' is a signed, expiring CDN link (handed to the downloader as resolved_url)
+SIGNED_URL_PLATFORMS = ("TIKTOK", "DOUYIN", "DAILYMOTION")
+
+
+def default_cache_path():
+    """metadata_cache.db inside the app data directory."""
+    try:
+        from . import platform_utils
+        base = platform_utils.get_app_data_dir("Tsufutube")
+    except ImportError:
+        base = os.path.join(os.path.expanduser("~"), ".config", "Tsufutube")
+    return os.path.join(base, "metadata_cache.db")
+
+
+class _Flight:
+    """One in-progress load shared by concurrent callers."""
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = (None, "Load aborted")
+
+
+class MetadataCache:
+    def __init__(self, max_items=50, db_path=None, persist=True, ttls=None, decode=None):
+        self.max_items = max_items
+        self.decode = decode        # dict read from disk -> stored value type (e.g. MediaInfo.from_info)
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+
+        self._mem = OrderedDict()   # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._inflight = {}         # key -> _Flight
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if persist:
+            self._open_db(db_path or default_cache_path())
+
+    # ------------------------------------------------------------------
+    # Disk store
+    # ------------------------------------------------------------------
+    def _open_db(self, path):
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, platform TEXT, stored REAL, data TEXT)")
+            # Drop anything older than the longest TTL
+            oldest = time.time() - max(list(self.ttls.values()) + [DEFAULT_TTL])
+            self._db.execute("DELETE FROM meta WHERE stored < ?", (oldest,))
+            self._db.commit()
+        except Exception as e:
+            print(f"[Cache] Disk cache disabled: {e}")
+            self._db = None
+
+    def _disk_get(self, key):
+        if self._db is None:
+            return None, 0
+        try:
+            with self._db_lock:
+                row = self._db.execute("SELECT stored, data FROM meta WHERE key = ?", (self._key_str(key),)).fetchone()
+            if row:
+                return json.loads(row[1]), row[0]
+        except Exception as e:
+            print(f"[Cache] Disk read failed: {e}")
+        return None, 0
+
+    def _disk_put(self, key, value, stored):
+        if self._db is None:
+            return
+        try:
+            if hasattr(value, "to_dict"):
+                value = value.to_dict()
+            skip = _DISK_SKIP_KEYS + (("url",) if key[0] in SIGNED_URL_PLATFORMS else ())
+            slim = {k: v for k, v in value.items() if k not in skip}
+            data = json.dumps(slim, ensure_ascii=False, default=str)
+            with self._db_lock:
+                self._db.execute("INSERT OR REPLACE INTO meta (key, platform, stored, data) VALUES (?, ?, ?, ?)",
+                                 (self._key_str(key), key[0], stored, data))
+                self._db.commit()
+        except Exception as e:
+            print(f"[Cache] Disk write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _key_str(key):
+        return f"{key[0]}:{key[1]}"
+
+    def ttl_for(self, key):
+        return self.ttls.get(key[0], DEFAULT_TTL)
+
+    def get(self, key):
+        """Return cached value or None. Memory first, then disk (promoted to memory)."""
+        now = time.time()
+        ttl = self.ttl_for(key)
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry:
+                if now - entry[0] < ttl:
+                    self._mem.move_to_end(key)
+                    return entry[1]
+                del self._mem[key]
+
+        value, stored = self._disk_get(key)
+        if value is not None and now - stored < ttl:
+            if self.decode:
+                value = self.decode(value)
+            self._mem_put(key, value, stored)
+            return value
+        return None
+
+    def put(self, key, value):
+        stored = time.time()
+        self._mem_put(key, value, stored)
+        self._disk_put(key, value, stored)
+
+    def _mem_put(self, key, value, stored):
+        with self._lock:
+            self._mem[key] = (stored, value)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                self._mem.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        """
+        Cached lookup with single-flight loading.
+        loader() must return (value, error); only non-None values are cached.
+        Returns (value, error, from_cache).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, None, True
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            flight.event.wait()
+            return flight.result[0], flight.result[1], False
+
+        try:
+            flight.result = loader()
+            if flight.result[0] is not None:
+                self.put(key, flight.result[0])
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+        return flight.result[0], flight.result[1], False
+
+    def clear(self, disk=True):
+        with self._lock:
+            self._mem.clear()
+        if disk and self._db is not None:
+            try:
+                with self._db_lock:
+                    self._db.execute("DELETE FROM meta")
+                    self._db.commit()
+            except Exception as e:
+                print(f"[Cache] Disk clear failed: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._mem)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
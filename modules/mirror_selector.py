@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+CDN Mirror Selector
+===================
+Bilibili (and other CDNs) list the same stream on several hosts (baseUrl +
+backupUrl). Throughput between them differs a lot by region, so instead of
+always taking the first one:
+
+- probe: a short ranged GET on each candidate, in parallel, pick the fastest
+- history: per-host EWMA throughput persisted in the app data dir, used to
+  rank hosts that could not be probed and as the "expected" speed later
+- switch: if throughput collapses mid-transfer, resume (Range) on the next
+  mirror instead of crawling to the end
+"""
+
+import os
+import json
+import time
+import threading
+from urllib.parse import urlparse
+
+from . import http_client
+
+PROBE_BYTES = 256 * 1024
+PROBE_TIMEOUT = (3, 4)
+MAX_PROBES = 4
+EWMA_ALPHA = 0.3
+
+# Mid-transfer switching
+SPEED_WINDOW = 3.0      # seconds per throughput sample
+WARMUP = 5.0            # don't judge a mirror before this
+COLLAPSE_RATIO = 0.25   # switch if window speed < ratio * reference speed
+
+
+def _stats_path():
+    """cdn_hosts.json inside the app data directory."""
+    try:
+        from . import platform_utils
+        base = platform_utils.get_app_data_dir("Tsufutube")
+    except ImportError:
+        base = os.path.join(os.path.expanduser("~"), ".config", "Tsufutube")
+    return os.path.join(base, "cdn_hosts.json")
+
+
+def host_of(url):
+    try:
+        return urlparse(url).hostname or ""
+    except ValueError:
+        return ""
+
+
+class _SlowMirror(Exception):
+    """Raised inside a transfer to move on to the next mirror."""
+
+
+class MirrorSelector:
+    def __init__(self, stats_path=None, persist=True):
+        self.stats_path = stats_path or _stats_path()
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer at a time for the JSON file
+        self._hosts = {}  # host -> {"speed": bytes/s EWMA, "fails": int, "updated": ts}
+        if persist:
+            self._load()
+
+    # ------------------------------------------------------------------
+    # Host history
+    # ------------------------------------------------------------------
+    def _load(self):
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                self._hosts = json.load(f)
+        except: self._hosts = {}
+
+    def save(self):
+        if not self.persist:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.stats_path), exist_ok=True)
+            with self._lock:
+                data = json.dumps(self._hosts)
+            # Write a temp file and swap it in: readers never see a half-written file
+            with self._save_lock:
+                tmp = self.stats_path + ".tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp, self.stats_path)
+        except Exception as e:
+            print(f"[Mirror] Could not save host stats: {e}")
+
+    def record(self, host, nbytes, seconds):
+        """Fold one throughput sample into the host's EWMA."""
+        if not host or seconds <= 0 or nbytes <= 0:
+            return
+        speed = nbytes / seconds
+        with self._lock:
+            h = self._hosts.setdefault(host, {"speed": speed, "fails": 0})
+            h["speed"] = EWMA_ALPHA * speed + (1 - EWMA_ALPHA) * h["speed"]
+            h["fails"] = 0
+            h["updated"] = time.time()
+
+    def record_failure(self, host):
+        if not host:
+            return
+        with self._lock:
+            h = self._hosts.setdefault(host, {"speed": 0, "fails": 0})
+            h["fails"] += 1
+            h["speed"] *= 0.5
+            h["updated"] = time.time()
+
+    def expected_speed(self, host):
+        with self._lock:
+            h = self._hosts.get(host)
+            return h["speed"] if h else 0
+
+    def _score(self, url):
+        with self._lock:
+            h = self._hosts.get(host_of(url))
+            if not h:
+                return (0, 0)  # unknown hosts rank between good and failing ones
+            return (-h["fails"], h["speed"])
+
+    # ------------------------------------------------------------------
+    # Probing
+    # ------------------------------------------------------------------
+    def _probe(self, url, headers):
+        """Ranged GET of PROBE_BYTES. Returns bytes/s or 0 on failure."""
+        h = dict(headers or {})
+        h["Range"] = f"bytes=0-{PROBE_BYTES - 1}"
+        start = time.time()
+        got = 0
+        try:
+            with http_client.get(url, headers=h, stream=True, timeout=PROBE_TIMEOUT, probe=True) as r:
+                if r.status_code not in (200, 206):
+                    raise Exception(f"HTTP {r.status_code}")
+                for chunk in r.iter_content(chunk_size=32768):
+                    got += len(chunk)
+                    if got >= PROBE_BYTES or time.time() - start > PROBE_TIMEOUT[1]:
+                        break
+            elapsed = time.time() - start
+            self.record(host_of(url), got, elapsed)
+            return got / elapsed if elapsed > 0 else 0
+        except Exception as e:
+            print(f"[Mirror] Probe failed for {host_of(url)}: {e}")
+            self.record_failure(host_of(url))
+            return 0
+
+    def rank(self, urls, headers=None, probe=True):
+        """
+        Order candidate URLs fastest first. Probes up to MAX_PROBES hosts in
+        parallel (history decides which); the rest are ordered by history.
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if len(urls) <= 1:
+            return urls
+
+        by_history = sorted(urls, key=self._score, reverse=True)
+        if not probe:
+            return by_history
+
+        probed = by_history[:MAX_PROBES]
+        results = {}
+        threads = []
+        for u in probed:
+            t = threading.Thread(target=lambda u=u: results.__setitem__(u, self._probe(u, headers)), daemon=True)
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join(PROBE_TIMEOUT[0] + PROBE_TIMEOUT[1] + 1)
+        self.save()
+
+        ranked = sorted(probed, key=lambda u: results.get(u, 0), reverse=True)
+        print("[Mirror] Ranked: " + ", ".join(f"{host_of(u)}={results.get(u, 0) / 1024:.0f}KB/s" for u in ranked))
+        return ranked + by_history[MAX_PROBES:]
+
+    # ------------------------------------------------------------------
+    # Transfer with mid-stream switching
+    # ------------------------------------------------------------------
+    def download(self, urls, dest_path, headers=None, progress_callback=None, cancel_check=None, probe=True,
+                 throttle=None, hasher=None):
+        """
+        Download one resource available at several mirror URLs.
+        Resumes with a Range request when moving to another mirror.
+        throttle: bandwidth limiter called per chunk; while it is limiting, speeds
+        say nothing about the mirror, so no slow-switching and no stats.
+        hasher: hashing.StreamHasher fed every written chunk (kept consistent
+        across mirror switches).
+        Returns True on success.
+        """
+        mirrors = self.rank(urls, headers, probe=probe)
+        if not mirrors:
+            return False
+
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        state = {"done": 0, "total": 0, "hasher": hasher}
+        if hasher:
+            hasher.reset()
+
+        for i, url in enumerate(mirrors):
+            host = host_of(url)
+            # The last mirror is never abandoned for being slow
+            can_switch = i < len(mirrors) - 1 and not (throttle and throttle.active)
+            try:
+                self._transfer(url, host, dest_path, headers, state, progress_callback, cancel_check, can_switch,
+                               throttle)
+                self.save()
+                return True
+            except _SlowMirror:
+                print(f"[Mirror] {host} too slow, switching mirror at {state['done']} bytes")
+            except Exception as e:
+                if cancel_check and cancel_check():
+                    break
+                print(f"[Mirror] {host} failed: {e}")
+                self.record_failure(host)
+            state["done"] = os.path.getsize(dest_path) if os.path.exists(dest_path) else 0
+            if hasher:
+                hasher.resync(dest_path)
+
+        self.save()
+        return False
+
+    def _transfer(self, url, host, dest_path, headers, state, progress_callback, cancel_check, can_switch,
+                  throttle=None):
+        """Stream url into dest_path from state['done'] on. Updates state in place."""
+        measure = not (throttle and throttle.active)
+        hasher = state.get("hasher")
+        h = dict(headers or {})
+        if state["done"]:
+            h["Range"] = f"bytes={state['done']}-"
+
+        with http_client.get(url, headers=h, stream=True, timeout=(10, 30)) as r:
+            r.raise_for_status()
+            if state["done"] and r.status_code != 206:
+                state["done"] = 0  # Mirror ignored Range: start over
+                if state.get("hasher"):
+                    state["hasher"].reset()
+            if r.status_code == 206 and "Content-Range" in r.headers:
+                state["total"] = int(r.headers["Content-Range"].rsplit("/", 1)[-1] or 0) or state["total"]
+            elif not state["done"]:
+                state["total"] = int(r.headers.get("Content-Length", 0) or 0)
+            total = state["total"]
+
+            reference = self.expected_speed(host)
+            start = win_start = time.time()
+            win_bytes = 0
+            with open(dest_path, 'ab' if state["done"] else 'wb') as f:
+                for chunk in r.iter_content(chunk_size=65536):
+                    if cancel_check and cancel_check():
+                        raise Exception("Cancelled")
+                    if not chunk:
+                        continue
+                    f.write(chunk)
+                    if hasher:
+                        hasher.update(chunk)
+                    state["done"] += len(chunk)
+                    win_bytes += len(chunk)
+                    if throttle:
+                        throttle(len(chunk))
+                    if progress_callback and total:
+                        progress_callback(state["done"], total)
+
+                    now = time.time()
+                    if now - win_start >= SPEED_WINDOW:
+                        speed = win_bytes / (now - win_start)
+                        if measure:
+                            self.record(host, win_bytes, now - win_start)
+                        reference = max(reference, speed)
+                        if can_switch and now - start >= WARMUP and speed < COLLAPSE_RATIO * reference:
+                            raise _SlowMirror()
+                        win_start, win_bytes = now, 0
+
+            if win_bytes and measure:
+                self.record(host, win_bytes, max(time.time() - win_start, 0.001))
+        if total and state["done"] < total:
+            raise Exception(f"Incomplete transfer ({state['done']}/{total})")
+
+
+_selector = None
+_selector_lock = threading.Lock()
+
+
+def get_selector():
+    """Process-wide selector so host history is shared between downloads."""
+    global _selector
+    with _selector_lock:
+        if _selector is None:
+            _selector = MirrorSelector()
+    return _selector
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+Process Worker Pool
+===================
+Optional backend that runs DownloaderEngine.download_single in long-lived
+worker processes instead of GUI threads:
+
+- yt-dlp extraction (signature JS, JSON parsing, format sorting) is CPU-bound
+  Python; in a worker it neither stalls the Tk main loop nor serializes
+  parallel downloads on the GIL
+- workers are spawned once and reused, so yt-dlp stays imported and warm
+- a crashing worker (segfault in a native lib, OOM kill) fails only its task;
+  the next task gets a fresh process
+
+IPC (two simplex pipes per worker, small tuples):
+    parent -> worker   ("run", tid, task, settings) | ("cancel", tid) | None (stop)
+    worker -> parent   ("p", tid, per, msg) | ("s", tid, msg) | ("done", tid, success, msg, hist)
+
+Progress is coalesced in the worker (at most one event per PROGRESS_INTERVAL,
+the latest value always delivered). Per-process state (bandwidth caps, host
+limiter, learned routes) is not shared between workers.
+
+Enabled with settings["process_workers"] = N (0 = run in-process, the default).
+"""
+
+import time
+import queue
+import atexit
+import importlib
+import threading
+import multiprocessing
+
+DEFAULT_ENGINE = "modules.core:DownloaderEngine"
+PROGRESS_INTERVAL = 0.1   # seconds between progress events sent to the GUI
+POLL_INTERVAL = 0.2       # parent: how often cancel/liveness are checked
+CANCEL_GRACE = 10.0       # seconds a cancelled worker gets before it is killed
+MAX_WORKERS = 8
+
+
+def _load_engine(spec):
+    module, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module), name)
+
+
+class _Emitter:
+    """Worker side: turns engine callbacks into coalesced IPC events."""
+
+    def __init__(self, conn, tid, on_event=None):
+        self.conn = conn
+        self.tid = tid
+        self.on_event = on_event
+        self.last_sent = 0.0
+        self.pending = None
+
+    def progress(self, per, msg):
+        if self.on_event: self.on_event()
+        now = time.monotonic()
+        if now - self.last_sent >= PROGRESS_INTERVAL or per >= 100 or per <= 0:
+            self.pending = None
+            self.last_sent = now
+            self.conn.send(("p", self.tid, per, msg))
+        else:
+            self.pending = (per, msg)
+
+    def status(self, msg):
+        if self.on_event: self.on_event()
+        self.flush()
+        self.conn.send(("s", self.tid, msg))
+
+    def flush(self):
+        if self.pending:
+            per, msg = self.pending
+            self.pending = None
+            self.conn.send(("p", self.tid, per, msg))
+
+    def callbacks(self):
+        return {"on_progress": self.progress, "on_status": self.status}
+
+
+def _worker_main(tasks, events, ffmpeg_path, engine_spec):
+    """Entry point of a worker process: one engine, tasks run one at a time."""
+    # Warm up once per worker: the yt-dlp import (extractor registry) is the slow part
+    try:
+        import yt_dlp  # noqa: F401
+    except ImportError:
+        pass
+    engine = _load_engine(engine_spec)(ffmpeg_path)
+    inbox = queue.Queue()
+    state = {"tid": None, "cancelled": False}
+
+    def reader():
+        while True:
+            try: msg = tasks.recv()
+            except (EOFError, OSError): msg = None
+            if msg is None:
+                inbox.put(None)
+                return
+            if msg[0] == "cancel":
+                if msg[1] == state["tid"]:
+                    state["cancelled"] = True
+                    engine.cancel()
+            else:
+                inbox.put(msg)
+
+    def keep_cancelled():
+        # A cancel that lands before download_single resets is_cancelled must not be lost
+        if state["cancelled"]: engine.is_cancelled = True
+
+    threading.Thread(target=reader, daemon=True).start()
+    while True:
+        msg = inbox.get()
+        if msg is None:
+            break
+        _, tid, task, settings = msg
+        state.update(tid=tid, cancelled=False)
+        emitter = _Emitter(events, tid, keep_cancelled)
+        try:
+            success, text, hist = engine.download_single(task, settings, emitter.callbacks())
+        except Exception as e:
+            success, text, hist = False, str(e), None
+        state["tid"] = None
+        try:
+            emitter.flush()
+            events.send(("done", tid, success, text, hist))
+        except (OSError, ValueError):
+            break
+
+
+class Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, ffmpeg_path, engine_spec=DEFAULT_ENGINE):
+        ctx = multiprocessing.get_context("spawn")
+        task_r, self.tasks = ctx.Pipe(duplex=False)
+        self.events, event_w = ctx.Pipe(duplex=False)
+        self.proc = ctx.Process(target=_worker_main, args=(task_r, event_w, ffmpeg_path, engine_spec), daemon=True)
+        self.proc.start()
+        # Drop our copies of the child's ends so a dead worker shows up as EOF
+        task_r.close()
+        event_w.close()
+        self.next_tid = 0
+        self.dead = False
+
+    def is_alive(self):
+        return not self.dead and self.proc.is_alive()
+
+    def run(self, task, settings, callbacks, cancel_check=None):
+        """Run one task in the worker, relaying events to callbacks. Returns (success, msg, history_item)."""
+        self.next_tid += 1
+        tid = self.next_tid
+        on_progress = callbacks.get("on_progress") or (lambda per, msg: None)
+        on_status = callbacks.get("on_status") or (lambda msg: None)
+        try:
+            self.tasks.send(("run", tid, task, settings))
+        except (OSError, ValueError) as e:
+            self.kill()
+            return False, f"Không gửi được tác vụ tới tiến trình tải: {e}", None
+
+        cancelled_at = None
+        while True:
+            if cancelled_at is None and cancel_check and cancel_check():
+                cancelled_at = time.monotonic()
+                try: self.tasks.send(("cancel", tid))
+                except (OSError, ValueError): pass
+            if cancelled_at is not None and time.monotonic() - cancelled_at > CANCEL_GRACE:
+                print(f"[Worker] pid {self.proc.pid} ignored cancel, killing it")
+                self.kill()
+                return False, "Đã hủy", None
+            try:
+                if not self.events.poll(POLL_INTERVAL):
+                    if not self.proc.is_alive():
+                        break
+                    continue
+                event = self.events.recv()
+            except (EOFError, OSError):
+                break
+            if event[1] != tid:
+                continue
+            kind = event[0]
+            if kind == "p":
+                on_progress(event[2], event[3])
+            elif kind == "s":
+                on_status(event[2])
+            elif kind == "done":
+                return event[2], event[3], event[4]
+
+        # Worker died mid-task: only this task fails
+        self.proc.join(1)
+        code = self.proc.exitcode
+        self.dead = True
+        print(f"[Worker] pid {self.proc.pid} died (exit code {code})")
+        if cancelled_at is not None:
+            return False, "Đã hủy", None
+        return False, f"Tiến trình tải bị dừng bất ngờ (exit code {code})", None
+
+    def stop(self):
+        try: self.tasks.send(None)
+        except (OSError, ValueError): pass
+        self.proc.join(2)
+        if self.proc.is_alive(): self.kill()
+
+    def kill(self):
+        self.dead = True
+        try:
+            self.proc.kill()
+            self.proc.join(2)
+        except Exception: pass
+
+
+class WorkerPool:
+    """Up to `size` workers, spawned on demand and reused; callers block while all are busy."""
+
+    def __init__(self, size=2, ffmpeg_path=None, engine_spec=DEFAULT_ENGINE):
+        self.size = max(1, min(MAX_WORKERS, int(size)))
+        self.ffmpeg_path = ffmpeg_path
+        self.engine_spec = engine_spec
+        self._idle = []
+        self._count = 0
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    self._count -= 1
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                self._cond.wait()
+        try:
+            return Worker(self.ffmpeg_path, self.engine_spec)
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker):
+        with self._cond:
+            if worker.is_alive() and self._count <= self.size:
+                self._idle.append(worker)
+                worker = None
+            else:
+                self._count -= 1
+            self._cond.notify()
+        if worker is not None:
+            worker.stop()
+
+    def run(self, task, settings, callbacks, cancel_check=None):
+        try:
+            worker = self._acquire()
+        except Exception as e:
+            return False, f"Không khởi động được tiến trình tải: {e}", None
+        try:
+            return worker.run(task, settings, callbacks, cancel_check)
+        finally:
+            self._release(worker)
+
+    def resize(self, size):
+        with self._cond:
+            self.size = max(1, min(MAX_WORKERS, int(size)))
+            surplus = self._idle[self.size:]
+            del self._idle[self.size:]
+            self._count -= len(surplus)
+            self._cond.notify_all()
+        for worker in surplus:
+            worker.stop()
+
+    def shutdown(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+        for worker in idle:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(size, ffmpeg_path=None):
+    """Process-wide pool (created on first use, resized when the setting changes)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(size, ffmpeg_path)
+            atexit.register(_pool.shutdown)
+        elif _pool.size != size:
+            _pool.resize(size)
+    return _pool
+
+
+def in_worker():
+    """True inside a worker process (never nest pools)."""
+    return multiprocessing.parent_process() is not None
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Retry / Fallback Policy
+=======================
+Maps an error message to an error class, and each class to the recovery
+strategies worth trying. Expensive fallbacks (browser sniffing, UC, OAuth2)
+take tens of seconds each; they are pointless for 404s, geo-blocks, DRM or
+private videos, so those fail fast.
+
+Strategies, cheapest first:
+    RETRY       same request again after a backoff delay
+    NO_COOKIES  drop cookies (broken browser cookie DB, bad cookie file)
+    BROWSER     DrissionPage/Playwright sniffing
+    UC          undetected-chromedriver sniffing
+    OAUTH       yt-dlp OAuth2 device login
+"""
+
+import re
+import time
+from collections import namedtuple
+
+RETRY = "retry"
+NO_COOKIES = "no_cookies"
+BROWSER = "browser"
+UC = "uc"
+OAUTH = "oauth"
+EXPENSIVE = (BROWSER, UC, OAUTH)
+
+# Max seconds spent in expensive fallbacks per task
+FALLBACK_BUDGET = 90
+
+# Checked in order: first match wins
+_PATTERNS = [
+    # Only a missing binary or a full disk; other ffmpeg failures (merge, postprocessing) stay retryable
+    ("ERR_SYSTEM", r"\b(?:ffmpeg|ffprobe)\b (?:is )?not (?:found|installed)|no space left on device"),
+    ("ERR_WBI", r"\b412\b|precondition failed|-352\b"),
+    ("ERR_RATE_LIMIT", r"\b429\b|too many requests|rate.?limit"),
+    ("ERR_GEO", r"not available in your country|geo.?restrict|not available from your location|in your country|geo.?block"),
+    ("ERR_DRM", r"\bdrm\b"),
+    ("ERR_PRIVATE", r"private video|video is private"),
+    ("ERR_LIVE_PENDING", r"premieres in|live event will begin|is upcoming"),
+    ("ERR_BOT", r"not a bot|\bbot\b|captcha"),
+    ("ERR_COOKIE", r"sign in|log in|login required|confirm your age|age.?restricted|members?.only|cookie"),
+    ("ERR_NOT_FOUND", r"\b404\b|not found|video unavailable|does not exist|has been removed|no longer available|has been terminated|been deleted"),
+    ("ERR_UNSUPPORTED", r"unsupported url|no video formats found|no video could be found|unable to extract"),
+    ("ERR_FORBIDDEN", r"\b403\b|forbidden"),
+    ("ERR_NETWORK", r"timed out|timeout|connection (?:reset|refused|aborted)|name resolution|getaddrinfo|"
+                    r"network is unreachable|remote end closed|incompleteread|ssl"),
+]
+_COMPILED = [(cls, re.compile(p, re.IGNORECASE)) for cls, p in _PATTERNS]
+
+Policy = namedtuple("Policy", "strategies backoff")
+
+POLICIES = {
+    "ERR_SYSTEM": Policy((), ()),
+    "ERR_GEO": Policy((), ()),
+    "ERR_DRM": Policy((), ()),
+    "ERR_PRIVATE": Policy((), ()),
+    "ERR_LIVE_PENDING": Policy((), ()),
+    "ERR_NOT_FOUND": Policy((), ()),
+    "ERR_WBI": Policy((RETRY,), (2, 5)),
+    "ERR_RATE_LIMIT": Policy((RETRY,), (5, 15)),
+    "ERR_NETWORK": Policy((RETRY,), (2, 5, 10)),
+    "ERR_FORBIDDEN": Policy((RETRY, NO_COOKIES, BROWSER, UC), (2,)),
+    "ERR_COOKIE": Policy((NO_COOKIES, OAUTH), ()),
+    "ERR_BOT": Policy((NO_COOKIES, BROWSER, UC, OAUTH), ()),
+    "ERR_UNSUPPORTED": Policy((BROWSER, UC), ()),
+    "ERR_UNKNOWN": Policy((NO_COOKIES, BROWSER, UC, OAUTH), ()),
+}
+
+
+def classify(message):
+    """Error class ("ERR_...") for an exception or message."""
+    text = str(message)
+    for cls, pattern in _COMPILED:
+        if pattern.search(text):
+            return cls
+    return "ERR_UNKNOWN"
+
+
+def is_hopeless(err_class):
+    """Nothing can recover this class: fail the task immediately."""
+    return not POLICIES.get(err_class, POLICIES["ERR_UNKNOWN"]).strategies
+
+
+class RetryPlan:
+    """Per-task bookkeeping: retry counts per class and the fallback time budget."""
+
+    def __init__(self, budget=FALLBACK_BUDGET):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.retries = {}
+
+    def allows(self, err_class, strategy):
+        policy = POLICIES.get(err_class, POLICIES["ERR_UNKNOWN"])
+        if strategy not in policy.strategies:
+            return False
+        if strategy in EXPENSIVE and time.monotonic() - self.started > self.budget:
+            print(f"[Retry] Fallback budget ({self.budget}s) used up, skipping {strategy}")
+            return False
+        return True
+
+    def retry_delay(self, err_class):
+        """Seconds to wait before the next plain retry, or None when not allowed/exhausted."""
+        if not self.allows(err_class, RETRY):
+            return None
+        backoff = POLICIES[err_class].backoff
+        n = self.retries.get(err_class, 0)
+        if n >= len(backoff):
+            return None
+        self.retries[err_class] = n + 1
+        return backoff[n]
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Strategy Router
+===============
+Remembers which strategy works for which site, so repeat downloads go
+straight to the path that worked last time:
+
+- per (domain, strategy): EWMA success rate, EWMA latency, sample count
+- order(): best known strategy first, unknown ones keep their default
+  position, known-dead ones are dropped
+- every REPROBE_EVERY-th routing of a domain uses the default order, and a
+  dead strategy is retried once REPROBE_AFTER has passed, so a site that
+  recovers is noticed
+- persisted in strategy_routes.json in the app data directory
+
+Strategy names used by the engine: "fetch:<tier label>" (FastFetcher tiers),
+"ytdlp" / "browser" / "uc" (general downloader), "tikwm" / "tikwm_post" /
+"tikwm_get" (TikTok).
+"""
+
+import os
+import json
+import time
+import threading
+
+from .utils import site_key as domain_of
+
+EWMA_ALPHA = 0.3
+PRIOR_RATE = 0.5        # score of a strategy we know nothing about
+MIN_SAMPLES = 3         # before a strategy can be declared dead
+DEAD_RATE = 0.15
+REPROBE_AFTER = 6 * 3600
+REPROBE_EVERY = 20
+SAVE_INTERVAL = 5.0
+
+
+def _routes_path():
+    """strategy_routes.json inside the app data directory."""
+    try:
+        from . import platform_utils
+        base = platform_utils.get_app_data_dir("Tsufutube")
+    except ImportError:
+        base = os.path.join(os.path.expanduser("~"), ".config", "Tsufutube")
+    return os.path.join(base, "strategy_routes.json")
+
+
+class StrategyRouter:
+    def __init__(self, path=None, persist=True):
+        self.path = path or _routes_path()
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # one writer at a time for the JSON file
+        self._stats = {}    # "domain|strategy" -> {"rate", "latency", "n", "last"}
+        self._routed = {}   # domain -> number of order() calls (in memory only)
+        self._saved_at = 0.0
+        if persist:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._stats = json.load(f)
+        except: self._stats = {}
+
+    def save(self):
+        if not self.persist:
+            return
+        with self._lock:
+            data = dict(self._stats)
+            self._saved_at = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # Write a temp file and swap it in: readers never see a half-written file
+            with self._save_lock:
+                tmp = self.path + ".tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[Router] Could not save: {e}")
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+    def record(self, domain, strategy, ok, seconds=None):
+        with self._lock:
+            st = self._stats.setdefault(f"{domain}|{strategy}", {"rate": PRIOR_RATE, "latency": None, "n": 0, "last": 0})
+            st["rate"] = (1 - EWMA_ALPHA) * st["rate"] + EWMA_ALPHA * (1.0 if ok else 0.0)
+            if ok and seconds is not None:
+                st["latency"] = seconds if st["latency"] is None else (1 - EWMA_ALPHA) * st["latency"] + EWMA_ALPHA * seconds
+            st["n"] += 1
+            st["last"] = time.time()
+            due = time.monotonic() - self._saved_at >= SAVE_INTERVAL
+        if due:
+            self.save()
+
+    def stats(self, domain, strategy):
+        with self._lock:
+            st = self._stats.get(f"{domain}|{strategy}")
+            return dict(st) if st else None
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+    def _is_dead(self, st):
+        return st["n"] >= MIN_SAMPLES and st["rate"] < DEAD_RATE
+
+    def should_try(self, domain, strategy):
+        """False while a strategy is known dead for this domain (until its re-probe is due)."""
+        st = self.stats(domain, strategy)
+        if not st or not self._is_dead(st):
+            return True
+        return time.time() - st["last"] >= REPROBE_AFTER
+
+    def _score(self, domain, strategy):
+        st = self.stats(domain, strategy)
+        if not st:
+            return PRIOR_RATE
+        latency = st["latency"] if st["latency"] is not None else 0.0
+        return st["rate"] / (1.0 + latency / 10.0)  # success first, speed second
+
+    def order(self, domain, items, key=lambda item: item):
+        """
+        items (in default priority order) reordered for domain: best first,
+        known-dead dropped. Never returns an empty list.
+        """
+        items = list(items)
+        with self._lock:
+            count = self._routed[domain] = self._routed.get(domain, 0) + 1
+        alive = [it for it in items if self.should_try(domain, key(it))]
+        if not alive:
+            return items
+        if count % REPROBE_EVERY == 0:
+            return alive  # periodic re-probe: default order re-measures the usual first choice
+        return sorted(alive, key=lambda it: -self._score(domain, key(it)))  # stable: ties keep default order
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """Process-wide router."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = StrategyRouter()
+    return _router
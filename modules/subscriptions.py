@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Subscriptions - Incremental Channel/Playlist Sync
+=================================================
+Remembers the video ids already seen per channel/playlist so a daily sync
+only enqueues what is new:
+
+- YouTube channels: the public Atom feed (15 newest videos, a few KB)
+  fetched with If-None-Match / If-Modified-Since; an unchanged channel
+  costs one 304
+- everything else (and YouTube when all 15 feed items are new): yt-dlp flat
+  extraction, iterated lazily and stopped at the first already-seen id;
+  playlists grow at the end, so they are walked fully and filtered
+- first sync of a new subscription only records a baseline (nothing is
+  enqueued unless backfill is requested)
+- channels are synced in parallel by a bounded pool; state lives in
+  subscriptions.json in the app data directory
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+
+from . import url_router
+
+MAX_SEEN = 500            # ids remembered per channel (newest first)
+FLAT_LIMIT = 200          # never walk further back than this in one channel sync
+PLAYLIST_LIMIT = 2000     # playlists grow at the end: no early stop, every id is kept
+FEED_SIZE = 15            # items in a YouTube feed; all new -> catch up with flat extraction
+SYNC_WORKERS = 8
+
+YT_FEED = "https://www.youtube.com/feeds/videos.xml"
+_ATOM = {"atom": "http://www.w3.org/2005/Atom", "yt": "http://www.youtube.com/xml/schemas/2015"}
+_PAGE_CHANNEL_RE = re.compile(r'<link rel="canonical" href="https://www\.youtube\.com/channel/(UC[\w-]{22})"|"channelId":"(UC[\w-]{22})"')
+
+
+def _state_path():
+    """subscriptions.json inside the app data directory."""
+    try:
+        from . import platform_utils
+        base = platform_utils.get_app_data_dir("Tsufutube")
+    except ImportError:
+        base = os.path.join(os.path.expanduser("~"), ".config", "Tsufutube")
+    return os.path.join(base, "subscriptions.json")
+
+
+# ---------------------------------------------------------------------------
+# YouTube feeds
+# ---------------------------------------------------------------------------
+def youtube_feed_url(url, page_fetcher=None):
+    """Atom feed URL for a YouTube channel URL, or None (not YouTube / unknown id)."""
+    if url_router.identify(url) != "YOUTUBE":
+        return None
+    parsed = urlparse(url)
+    m = re.match(r'/channel/(UC[\w-]{22})', parsed.path)
+    if m:
+        return f"{YT_FEED}?channel_id={m.group(1)}"
+    if re.match(r'/(@[^/]+|c/[^/]+|user/[^/]+)', parsed.path) and page_fetcher:
+        # Handle/custom URL: the channel id is only in the page (looked up once, then stored)
+        try:
+            m = _PAGE_CHANNEL_RE.search(page_fetcher(url) or "")
+        except Exception as e:
+            print(f"[Subs] Channel page lookup failed for {url}: {e}")
+            return None
+        if m:
+            return f"{YT_FEED}?channel_id={m.group(1) or m.group(2)}"
+    return None
+
+
+def parse_feed(xml_text):
+    """[{'id', 'url', 'title'}] newest first, from a YouTube Atom feed."""
+    root = ElementTree.fromstring(xml_text)
+    items = []
+    for entry in root.findall("atom:entry", _ATOM):
+        vid = entry.findtext("yt:videoId", namespaces=_ATOM)
+        if not vid:
+            continue
+        link = entry.find("atom:link", _ATOM)
+        items.append({
+            "id": vid,
+            "url": link.get("href") if link is not None else f"https://www.youtube.com/watch?v={vid}",
+            "title": entry.findtext("atom:title", default="", namespaces=_ATOM),
+        })
+    return items
+
+
+def _http_page(url):
+    from . import http_client
+    return http_client.get(url, timeout=15).text
+
+
+def _http_feed(feed_url, etag=None, last_modified=None):
+    """(status, items, etag, last_modified) with a conditional GET."""
+    from . import http_client
+    headers = {}
+    if etag: headers["If-None-Match"] = etag
+    if last_modified: headers["If-Modified-Since"] = last_modified
+    resp = http_client.get(feed_url, headers=headers, timeout=15)
+    if resp.status_code == 304:
+        return 304, [], etag, last_modified
+    if resp.status_code >= 400:
+        raise Exception(f"HTTP {resp.status_code}")
+    return resp.status_code, parse_feed(resp.content), resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+
+# ---------------------------------------------------------------------------
+# Flat extraction with early stop
+# ---------------------------------------------------------------------------
+def _videos_tab(url):
+    """YouTube channel root -> its /videos tab (the root lists tabs, not videos)."""
+    if url_router.identify(url) != "YOUTUBE":
+        return url
+    parsed = urlparse(url)
+    path = parsed.path.rstrip("/")
+    if re.fullmatch(r'/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)', path):
+        return f"{parsed.scheme}://{parsed.netloc}{path}/videos"
+    return url
+
+
+def _ytdlp_entries(url, limit=FLAT_LIMIT):
+    """Lazily yield flat entries (newest first for channels) of a playlist/channel URL."""
+    import yt_dlp
+    opts = {
+        'extract_flat': 'in_playlist',
+        'lazy_playlist': True,
+        'playlistend': limit,
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'ignoreerrors': True,
+    }
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(_videos_tab(url), download=False, process=False)
+        if info and info.get("_type") == "url":
+            info = ydl.extract_info(info["url"], download=False, process=False)
+        for n, entry in enumerate((info or {}).get("entries") or ()):
+            if n >= limit:
+                break
+            if entry:
+                yield entry
+
+
+def is_playlist(url):
+    """Playlists append new items at the end, channels list newest first."""
+    if url_router.identify(url) == "YOUTUBE":
+        return "list=" in url and not url_router.parse(url).id
+    return "/playlist" in url or "list=" in url
+
+
+def _collect(items, seen, newest_first):
+    """Items not seen yet; for newest-first sources stop at the first seen one."""
+    fresh = []
+    for item in items:
+        if item["id"] in seen:
+            if newest_first: break
+            continue
+        fresh.append(item)
+    return fresh
+
+
+def _entry_record(entry):
+    vid = entry.get("id")
+    url = entry.get("url") or entry.get("webpage_url")
+    if url and "://" not in url and vid:
+        url = f"https://www.youtube.com/watch?v={vid}"  # YouTube flat entries may carry a bare id
+    return {"id": vid, "url": url, "title": entry.get("title") or ""}
+
+
+# ---------------------------------------------------------------------------
+# Manager
+# ---------------------------------------------------------------------------
+class SubscriptionManager:
+    def __init__(self, path=None, persist=True, feed_fetcher=None, page_fetcher=None, flat_entries=None):
+        self.path = path or _state_path()
+        self.persist = persist
+        self._fetch_feed = feed_fetcher or _http_feed
+        self._fetch_page = page_fetcher or _http_page
+        self._flat_entries = flat_entries or _ytdlp_entries
+        self._lock = threading.Lock()
+        self._subs = {}
+        if persist:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._subs = json.load(f)
+            except: self._subs = {}
+
+    def save(self):
+        if not self.persist:
+            return
+        with self._lock:
+            data = json.dumps(self._subs, ensure_ascii=False, indent=1)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        except Exception as e:
+            print(f"[Subs] Could not save: {e}")
+
+    # ------------------------------------------------------------------
+    def add(self, url, title=None, backfill=0):
+        """Subscribe to a channel/playlist. backfill = newest items to enqueue on the first sync."""
+        url = url.strip()
+        with self._lock:
+            if url in self._subs:
+                return False
+            self._subs[url] = {"title": title or url, "feed": None, "etag": None, "last_modified": None,
+                               "seen": [], "backfill": int(backfill), "last_sync": 0}
+        self.save()
+        return True
+
+    def remove(self, url):
+        with self._lock:
+            removed = self._subs.pop(url, None) is not None
+        if removed:
+            self.save()
+        return removed
+
+    def list(self):
+        with self._lock:
+            return [dict(sub, url=url) for url, sub in self._subs.items()]
+
+    # ------------------------------------------------------------------
+    def sync_one(self, url):
+        """New items (oldest first) for one subscription; updates its state."""
+        with self._lock:
+            sub = self._subs.get(url)
+            if sub is None:
+                return []
+            sub = dict(sub)
+        seen = set(sub["seen"])
+        first_sync = not sub["last_sync"]
+        playlist = is_playlist(url)
+
+        if sub["feed"] is None:
+            # Playlist feeds list the first items, not the newest: playlists always go flat
+            sub["feed"] = "" if playlist else youtube_feed_url(url, self._fetch_page) or ""
+        fresh = None
+        if sub["feed"]:
+            try:
+                status, items, sub["etag"], sub["last_modified"] = self._fetch_feed(sub["feed"], sub["etag"], sub["last_modified"])
+                fresh = [] if status == 304 else _collect(items, seen, True)
+                if seen and len(fresh) >= FEED_SIZE:
+                    fresh = None  # the whole feed window is new: older new videos may be missing
+            except Exception as e:
+                print(f"[Subs] Feed failed for {url}: {e}")
+        if fresh is None:
+            # Generator: for channels iteration ends at the first seen id, so only new pages are fetched
+            limit = PLAYLIST_LIMIT if playlist else FLAT_LIMIT
+            entries = (_entry_record(e) for e in self._flat_entries(url, limit))
+            fresh = _collect(entries, seen, not playlist)
+
+        new_ids = [item["id"] for item in fresh if item["id"]]
+        sub["seen"] = (new_ids + sub["seen"])[:PLAYLIST_LIMIT if playlist else MAX_SEEN]
+        sub["last_sync"] = time.time()
+        if first_sync:
+            # Baseline: everything found now counts as seen, only `backfill` newest items are returned
+            keep = sub.get("backfill", 0)
+            fresh = (fresh[max(0, len(fresh) - keep):] if playlist else fresh[:keep]) if keep else []
+        with self._lock:
+            if url in self._subs:
+                self._subs[url] = sub
+        return fresh if playlist else list(reversed(fresh))
+
+    def sync_all(self, on_new=None, max_workers=SYNC_WORKERS):
+        """
+        Sync every subscription with a bounded pool. on_new(sub_url, items) is
+        called per subscription with new items. Returns {sub_url: items}.
+        """
+        urls = [s["url"] for s in self.list()]
+        results = {}
+
+        def run(url):
+            try:
+                items = self.sync_one(url)
+            except Exception as e:
+                print(f"[Subs] Sync failed for {url}: {e}")
+                items = []
+            results[url] = items
+            if items and on_new:
+                on_new(url, items)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls) or 1))) as pool:
+            list(pool.map(run, urls))
+        self.save()
+        total = sum(len(v) for v in results.values())
+        print(f"[Subs] Synced {len(urls)} subscriptions, {total} new items")
+        return results
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """Process-wide subscription manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SubscriptionManager()
+    return _manager
@@ -1,62 +1,317 @@
-import requests
-import json
+import re
 import time
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+
+from . import http_client
+from . import host_limiter
+from . import strategy_router
+from . import url_router
+
+TIKWM_DOMAIN = "tikwm.com"
+TIKWM_BASE = "https://www.tikwm.com"
+MIN_INTERVAL = 1.1        # free TikWM tier allows about 1 request/second per client
+RESULT_TTL = 30 * 60      # play links are signed: never reuse a resolved one longer than this
+EXPIRY_MARGIN = 120       # drop cached links this long before their signed expiry
+MAX_CACHED = 500
+RATE_RETRIES = 3
+PAGE_SIZE = 30            # user/posts page size (API maximum is 35)
+MAX_USER_ITEMS = 1000     # stop paginating huge profiles here
+REQUEST_TIMEOUT = (5, 15)
+
+_USER_RE = re.compile(r'tiktok\.com/@([\w.-]+)/?(?:[?#]|$)')
+
+
+def parse_user(url):
+    """unique_id of a TikTok profile URL (tiktok.com/@name), None for videos and other URLs."""
+    m = _USER_RE.search(url or "")
+    return m.group(1) if m else None
+
+
+def link_expiry(url):
+    """Unix time a signed CDN link stops working (x-expires / expire query), or None."""
+    try:
+        query = parse_qs(urlparse(url).query)
+    except ValueError:
+        return None
+    for key in ("x-expires", "expire", "Expires"):
+        if query.get(key):
+            try:
+                return int(query[key][0])
+            except ValueError:
+                pass
+    return None
+
+
+def _is_rate_limited(data):
+    # TikWM answers HTTP 200 with {"code": -1, "msg": "Free Api Limit: 1 request/second."}
+    return data.get("code") != 0 and "limit" in str(data.get("msg", "")).lower()
+
+
+class _Pacer:
+    """Spaces requests at least `interval` seconds apart across all threads."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def delay(self, seconds):
+        """Push the next request slot back (after a rate-limit answer)."""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
 
 class TikTokDownloader:
-    def __init__(self):
-        self.api_url = "https://www.tikwm.com/api/"
+    def __init__(self, router=None, interval=MIN_INTERVAL):
+        self.api_url = f"{TIKWM_BASE}/api/"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
             "Accept": "application/json",
         }
+        self.router = router or strategy_router.get_router()
+        self._pacer = _Pacer(interval)
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()   # video id -> (deadline, info)
+        self._inflight = {}
 
-    def get_video_info(self, url):
-        """
-        Fetch TikTok video info using public API (SnapTik-like approach).
-        Returns (info_dict, error_message).
-        """
-        try:
-            # Method 1: POST
-            params = {"url": url, "count": 12, "cursor": 0, "web": 1, "hd": 1}
-            try:
-                response = requests.post(self.api_url, data=params, headers=self.headers, timeout=15)
-                data = response.json()
-            except:
-                data = {"code": -1}
+    # ------------------------------------------------------------------
+    # Paced API access
+    # ------------------------------------------------------------------
+    def _api(self, method, url, params):
+        """JSON answer of one TikWM call, paced and retried on rate-limit answers."""
+        data = {"code": -1}
+        for attempt in range(RATE_RETRIES + 1):
+            self._pacer.wait()
+            if method == "POST":
+                response = http_client.api_request("POST", url, data=params, headers=self.headers, timeout=REQUEST_TIMEOUT)
+            else:
+                response = http_client.api_request("GET", url, params=params, headers=self.headers, timeout=REQUEST_TIMEOUT)
+            data = response.json()
+            if not _is_rate_limited(data) or attempt == RATE_RETRIES:
+                break
+            # Back off instead of burning the rest of a batch on "Free Api Limit" errors
+            wait = self._pacer.interval * 2 ** attempt
+            print(f"[TikTokAPI] Rate limited, retrying in {wait:.1f}s...")
+            host_limiter.report(url, 429, wait)
+            self._pacer.delay(wait)
+        return data
 
-            # Method 2: GET Fallback
-            if data.get("code") != 0:
-                print("[TikTokAPI] POST failed, trying GET...")
+    def _call(self, method, url):
+        if method == "tikwm_post":
+            return self._api("POST", self.api_url, {"url": url, "count": 12, "cursor": 0, "web": 1, "hd": 1})
+        return self._api("GET", self.api_url, {"url": url, "hd": 1})
+
+    # ------------------------------------------------------------------
+    # Result cache
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _key(url):
+        route = url_router.parse(url)
+        return route.id if route.platform == "TIKTOK" and route.id else url
+
+    def _cached(self, key):
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit and hit[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                return dict(hit[1])
+            self._cache.pop(key, None)
+        return None
+
+    def _store(self, key, info):
+        ttl = RESULT_TTL
+        expires = link_expiry(info.get("url", ""))
+        if expires:
+            ttl = min(ttl, expires - time.time() - EXPIRY_MARGIN)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, dict(info))
+            self._cache.move_to_end(key)
+            while len(self._cache) > MAX_CACHED:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, url):
+        """Forget the resolved link of url (e.g. after the CDN rejected it)."""
+        with self._lock:
+            self._cache.pop(self._key(url), None)
+
+    # ------------------------------------------------------------------
+    # Videos
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _video_info(video_data):
+        """Standard info dict from a TikWM video object."""
+        info = {
+            "id": video_data.get("id") or video_data.get("video_id", ""),
+            "title": video_data.get("title") or "TikTok Video",
+            "url": video_data.get("play", ""), # Watermark-free link
+            "thumbnail": video_data.get("cover", ""),
+            "duration": video_data.get("duration", 0),
+            "author": (video_data.get("author") or {}).get("nickname", ""),
+            "extractor_key": "TikTok",
+            "ext": "mp4"
+        }
+        # Prefer HD link if available
+        if video_data.get("hdplay"):
+            info["url"] = video_data.get("hdplay")
+        for key in ("url", "thumbnail"):
+            if info[key].startswith("/"):
+                info[key] = TIKWM_BASE + info[key]
+        return info
+
+    def _resolve(self, url):
+        try:
+            data = {"code": -1}
+            error = None
+            for method in self.router.order(TIKWM_DOMAIN, ["tikwm_post", "tikwm_get"]):
+                start = time.monotonic()
                 try:
-                    query = f"{self.api_url}?url={url}&hd=1"
-                    response = requests.get(query, headers=self.headers, timeout=15)
-                    data = response.json()
+                    data = self._call(method, url)
+                    error = None
                 except Exception as e:
-                    return None, f"API Request Failed: {e}"
-            
+                    data = {"code": -1}
+                    error = e
+                ok = data.get("code") == 0
+                self.router.record(TIKWM_DOMAIN, method, ok, time.monotonic() - start)
+                if ok:
+                    break
+                print(f"[TikTokAPI] {method} failed, trying next method...")
+
+            if error is not None:
+                return None, f"API Request Failed: {error}"
+
             if data.get("code") != 0:
                 msg = data.get("msg", "Unknown error")
                 return None, f"API Error: {msg}"
-            
-            video_data = data.get("data", {})
-            
-            # Construct standard info dict
-            info = {
-                "id": video_data.get("id", ""),
-                "title": video_data.get("title", "TikTok Video"),
-                "url": video_data.get("play", ""), # Watermark-free link
-                "thumbnail": video_data.get("cover", ""),
-                "duration": video_data.get("duration", 0),
-                "author": video_data.get("author", {}).get("nickname", ""),
-                "extractor_key": "TikTok",
-                "ext": "mp4"
-            }
-            
-            # Prefer HD link if available
-            if video_data.get("hdplay"):
-                info["url"] = video_data.get("hdplay")
-                
-            return info, None
+
+            return self._video_info(data.get("data") or {}), None
 
         except Exception as e:
             return None, str(e)
+
+    def get_video_info(self, url):
+        """
+        Fetch TikTok video info using public API (SnapTik-like approach).
+        Results are cached per video id until shortly before the play link
+        expires, so a check followed by a download resolves once. Concurrent
+        callers for the same video share one request.
+        Returns (info_dict, error_message).
+        """
+        key = self._key(url)
+        info = self._cached(key)
+        if info:
+            return info, None
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+        if not owner:
+            event.wait(60)
+            info = self._cached(key)
+            if info:
+                return info, None
+        try:
+            info, error = self._resolve(url)
+            if info:
+                self._store(key, info)
+            return info, error
+        finally:
+            if owner:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                event.set()
+
+    # ------------------------------------------------------------------
+    # User profiles
+    # ------------------------------------------------------------------
+    def get_user_posts(self, unique_id, cursor=0, count=PAGE_SIZE):
+        """
+        One page of a profile's videos: (infos, next_cursor, has_more).
+        Every video is put in the result cache, so downloading it later costs
+        no further API call. Raises on API errors.
+        """
+        data = self._api("POST", f"{self.api_url}user/posts", {"unique_id": unique_id, "count": count, "cursor": cursor})
+        if data.get("code") != 0:
+            raise Exception(f"API Error: {data.get('msg', 'Unknown error')}")
+        page = data.get("data") or {}
+        infos = []
+        for video in page.get("videos") or []:
+            info = self._video_info(video)
+            info["webpage_url"] = f"https://www.tiktok.com/@{unique_id}/video/{info['id']}"
+            self._store(info["id"], info)
+            infos.append(info)
+        return infos, page.get("cursor", 0), bool(page.get("hasMore"))
+
+    def list_user_videos(self, url, max_items=MAX_USER_ITEMS, cancel_check=None):
+        """
+        Playlist-style info for a profile URL, paginated by cursor.
+        Entry "url" is the video page (what the queue downloads).
+        cancel_check() is polled before each page.
+        Returns (info_dict, error_message).
+        """
+        unique_id = parse_user(url)
+        if not unique_id:
+            return None, "Not a TikTok profile URL"
+        entries, cursor = [], 0
+        try:
+            while len(entries) < max_items:
+                if cancel_check and cancel_check():
+                    return None, "Cancelled"
+                infos, cursor, has_more = self.get_user_posts(unique_id, cursor)
+                for info in infos:
+                    d = info.get("duration", 0)
+                    entries.append({
+                        "id": info["id"],
+                        "title": info["title"],
+                        "url": info["webpage_url"],
+                        "webpage_url": info["webpage_url"],
+                        "thumbnail": info["thumbnail"],
+                        "duration": d,
+                        "duration_string": f"{int(d) // 60}:{int(d) % 60:02d}" if d else "??:??",
+                        "uploader": info["author"],
+                        "extractor_key": "TikTok",
+                        "_fetcher_tier": 1,
+                    })
+                if not has_more or not infos:
+                    break
+        except Exception as e:
+            if not entries:
+                return None, str(e)
+            print(f"[TikTokAPI] Profile listing stopped after {len(entries)} videos: {e}")
+        entries = entries[:max_items]
+        return {
+            "_type": "playlist",
+            "id": unique_id,
+            "title": f"@{unique_id}",
+            "uploader": entries[0]["uploader"] if entries else unique_id,
+            "webpage_url": url,
+            "playlist_count": len(entries),
+            "entries": entries,
+            "extractor_key": "TikTok",
+            "_fetcher_tier": 1,
+        }, None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide client: one pacer and one result cache for fetcher and downloads."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TikTokDownloader()
+    return _client
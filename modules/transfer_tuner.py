@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive Transfer Tuner
+=======================
+Picks yt-dlp's `concurrent_fragment_downloads` per site and learns it across
+downloads (yt-dlp fixes the value when a download starts, so tuning happens
+between runs, not inside one):
+
+- start conservative (START_FRAGMENTS)
+- after each fragmented download, compare throughput with the previous run:
+  faster -> climb, slower -> step back, about the same -> stay (converged)
+- 429/403 -> halve and remember a ceiling for that site
+- learned values are persisted per site in the app data directory
+"""
+
+import os
+import json
+import time
+import threading
+
+from .utils import site_key
+
+START_FRAGMENTS = 4
+MIN_FRAGMENTS = 1
+MAX_FRAGMENTS = 16
+STEP_UP = 2
+HTTP_CHUNK_SIZE = 10 * 1024 * 1024   # also dodges YouTube's per-request throttling
+BUFFER_SIZE = 1024 * 1024
+
+# Ignore tiny downloads: their speed says nothing about concurrency
+MIN_SAMPLE_BYTES = 4 * 1024 * 1024
+MIN_SAMPLE_SECONDS = 2.0
+CEILING_TTL = 24 * 3600
+
+
+def _state_path():
+    """transfer_tuning.json inside the app data directory."""
+    try:
+        from . import platform_utils
+        base = platform_utils.get_app_data_dir("Tsufutube")
+    except ImportError:
+        base = os.path.join(os.path.expanduser("~"), ".config", "Tsufutube")
+    return os.path.join(base, "transfer_tuning.json")
+
+
+class TransferSession:
+    """Tracks one yt-dlp download and reports back to the tuner."""
+
+    def __init__(self, tuner, key, fragments):
+        self.tuner = tuner
+        self.key = key
+        self.fragments = fragments
+        self.fragmented = False
+        self.options = {
+            'concurrent_fragment_downloads': fragments,
+            'http_chunk_size': HTTP_CHUNK_SIZE,
+            'buffersize': BUFFER_SIZE,
+        }
+
+    def on_progress(self, d):
+        """Call from the yt-dlp progress hook."""
+        status = d.get('status')
+        if status == 'downloading':
+            if d.get('fragment_count') or d.get('fragment_index'):
+                self.fragmented = True
+        elif status == 'finished':
+            size = d.get('downloaded_bytes') or d.get('total_bytes') or 0
+            elapsed = d.get('elapsed') or 0
+            if self.fragmented and size >= MIN_SAMPLE_BYTES and elapsed >= MIN_SAMPLE_SECONDS:
+                self.tuner.report(self.key, self.fragments, size / elapsed)
+
+    def on_error(self, error):
+        """Call with a download exception; backs off on throttling answers."""
+        text = str(error)
+        if "429" in text or "403" in text or "Too Many Requests" in text:
+            self.tuner.report_throttled(self.key, self.fragments)
+
+
+class TransferTuner:
+    def __init__(self, state_path=None, persist=True, max_fragments=MAX_FRAGMENTS):
+        self.state_path = state_path or _state_path()
+        self.persist = persist
+        self.max_fragments = max_fragments
+        self._lock = threading.Lock()
+        self._sites = {}  # key -> {"fragments", "last_speed", "ceiling", "ceiling_at"}
+        if persist:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self._sites = json.load(f)
+        except: self._sites = {}
+
+    def _save(self):
+        if not self.persist:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, 'w', encoding='utf-8') as f:
+                json.dump(self._sites, f)
+        except Exception as e:
+            print(f"[Tuner] Could not save: {e}")
+
+    def _ceiling(self, site):
+        if site.get("ceiling") and time.time() - site.get("ceiling_at", 0) < CEILING_TTL:
+            return site["ceiling"]
+        return self.max_fragments
+
+    def fragments_for(self, key):
+        with self._lock:
+            site = self._sites.get(key)
+            if not site:
+                return START_FRAGMENTS
+            return max(MIN_FRAGMENTS, min(site["fragments"], self._ceiling(site)))
+
+    def start(self, key):
+        """New session for a download from site `key`."""
+        return TransferSession(self, key, self.fragments_for(key))
+
+    def report(self, key, fragments_used, speed):
+        """Hill-climb on throughput (bytes/s) measured with `fragments_used`."""
+        with self._lock:
+            site = self._sites.setdefault(key, {"fragments": fragments_used, "last_speed": 0})
+            last = site.get("last_speed", 0)
+            n = fragments_used
+            if not last or speed >= last * 1.05:
+                n = min(self._ceiling(site), n + STEP_UP)      # more parallelism paid off
+            elif speed < last * 0.9:
+                n = max(MIN_FRAGMENTS, n - 1)                  # it got worse: step back
+            site["fragments"] = n
+            site["last_speed"] = speed
+            self._save()
+        print(f"[Tuner] {key}: {speed / 1048576:.1f} MB/s with {fragments_used} fragments -> next {n}")
+
+    def report_throttled(self, key, fragments_used):
+        with self._lock:
+            site = self._sites.setdefault(key, {"fragments": fragments_used, "last_speed": 0})
+            n = max(MIN_FRAGMENTS, fragments_used // 2)
+            site.update(fragments=n, ceiling=max(MIN_FRAGMENTS, fragments_used - 1), ceiling_at=time.time())
+            self._save()
+        print(f"[Tuner] {key}: throttled at {fragments_used} fragments -> {n}")
+
+
+_tuner = None
+_tuner_lock = threading.Lock()
+
+
+def get_tuner():
+    """Process-wide tuner."""
+    global _tuner
+    with _tuner_lock:
+        if _tuner is None:
+            _tuner = TransferTuner()
+    return _tuner
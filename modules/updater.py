@@ -5,16 +5,15 @@ Handles checking for updates from GitHub Releases and applying them.
 
 import os
 import sys
-import json
 import threading
 import tempfile
 import zipfile
 import shutil
 import subprocess
-from urllib.request import urlopen, Request
-from urllib.error import URLError, HTTPError
 from packaging import version
 
+from . import http_client
+from . import hashing
 from .constant import APP_VERSION, REPO_API_URL
 
 
@@ -73,13 +72,13 @@ class UpdateChecker:
         Returns release info dict if update available, None otherwise.
         """
         try:
-            req = Request(
+            response = http_client.get(
                 REPO_API_URL,
-                headers={'User-Agent': 'Tsufutube-Downloader', 'Accept': 'application/vnd.github.v3+json'}
+                headers={'User-Agent': 'Tsufutube-Downloader', 'Accept': 'application/vnd.github.v3+json'},
+                timeout=10
             )
-            
-            with urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode('utf-8'))
+            response.raise_for_status()
+            data = response.json()
             
             # Parse version from tag (e.g., "v1.0.1" -> "1.0.1")
             latest_tag = data.get('tag_name', '').lstrip('v')
@@ -107,7 +106,7 @@ class UpdateChecker:
                 print(f"Version parse error: {e}")
                 return None
                 
-        except (URLError, HTTPError) as e:
+        except OSError as e:  # requests.RequestException is an OSError
             print(f"Update check failed: {e}")
             return None
         except Exception as e:
@@ -149,36 +148,49 @@ class UpdateChecker:
         
         return None
     
+    def _asset_digest(self, url: str) -> str | None:
+        """Published digest ("sha256:<hex>") of the release asset at url, if GitHub lists one."""
+        for asset in (self.latest_release or {}).get('assets', []):
+            if asset.get('browser_download_url') == url and asset.get('digest'):
+                return asset['digest']
+        return None
+
     def download_update(self, url: str, progress_callback=None) -> str | None:
         """
         Download update file to temp directory.
+        The file is hashed while it is written and checked against the
+        asset's published digest; a mismatch discards the download.
         Returns path to downloaded file.
         """
         try:
-            req = Request(url, headers={'User-Agent': 'Tsufutube-Downloader'})
-            
             # Get filename from URL
             filename = url.split('/')[-1]
             temp_dir = tempfile.gettempdir()
             filepath = os.path.join(temp_dir, filename)
+            expected = self._asset_digest(url)
+            hasher = hashing.StreamHasher(expected.split(':', 1)[0] if expected else 'sha256')
             
-            with urlopen(req, timeout=60) as response:
+            with http_client.get(url, headers={'User-Agent': 'Tsufutube-Downloader'}, stream=True, timeout=(15, 60)) as response:
+                response.raise_for_status()
                 total_size = int(response.headers.get('Content-Length', 0))
                 downloaded = 0
-                chunk_size = 8192
                 
                 with open(filepath, 'wb') as f:
-                    while True:
-                        chunk = response.read(chunk_size)
+                    for chunk in response.iter_content(chunk_size=65536):
                         if not chunk:
-                            break
+                            continue
                         f.write(chunk)
+                        hasher.update(chunk)
                         downloaded += len(chunk)
                         
                         if progress_callback and total_size > 0:
                             progress = (downloaded / total_size) * 100
                             progress_callback(progress, downloaded, total_size)
             
+            if expected and hasher.value() != expected:
+                print(f"Update integrity check failed: {hasher.value()} != {expected}")
+                os.remove(filepath)
+                return None
             return filepath
             
         except Exception as e:
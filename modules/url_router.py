@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+URL Router
+==========
+One place that knows what a URL points at, used by the fetcher, the engine,
+the yt-dlp archive check and history:
+
+- identify(url)       -> platform name (YOUTUBE, BILIBILI, TIKTOK, ...)
+- parse(url)          -> Route(platform, id, params, url) without network
+- canonical_key(url)  -> cache key shared by every spelling of a video
+- resolve(url)        -> short links (b23.tv, vm.tiktok.com, v.douyin.com...)
+                         expanded once over the network, then cached on disk
+- archive_id(url)     -> "<extractor> <id>" line as written by yt-dlp
+"""
+
+import os
+import re
+import json
+import threading
+from collections import namedtuple, OrderedDict
+from urllib.parse import urlparse, parse_qs
+
+Route = namedtuple("Route", "platform id params url")
+
+# (platform, host pattern). First match wins.
+_HOSTS = [
+    ("YOUTUBE", r"(?:^|\.)(?:youtube\.com|youtu\.be|youtube-nocookie\.com)$"),
+    ("BILIBILI", r"(?:^|\.)(?:bilibili\.com|b23\.tv|bili2233\.cn)$"),
+    ("INSTAGRAM", r"(?:^|\.)instagram\.com$"),
+    ("TIKTOK", r"(?:^|\.)tiktok\.com$"),
+    ("DOUYIN", r"(?:^|\.)(?:douyin\.com|iesdouyin\.com)$"),
+    ("DAILYMOTION", r"(?:^|\.)(?:dailymotion\.com|dai\.ly)$"),
+    ("TWITTER", r"(?:^|\.)(?:twitter\.com|x\.com)$"),
+    ("FACEBOOK", r"(?:^|\.)(?:facebook\.com|fb\.watch)$"),
+]
+_HOST_RES = [(p, re.compile(h)) for p, h in _HOSTS]
+
+# platform -> id patterns (searched in the full URL)
+_ID_PATTERNS = {
+    "YOUTUBE": [r'(?:v=|/v/|youtu\.be/)([a-zA-Z0-9_-]{11})', r'(?:embed/|shorts/|live/)([a-zA-Z0-9_-]{11})'],
+    "BILIBILI": [r'(BV[0-9A-Za-z]{10})'],
+    "TIKTOK": [r'/(?:video|photo)/(\d{8,})'],
+    "DOUYIN": [r'(?:/video/|/note/|modal_id=)(\d{8,})'],
+    "DAILYMOTION": [r'(?:video/|dai\.ly/)([a-z0-9]+)'],
+    "INSTAGRAM": [r'/(?:p|reel|reels|tv)/([\w-]+)'],
+    "TWITTER": [r'/status/(\d+)'],
+}
+_ID_RES = {p: [re.compile(x) for x in pats] for p, pats in _ID_PATTERNS.items()}
+
+# Hosts whose links are redirects to the real page
+SHORT_HOSTS = {"b23.tv", "bili2233.cn", "vm.tiktok.com", "vt.tiktok.com", "v.douyin.com", "fb.watch"}
+
+# yt-dlp extractor names (archive lines are "<extractor lowercase> <id>")
+_ARCHIVE_EXTRACTORS = {"YOUTUBE": "youtube", "BILIBILI": "bilibili", "TIKTOK": "tiktok", "DOUYIN": "douyin",
+                       "DAILYMOTION": "dailymotion", "INSTAGRAM": "instagram", "TWITTER": "twitter"}
+
+_TRACKING_PREFIXES = ("utm_", "si=", "feature=", "spm_id_from=", "vd_source=", "share_", "is_from_webapp=", "sender_device=")
+
+MAX_CACHED_LINKS = 500
+
+
+def _host(url):
+    try:
+        return (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def identify(url):
+    """Platform name for url ("OTHER" if unknown)."""
+    if not url:
+        return "UNKNOWN"
+    host = _host(url.strip())
+    for platform, rx in _HOST_RES:
+        if rx.search(host):
+            if platform == "FACEBOOK" and ("/stories" in url or "your_story" in url):
+                return "FACEBOOK_STORY"
+            return platform
+    return "OTHER"
+
+
+def parse(url):
+    """Route for url without touching the network (id is None if not in the URL)."""
+    url = (url or "").strip()
+    platform = identify(url)
+    vid = None
+    for rx in _ID_RES.get(platform, ()):
+        m = rx.search(url)
+        if m:
+            vid = m.group(1)
+            break
+    params = {}
+    try:
+        query = parse_qs(urlparse(url).query)
+    except ValueError:
+        query = {}
+    if platform == "YOUTUBE" and "list" in query:
+        params["list"] = query["list"][0]
+    if platform == "BILIBILI" and query.get("p", ["1"])[0] != "1":
+        params["p"] = query["p"][0]
+    return Route(platform, vid, params, url)
+
+
+def canonical_key(url):
+    """
+    Cache key shared by every spelling of the same video:
+    youtu.be/X, watch?v=X&t=30 and shorts/X all map to ("YOUTUBE", "X").
+    """
+    route = parse(url)
+    if route.platform == "YOUTUBE" and not route.id and route.params.get("list"):
+        return ("YOUTUBE_PLAYLIST", route.params["list"])
+    if route.id:
+        vid = route.id
+        if route.params.get("p"):
+            vid += f"_p{route.params['p']}"
+        return (route.platform, vid)
+    # Unknown layout: normalized URL (no fragment, no tracking params)
+    parsed = urlparse(route.url)
+    query = "&".join(q for q in parsed.query.split("&") if q and not q.startswith(_TRACKING_PREFIXES))
+    norm = f"{parsed.netloc.lower()}{parsed.path.rstrip('/')}" + (f"?{query}" if query else "")
+    return ("URL", norm)
+
+
+def archive_id(url):
+    """yt-dlp download-archive line for url, or None if it cannot be derived offline."""
+    key = canonical_key(url)
+    extractor = _ARCHIVE_EXTRACTORS.get(key[0])
+    return f"{extractor} {key[1]}" if extractor else None
+
+
+def needs_resolve(url):
+    """Short link whose target (and video id) is only known after following redirects."""
+    return _host(url) in SHORT_HOSTS and not parse(url).id
+
+
+def _clean_resolved(url):
+    """Drop share/tracking query strings from a resolved target, keep meaningful params."""
+    route = parse(url)
+    if route.platform in ("TIKTOK", "DOUYIN", "BILIBILI"):
+        base = url.split("?", 1)[0]
+        if route.params.get("p"):
+            base += f"?p={route.params['p']}"
+        return base
+    return url
+
+
+# ---------------------------------------------------------------------------
+# Short-link cache
+# ---------------------------------------------------------------------------
+def _cache_path():
+    """short_links.json inside the app data directory."""
+    try:
+        from . import platform_utils
+        base = platform_utils.get_app_data_dir("Tsufutube")
+    except ImportError:
+        base = os.path.join(os.path.expanduser("~"), ".config", "Tsufutube")
+    return os.path.join(base, "short_links.json")
+
+
+class ShortLinkResolver:
+    def __init__(self, path=None, persist=True):
+        self.path = path or _cache_path()
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._links = OrderedDict()
+        self._inflight = {}
+        if persist:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._links = OrderedDict(json.load(f))
+            except: pass
+
+    def _save(self):
+        if not self.persist:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(list(self._links.items()), f)
+        except Exception as e:
+            print(f"[URLRouter] Could not save short links: {e}")
+
+    def _follow(self, url, timeout):
+        from . import http_client
+        try:
+            resp = http_client.head(url, timeout=timeout)
+            if resp.status_code < 400 and resp.url:
+                return resp.url
+        except Exception:
+            pass
+        # Some shorteners reject HEAD
+        with http_client.get(url, stream=True, timeout=timeout) as resp:
+            return resp.url or url
+
+    def resolve(self, url, timeout=8):
+        """Expanded URL for a short link (cached); other URLs are returned unchanged."""
+        url = (url or "").strip()
+        if not needs_resolve(url):
+            return url
+        with self._lock:
+            if url in self._links:
+                self._links.move_to_end(url)
+                return self._links[url]
+            # Concurrent callers wait for the same lookup instead of repeating it
+            event = self._inflight.get(url)
+            owner = event is None
+            if owner:
+                event = self._inflight[url] = threading.Event()
+        if not owner:
+            event.wait(timeout * 2)
+            with self._lock:
+                return self._links.get(url, url)
+        try:
+            target = _clean_resolved(self._follow(url, timeout))
+            print(f"[URLRouter] {url} -> {target}")
+        except Exception as e:
+            print(f"[URLRouter] Could not resolve {url}: {e}")
+            target = None
+        with self._lock:
+            self._inflight.pop(url, None)
+            if target and target != url:
+                self._links[url] = target
+                while len(self._links) > MAX_CACHED_LINKS:
+                    self._links.popitem(last=False)
+                self._save()
+        event.set()
+        return target or url
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """Process-wide short-link resolver."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ShortLinkResolver()
+    return _resolver
+
+
+def resolve(url, timeout=8):
+    return get_resolver().resolve(url, timeout)
+
+
+def route(url, timeout=8):
+    """parse() after resolving short links."""
+    return parse(resolve(url, timeout))
@@ -32,6 +32,42 @@ def time_to_seconds(t):
         return 0
     except: return -1 # Trả về -1 nếu lỗi parse
 
+def parse_range_spec(spec, total):
+    """
+    Parse a 1-based selection like "all", "3", "1-5,8,10-12" into a sorted
+    list of indices within 1..total. Empty/invalid input means all.
+    """
+    everything = list(range(1, total + 1))
+    spec = (spec or "").lower().strip()
+    if not spec or spec == "all":
+        return everything
+    picked = set()
+    try:
+        for part in spec.split(','):
+            part = part.strip()
+            if '-' in part:
+                s, e = part.split('-', 1)
+                s = int(s) if s.strip() else 1
+                e = int(e) if e.strip() else total
+                picked.update(range(max(1, s), min(total, e) + 1))
+            elif part.isdigit():
+                if 1 <= int(part) <= total: picked.add(int(part))
+    except ValueError:
+        return everything
+    return sorted(picked) or everything
+
+def site_key(url):
+    """'https://m.youtube.com/watch?..' -> 'youtube.com' (per-site stats key)."""
+    from urllib.parse import urlparse
+    try:
+        host = (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return ""
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
 def set_autostart_registry(enable=True, app_name="TsufutubeDownloader"):
     """
     Thêm hoặc xóa ứng dụng khỏi Registry Startup của Windows.
@@ -0,0 +1,72 @@
+"""
+Tests for bandwidth.py module.
+"""
+from datetime import datetime
+
+from modules import bandwidth
+from modules.bandwidth import TokenBucket, BandwidthManager, scheduled_limit, KB
+
+
+class TestTokenBucket:
+    """Tests for TokenBucket."""
+
+    def test_unlimited_never_waits(self):
+        assert TokenBucket(0).reserve(10 ** 9) == 0
+
+    def test_burst_then_debt(self):
+        bucket = TokenBucket(100 * KB)
+        assert bucket.reserve(100 * KB) == 0          # one second of burst
+        assert abs(bucket.reserve(50 * KB) - 0.5) < 0.05  # then pay for the rest
+
+
+class TestSchedule:
+    """Tests for time-of-day windows."""
+
+    SCHEDULE = [{"start": "08:00", "end": "18:00", "limit_kb": 500},
+                {"start": "22:00", "end": "02:00", "limit_kb": 0}]
+
+    def test_business_hours(self):
+        assert scheduled_limit(self.SCHEDULE, 2000, datetime(2026, 1, 5, 9, 30)) == 500
+
+    def test_outside_windows_uses_default(self):
+        assert scheduled_limit(self.SCHEDULE, 2000, datetime(2026, 1, 5, 19, 0)) == 2000
+
+    def test_window_past_midnight(self):
+        assert scheduled_limit(self.SCHEDULE, 2000, datetime(2026, 1, 5, 1, 0)) == 0
+        assert scheduled_limit(self.SCHEDULE, 2000, datetime(2026, 1, 5, 23, 0)) == 0
+
+
+class TestManager:
+    """Tests for combining global, host and task limits."""
+
+    def test_tightest_limit_wins(self):
+        manager = BandwidthManager()
+        manager.configure({"bandwidth_limit_kb": 1000, "bandwidth_host_limits_kb": {"bilivideo.com": 300}})
+        task = bandwidth.task_bucket(200)
+        assert manager.limiter("https://upos-sz.bilivideo.com/x.m4s").rate == 300 * KB
+        assert manager.limiter("https://upos-sz.bilivideo.com/x.m4s", task).rate == 200 * KB
+        assert manager.limiter("https://example.com/x").rate == 1000 * KB
+
+    def test_host_bucket_shared_across_subdomains(self):
+        manager = BandwidthManager()
+        manager.configure({"bandwidth_host_limits_kb": {"bilivideo.com": 300}})
+        a = manager.limiter("https://a.bilivideo.com/1")
+        b = manager.limiter("https://b.bilivideo.com/2")
+        assert a.buckets[-1] is b.buckets[-1]
+        assert not manager.limiter("https://notbilivideo.com/").active
+
+    def test_unlimited_by_default(self):
+        manager = BandwidthManager()
+        manager.configure({})
+        assert manager.limiter("https://example.com/").rate == 0
+
+    def test_progress_hook_counts_growth(self):
+        manager = BandwidthManager()
+        manager.configure({})
+        limiter = manager.limiter("https://example.com/")
+        taken = []
+        limiter.buckets = [type("B", (), {"rate": 0, "reserve": lambda self, n: taken.append(n) or 0})()]
+        limiter.on_progress({"status": "downloading", "filename": "a", "downloaded_bytes": 100})
+        limiter.on_progress({"status": "downloading", "filename": "a", "downloaded_bytes": 250})
+        limiter.on_progress({"status": "finished", "filename": "a", "downloaded_bytes": 250})
+        assert taken == [100, 150]
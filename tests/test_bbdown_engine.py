@@ -0,0 +1,131 @@
+"""
+Tests for bbdown_engine.py module.
+"""
+import os
+import sys
+import pytest
+
+from modules import bbdown_engine
+from modules.bbdown_engine import BBDownEngine, ProgressParser, move_outputs, page_spec
+
+FAKE_BBDOWN = r'''#!{python}
+import os, sys
+work = sys.argv[sys.argv.index("--work-dir") + 1]
+print("[2024-01-01 10:00:00.000] - 共计 2 个分P", flush=True)
+for p in ("1", "2"):
+    print(f"[2024-01-01 10:00:01.000] - 开始下载P{{p}}视频...", flush=True)
+    sys.stdout.write("\r 50.00% 2.50 MB/s\r100.00% 2.50 MB/s\n")
+    print(f"[2024-01-01 10:00:02.000] - 开始下载P{{p}}音频...", flush=True)
+    print("[2024-01-01 10:00:03.000] - 开始合并音视频...", flush=True)
+    os.makedirs(os.path.join(work, "Title"), exist_ok=True)
+    with open(os.path.join(work, "Title", f"[P{{p}}]Part.mp4"), "wb") as f:
+        f.write(b"x" * 2048)
+print("[2024-01-01 10:00:04.000] - 任务完成", flush=True)
+sys.exit(int(os.environ.get("FAKE_BBDOWN_EXIT", "0")))
+'''
+
+
+class TestProgressParser:
+    """Tests for BBDown output parsing."""
+
+    def test_single_part_phases(self):
+        parser = ProgressParser()
+        assert parser.feed("[..] - 开始下载P1视频...")
+        parser.feed("  45.20% 5.60 MB/s")
+        assert parser.overall() == pytest.approx(45.2 * 0.8)
+        assert parser.message() == "Video: 45.2% (5.60 MB/s)"
+        parser.feed("[..] - 开始下载P1音频...")
+        parser.feed("100.00% 1.0 MB/s")
+        assert parser.overall() == pytest.approx(95.0)
+        assert parser.feed("[..] - 开始合并音视频...")
+        assert parser.message() == "Muxing"
+        parser.feed("[..] - 任务完成")
+        assert parser.overall() == 100
+
+    def test_multi_part_overall(self):
+        parser = ProgressParser(parts=1)
+        parser.feed("[..] - 共计 4 个分P")
+        parser.feed("[..] - 开始下载P1视频...")
+        parser.feed("[..] - 开始下载P2视频...")
+        parser.feed("50.00%")
+        assert parser.overall() == pytest.approx((1 + 0.4) / 4 * 100)
+        assert parser.message().startswith("Video P2: 50.0%")
+
+    def test_percent_ignored_outside_downloads(self):
+        parser = ProgressParser()
+        parser.feed("视频质量 100% 码率")
+        assert parser.overall() == 0
+
+
+class TestHelpers:
+    """Tests for page specs and output detection."""
+
+    def test_page_spec(self):
+        assert page_spec([5, 1, 3, 4]) == "1,3-5"
+        assert page_spec([2]) == "2"
+
+    def test_move_outputs(self, temp_dir):
+        save = os.path.join(temp_dir, "save")
+        work = os.path.join(save, ".bbdown-x")
+        os.makedirs(os.path.join(work, "Title"))
+        os.makedirs(os.path.join(save, "Title"))
+        with open(os.path.join(save, "Title", "[P1]a.mp4"), "wb") as f:
+            f.write(b"old")
+        with open(os.path.join(work, "Title", "[P1]a.mp4"), "wb") as f:
+            f.write(b"new")
+        open(os.path.join(work, "notes.txt"), "w").close()
+        moved = move_outputs(work, save)
+        assert moved == [os.path.join(save, "Title", "[P1]a (1).mp4")]
+        with open(os.path.join(save, "Title", "[P1]a.mp4"), "rb") as f:
+            assert f.read() == b"old"
+
+    def test_command_options(self):
+        engine = BBDownEngine.__new__(BBDownEngine)
+        engine.bbdown_path = "BBDown"
+        cmd = engine.build_command("https://b23.tv/x", "/out", pages="1,3-5", use_aria2c=True)
+        assert cmd[cmd.index("-p") + 1] == "1,3-5"
+        assert "--multi-thread" in cmd and "--use-aria2c" in cmd
+        assert "--multi-thread" not in engine.build_command("u", "/out", multi_thread=False)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fake BBDown is a shebang script")
+class TestDownload:
+    """Runs a fake BBDown executable."""
+
+    @pytest.fixture
+    def engine(self, temp_dir):
+        path = os.path.join(temp_dir, "BBDown")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(FAKE_BBDOWN.format(python=sys.executable))
+        os.chmod(path, 0o755)
+        engine = BBDownEngine.__new__(BBDownEngine)
+        engine.bbdown_path = path
+        return engine
+
+    def test_batch_progress_and_files(self, engine, temp_dir, monkeypatch):
+        monkeypatch.setattr(bbdown_engine, "PROGRESS_INTERVAL", 0)
+        out = os.path.join(temp_dir, "out")
+        os.makedirs(out)
+        updates = []
+        ok, msg, files = engine.download("https://www.bilibili.com/video/BV1xx411c7mu", out,
+                                         callback=lambda p, m: updates.append((p, m)), pages="ALL", parts=2)
+        assert ok, msg
+        assert files == [os.path.join(out, "Title", f"[P{p}]Part.mp4") for p in (1, 2)]
+        assert os.listdir(out) == ["Title"]  # per-run work dir removed
+        percents = [p for p, _ in updates]
+        assert percents == sorted(percents) and percents[-1] == 100
+        assert any("Video P2: 100.0% (2.50 MB/s)" in m for _, m in updates)
+
+    def test_other_writers_not_collected(self, engine, temp_dir):
+        """Media written to the save folder during the run is not BBDown output."""
+        stray = os.path.join(temp_dir, "other.mp4")
+        with open(stray, "wb") as f:
+            f.write(b"1")
+        ok, _, files = engine.download("https://www.bilibili.com/video/BV1xx411c7mu", temp_dir)
+        assert ok and stray not in files and len(files) == 2
+
+    def test_failure_exit_code(self, engine, temp_dir, monkeypatch):
+        monkeypatch.setenv("FAKE_BBDOWN_EXIT", "3")
+        ok, msg, files = engine.download("https://www.bilibili.com/video/BV1xx411c7mu", temp_dir)
+        assert not ok and "3" in msg and files == []
+        assert not any(name.startswith(".bbdown-") for name in os.listdir(temp_dir))
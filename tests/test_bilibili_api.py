@@ -4,6 +4,7 @@ Tests for bilibili_api.py module.
 import pytest
 import os
 import sys
+import time
 
 # Import the module under test
 from modules.bilibili_api import BilibiliAPI
@@ -151,3 +152,144 @@ class TestBilibiliAPIHeaders:
         """Headers should use default referer when not provided."""
         headers = api._get_headers()
         assert "bilibili.com" in headers["Referer"]
+
+
+class TestBilibiliClientCaching:
+    """Tests for the shared client, cookie reload and WBI key cache."""
+
+    @pytest.fixture(autouse=True)
+    def isolated_cache(self, temp_dir, monkeypatch):
+        from modules import bilibili_api
+        monkeypatch.setattr(bilibili_api, "_wbi_cache_path", lambda: os.path.join(temp_dir, "wbi_keys.json"))
+        monkeypatch.setattr(bilibili_api, "_wbi_keys", {"img_key": None, "sub_key": None, "fetched_at": 0})
+        monkeypatch.setattr(bilibili_api, "_clients", {})
+        return bilibili_api
+
+    def test_get_client_is_shared_per_cookie_file(self, isolated_cache):
+        """Same cookie path returns the same client."""
+        a = isolated_cache.get_client("/nonexistent/a.txt")
+        assert isolated_cache.get_client("/nonexistent/a.txt") is a
+        assert isolated_cache.get_client(None) is not a
+
+    def test_cookies_reload_only_on_change(self, isolated_cache, temp_dir):
+        """Cookie file is re-parsed only when its mtime changes."""
+        path = os.path.join(temp_dir, "cookies.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(".bilibili.com\tTRUE\t/\tFALSE\t0\tSESSDATA\tone\n")
+        client = isolated_cache.get_client(path)
+        assert client.cookies == {"SESSDATA": "one"}
+
+        client.cookies["SESSDATA"] = "patched"
+        isolated_cache.get_client(path)
+        assert client.cookies["SESSDATA"] == "patched"  # unchanged file -> no reload
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(".bilibili.com\tTRUE\t/\tFALSE\t0\tSESSDATA\ttwo\n")
+        os.utime(path, (time.time() + 5, time.time() + 5))
+        isolated_cache.get_client(path)
+        assert client.cookies == {"SESSDATA": "two"}
+
+    def test_reload_never_exposes_empty_jar(self, isolated_cache, temp_dir, monkeypatch):
+        """While the changed file is parsed, parallel requests still see the previous cookies."""
+        path = os.path.join(temp_dir, "cookies.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(".bilibili.com\tTRUE\t/\tFALSE\t0\tSESSDATA\tone\n")
+        client = isolated_cache.get_client(path)
+        os.utime(path, (time.time() + 5, time.time() + 5))
+
+        seen = []
+        parse = BilibiliAPI._read_cookie_file
+        monkeypatch.setattr(BilibiliAPI, "_read_cookie_file",
+                            lambda self, p: seen.append(dict(self.cookies)) or parse(self, p))
+        client.refresh_cookies()
+        assert seen == [{"SESSDATA": "one"}]
+        assert "SESSDATA=one" in client._get_headers()["Cookie"]
+
+    def test_wbi_keys_cached_and_persisted(self, isolated_cache, monkeypatch):
+        """Nav is fetched once; keys survive a 'restart' via the disk file."""
+        calls = []
+        monkeypatch.setattr(BilibiliAPI, "_fetch_wbi_keys", lambda self: calls.append(1) or ("img", "sub"))
+        api = BilibiliAPI()
+        assert api.get_wbi_keys() == ("img", "sub")
+        assert api.get_wbi_keys() == ("img", "sub")
+        assert len(calls) == 1
+
+        # Simulate restart: memory cleared, disk file remains
+        monkeypatch.setattr(isolated_cache, "_wbi_keys", {"img_key": None, "sub_key": None, "fetched_at": 0})
+        assert BilibiliAPI().get_wbi_keys() == ("img", "sub")
+        assert len(calls) == 1
+
+    def test_play_url_refreshes_keys_on_signature_error(self, isolated_cache, monkeypatch):
+        """A -352 answer forces one key refresh and retry."""
+        keys = iter([("a" * 32, "b" * 32), ("c" * 32, "d" * 32)])
+        monkeypatch.setattr(BilibiliAPI, "_fetch_wbi_keys", lambda self: next(keys))
+        responses = iter([{"code": -352}, {"code": 0, "data": {}}])
+        monkeypatch.setattr(BilibiliAPI, "_request", lambda self, url, params=None, referer=None: next(responses))
+        assert BilibiliAPI().get_play_url("BV1test", 1)["code"] == 0
+
+
+class TestStreamSelection:
+    """Tests for DASH video/audio selection."""
+
+    VIDEOS = [
+        {"id": 120, "height": 2160, "codecid": 7, "bandwidth": 16000000},
+        {"id": 80, "height": 1080, "codecid": 7, "bandwidth": 3000000},
+        {"id": 80, "height": 1080, "codecid": 12, "bandwidth": 1800000},
+        {"id": 80, "height": 1080, "codecid": 13, "bandwidth": 1500000},
+        {"id": 64, "height": 720, "codecid": 7, "bandwidth": 1200000},
+    ]
+
+    def test_height_cap(self):
+        """Never exceeds the cap, takes the highest resolution under it."""
+        from modules.bilibili_api import select_video_stream
+        assert select_video_stream(self.VIDEOS, 1080)["height"] == 1080
+        assert select_video_stream(self.VIDEOS, 720)["height"] == 720
+        assert select_video_stream(self.VIDEOS, 2160, "h264")["height"] == 2160
+
+    def test_below_every_stream_takes_lowest(self):
+        """A cap below all streams falls back to the smallest resolution."""
+        from modules.bilibili_api import select_video_stream
+        assert select_video_stream(self.VIDEOS, 360)["height"] == 720
+
+    def test_codec_priority(self):
+        """h264/av1 preferences pick that codec; auto picks the smallest file."""
+        from modules.bilibili_api import select_video_stream
+        assert select_video_stream(self.VIDEOS, 1080, "h264")["codecid"] == 7
+        assert select_video_stream(self.VIDEOS, 1080, "av1")["codecid"] == 13
+        assert select_video_stream(self.VIDEOS, 1080, "auto")["bandwidth"] == 1500000
+
+    def test_audio_selection(self):
+        """Highest bitrate AAC, FLAC only when lossless is requested."""
+        from modules.bilibili_api import select_audio_stream
+        dash = {"audio": [{"id": 30216, "bandwidth": 64000}, {"id": 30280, "bandwidth": 192000}],
+                "flac": {"audio": {"id": 30251, "bandwidth": 900000}}}
+        assert select_audio_stream(dash)["id"] == 30280
+        assert select_audio_stream(dash, lossless=True)["id"] == 30251
+        assert select_audio_stream({"audio": None}) is None
+
+    def test_qn_for_height(self):
+        from modules.bilibili_api import qn_for_height
+        assert qn_for_height(2160) == 120
+        assert qn_for_height(1080) == 80
+        assert qn_for_height(360) == 16
+
+
+class TestDownloadFile:
+    """Tests for single-stream downloads."""
+
+    def test_hash_of_written_bytes(self, temp_dir, monkeypatch):
+        from modules import bilibili_api, hashing
+
+        class Resp:
+            headers = {"Content-Length": "9"}
+            def __enter__(self): return self
+            def __exit__(self, *a): return False
+            def raise_for_status(self): pass
+            def iter_content(self, chunk_size=65536):
+                yield from (b"abc", b"", b"defghi")
+
+        monkeypatch.setattr(bilibili_api.http_client, "get", lambda *a, **k: Resp())
+        dest = os.path.join(temp_dir, "a.m4s")
+        hasher = hashing.StreamHasher()
+        assert BilibiliAPI().download_file("https://upos.bilivideo.com/a.m4s", dest, None, hasher=hasher)
+        assert hasher.value() == hashing.file_hash(dest) and hasher.count == 9
@@ -0,0 +1,70 @@
+"""
+Tests for bulk_import.py module.
+"""
+import os
+import json
+import time
+
+from modules import bulk_import
+
+
+class TestExtractUrls:
+    """Tests for URL extraction from free text."""
+
+    def test_multiline_and_inline(self):
+        text = "first https://youtu.be/aaaaaaaaaaa\nsee (https://www.bilibili.com/video/BV1xx411c7mu), ok.\n\nhttp://a.com/x"
+        assert bulk_import.extract_urls(text) == [
+            "https://youtu.be/aaaaaaaaaaa",
+            "https://www.bilibili.com/video/BV1xx411c7mu",
+            "http://a.com/x",
+        ]
+
+    def test_no_urls(self):
+        assert bulk_import.extract_urls("nothing here") == []
+        assert bulk_import.extract_urls(None) == []
+
+
+class TestReadFile:
+    """Tests for file formats."""
+
+    def test_csv(self, temp_dir):
+        path = os.path.join(temp_dir, "list.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("title,link\nOne,https://a.com/1\n\"Two, quoted\",https://a.com/2\n")
+        assert bulk_import.read_file(path) == ["https://a.com/1", "https://a.com/2"]
+
+    def test_json_shapes(self, temp_dir):
+        path = os.path.join(temp_dir, "list.json")
+        data = {"entries": [{"url": "https://a.com/1", "thumb": "https://img/1.jpg"}, "https://a.com/2",
+                            {"webpage_url": "https://a.com/3"}]}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        assert bulk_import.read_file(path) == ["https://a.com/1", "https://a.com/2", "https://a.com/3"]
+
+    def test_txt_with_bom(self, temp_dir):
+        path = os.path.join(temp_dir, "list.txt")
+        with open(path, "w", encoding="utf-8-sig") as f:
+            f.write("https://a.com/1\r\nhttps://a.com/2\r\n")
+        assert bulk_import.read_file(path) == ["https://a.com/1", "https://a.com/2"]
+
+
+class TestDedupe:
+    """Tests for deduplication against queue and history."""
+
+    def test_same_video_different_spelling(self):
+        urls = ["https://youtu.be/dQw4w9WgXcQ", "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=5", "https://a.com/1"]
+        new, skipped = bulk_import.dedupe(urls)
+        assert new == ["https://youtu.be/dQw4w9WgXcQ", "https://a.com/1"] and skipped == 1
+
+    def test_existing_urls_and_history_keys(self):
+        urls = ["https://a.com/1", "https://www.tiktok.com/@u/video/7234567890123", "https://a.com/2"]
+        new, skipped = bulk_import.dedupe(urls, ["https://a.com/1/", "TIKTOK|7234567890123", None])
+        assert new == ["https://a.com/2"] and skipped == 2
+
+    def test_ten_thousand_is_fast(self):
+        urls = [f"https://www.youtube.com/watch?v={i:011d}" for i in range(10000)]
+        start = time.monotonic()
+        new, _ = bulk_import.dedupe(bulk_import.extract_urls("\n".join(urls)))
+        assert len(new) == 10000
+        assert time.monotonic() - start < 5
+        assert [len(c) for c in bulk_import.chunks(new, 4000)] == [4000, 4000, 2000]
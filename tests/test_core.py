@@ -151,6 +151,13 @@ class TestDownloaderEngineConfigureFormat:
         engine._configure_format(opts, "video", subs=True, dl_sub=True, settings=settings)
         # Should have subtitle-related options
         assert "writesubtitles" in opts or "format" in opts
+    
+    def test_dtype_height_limit(self, engine):
+        """Resolution caps parsed from dtype."""
+        assert engine._dtype_height_limit("video_4k") == 2160
+        assert engine._dtype_height_limit("video_2k") == 1440
+        assert engine._dtype_height_limit("video_720") == 720
+        assert engine._dtype_height_limit("video") == 1080
 
 
 class TestDownloaderEngineErrorClassification:
@@ -181,6 +188,13 @@ class TestDownloaderEngineErrorClassification:
             except Exception as e:
                 pytest.fail(f"_classify_error raised an exception for {error}: {e}")
 
+    def test_classify_error_taxonomy(self, engine):
+        """Hopeless errors get their own classes instead of ERR_UNKNOWN."""
+        assert engine._classify_error(Exception("ERROR: [youtube] abc: Video unavailable"))[0] == "ERR_NOT_FOUND"
+        assert engine._classify_error(Exception("The uploader has not made this video available in your country"))[0] == "ERR_GEO"
+        assert engine._classify_error(Exception("HTTP Error 412: Precondition Failed"))[0] == "ERR_WBI"
+        assert engine._classify_error(Exception("Sign in to confirm you're not a bot"))[0] == "ERR_BOT"
+
 
 class TestDownloaderEngineDuration:
     """Tests for DownloaderEngine.get_duration method."""
@@ -202,3 +216,118 @@ class TestDownloaderEngineDuration:
             f.write("test")
         result = engine.get_duration(test_file)
         assert isinstance(result, (int, float)) or result is None
+
+
+class TestDownloaderEngineBilibiliPages:
+    """Tests for DownloaderEngine._select_bilibili_pages method."""
+
+    PAGES = [{"cid": 100 + i, "page": i, "part": f"Part {i}"} for i in range(1, 6)]
+
+    @pytest.fixture
+    def engine(self):
+        return DownloaderEngine()
+
+    def test_default_first_page(self, engine):
+        """Plain URL downloads P1 only (old behavior)."""
+        url = "https://www.bilibili.com/video/BV1xx411c7mD"
+        assert [p["page"] for p in engine._select_bilibili_pages(url, {}, self.PAGES)] == [1]
+
+    def test_p_query(self, engine):
+        """?p=N selects that part."""
+        url = "https://www.bilibili.com/video/BV1xx411c7mD?p=3"
+        assert [p["page"] for p in engine._select_bilibili_pages(url, {}, self.PAGES)] == [3]
+
+    def test_playlist_mode_all_parts(self, engine):
+        url = "https://www.bilibili.com/video/BV1xx411c7mD"
+        assert len(engine._select_bilibili_pages(url, {"is_plist": True}, self.PAGES)) == 5
+
+    def test_parts_range(self, engine):
+        url = "https://www.bilibili.com/video/BV1xx411c7mD"
+        task = {"is_plist": True, "parts": "2-3,5"}
+        assert [p["page"] for p in engine._select_bilibili_pages(url, task, self.PAGES)] == [2, 3, 5]
+
+    def test_multipart_only_for_bv_videos(self, engine, monkeypatch):
+        """Lists without a BV id (favorites, spaces) are left to the playlist expansion."""
+        monkeypatch.setattr(engine, "get_bilibili_pages", lambda url, settings=None: self.PAGES)
+        assert engine.get_bilibili_multipart("https://space.bilibili.com/123/favlist?fid=456") == []
+        assert len(engine.get_bilibili_multipart("https://www.bilibili.com/video/BV1xx411c7mD")) == 5
+        monkeypatch.setattr(engine, "get_bilibili_pages", lambda url, settings=None: self.PAGES[:1])
+        assert engine.get_bilibili_multipart("https://www.bilibili.com/video/BV1xx411c7mD") == []
+
+
+class TestDownloaderEngineArchive:
+    """Tests for the download archive on API-path platforms."""
+
+    URL = "https://www.tiktok.com/@u/video/7234567890123"
+
+    @pytest.fixture
+    def engine(self):
+        return DownloaderEngine()
+
+    def test_archived_video_is_skipped(self, engine, temp_dir, monkeypatch):
+        settings = {"use_archive": True, "config_path": temp_dir}
+        monkeypatch.setattr(engine, "_dispatch", lambda task, platform, s, cb: (True, "ok", {"url": task["url"]}))
+        success, _, hist = engine.download_single({"url": self.URL}, settings, {})
+        assert success and hist["key"] == "TIKTOK|7234567890123"
+        with open(os.path.join(temp_dir, "archive.txt"), encoding="utf-8") as f:
+            assert f.read().strip() == "tiktok 7234567890123"
+        monkeypatch.setattr(engine, "_dispatch", lambda *a: pytest.fail("archived video downloaded again"))
+        success, _, hist = engine.download_single({"url": self.URL}, settings, {})
+        assert success and hist is None
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses /bin/true as FFmpeg")
+class TestDownloaderEngineM3U8:
+    """Tests for re-muxing sniffed .m3u8 files."""
+
+    PLAYLIST = "#EXTM3U\n#EXTINF:4.0,\nseg0.ts\n#EXT-X-ENDLIST\n"
+
+    @pytest.fixture
+    def engine(self, temp_dir, monkeypatch):
+        engine = DownloaderEngine(ffmpeg_path="/bin/true")
+        calls = []
+        monkeypatch.setattr(engine, "_download_hls_native", lambda url, *a, **k: calls.append(url) or (True, "ok"))
+        engine.native_calls = calls
+        return engine
+
+    def _playlist(self, temp_dir):
+        path = os.path.join(temp_dir, "video.m3u8")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.PLAYLIST)
+        return path
+
+    def test_relative_uris_without_base_go_to_ffmpeg(self, engine, temp_dir):
+        """Local paths are not fetched over HTTP."""
+        engine._convert_m3u8_to_mp4(self._playlist(temp_dir), os.path.join(temp_dir, "out.mp4"))
+        assert engine.native_calls == []
+
+    def test_http_base_uses_native(self, engine, temp_dir):
+        base = "https://cdn.example.com/v/index.m3u8"
+        assert engine._convert_m3u8_to_mp4(self._playlist(temp_dir), os.path.join(temp_dir, "out.mp4"), base_url=base)
+        assert engine.native_calls == [base]
+
+
+class TestDownloaderEngineDirectMedia:
+    """Tests for the direct media fast path."""
+
+    def test_direct_cut_trims_direct_mp4(self, temp_dir, monkeypatch):
+        """A cut task on a direct .mp4 link saves the trimmed range, whatever the cut method."""
+        engine = DownloaderEngine()
+
+        def fake_stream(url, target, headers, callbacks, hasher=None):
+            with open(target, "wb") as f:
+                f.write(b"x" * 10000)
+            return True, "Success"
+
+        def fake_cut(src, out, t_start, t_end):
+            with open(out, "wb") as f:
+                f.write(b"x" * 6000)
+            return True, "Success"
+        monkeypatch.setattr(engine, "_stream_to_file", fake_stream)
+        monkeypatch.setattr(engine, "fast_cut", fake_cut)
+        task = {"url": "https://cdn.example.com/v/clip.mp4", "save_path": temp_dir, "dtype": "video_1080",
+                "cut_mode": True, "cut_method": "direct_cut", "start_time": 10, "end_time": 20}
+        success, _, hist = engine._dispatch(task, "OTHER", {}, {})
+        assert success and hist["title"] == "clip (Cut)"
+        assert os.path.getsize(hist["path"]) == 6000
+        assert "hash" not in hist  # the cut rewrote the file
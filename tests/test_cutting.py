@@ -31,3 +31,25 @@ class TestCuttingLogic:
         # Check specific flags
         assert "-c:v" in args
         assert args[args.index("-c:v")+1] == "libx264"
+
+    def test_cut_replaces_file_in_place(self, engine, tmp_path):
+        final = tmp_path / "clip (Cut).mp4"
+        final.write_bytes(b"full")
+
+        def fake_cut(src, out, t_start, t_end):
+            with open(out, "wb") as f:
+                f.write(b"cut")
+            return True, "Success"
+        engine.fast_cut = MagicMock(side_effect=fake_cut)
+        task = {"cut_mode": True, "start_time": 10, "end_time": 20}
+        assert engine._cut_downloaded_file(str(final), task, {})
+        assert final.read_bytes() == b"cut"
+        assert engine.fast_cut.call_args[0][2:] == ("0:00:10", "0:00:20")
+
+    def test_direct_cut_is_not_cut_again(self, engine, tmp_path):
+        final = tmp_path / "clip.mp4"
+        final.write_bytes(b"range")
+        engine.fast_cut = MagicMock()
+        task = {"cut_mode": True, "cut_method": "direct_cut", "start_time": 10}
+        assert not engine._cut_downloaded_file(str(final), task, {})
+        engine.fast_cut.assert_not_called()
@@ -0,0 +1,112 @@
+"""
+Tests for dailymotion_api.py module.
+"""
+import os
+import threading
+import time
+import pytest
+
+from modules import dailymotion_api
+from modules.dailymotion_api import DailymotionDownloader, parse_collection
+from modules.fetcher import FastFetcher
+
+
+class FakeResponse:
+    def __init__(self, data, status=200):
+        self.status_code = status
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+def item(i):
+    return {"id": f"x{i}", "title": f"Video {i}", "duration": 65, "owner.screenname": "owner"}
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Routes Data API calls to a fake 250-video playlist and records them."""
+    calls = []
+
+    def request(method, url, params=None, headers=None, timeout=None, **kw):
+        calls.append((url, dict(params or {})))
+        if url.endswith("/playlist/xpl"):
+            return FakeResponse({"name": "My List", "owner.screenname": "owner"})
+        if url.endswith("/playlist/xpl/videos"):
+            page, limit = params["page"], params["limit"]
+            ids = range((page - 1) * limit, min(250, page * limit))
+            return FakeResponse({"list": [item(i) for i in ids], "has_more": page * limit < 250})
+        if url.endswith("/videos"):
+            return FakeResponse({"list": [item(i[1:]) for i in params["ids"].split(",") if i != "xhidden"]})
+        return FakeResponse({}, 404)
+    monkeypatch.setattr(dailymotion_api.http_client, "api_request", request)
+    return calls
+
+
+class TestParseCollection:
+    """Tests for playlist/channel URL detection."""
+
+    def test_urls(self):
+        assert parse_collection("https://www.dailymotion.com/playlist/x6hynp") == ("playlist", "x6hynp")
+        assert parse_collection("https://www.dailymotion.com/someuser") == ("user", "someuser")
+        assert parse_collection("https://www.dailymotion.com/video/x8abc") is None
+        assert parse_collection("https://dai.ly/x8abc") is None
+
+
+class TestListing:
+    """Tests for paginated listings and batched lookups."""
+
+    def test_playlist_paginated(self, api):
+        info, error = DailymotionDownloader().list_videos("https://www.dailymotion.com/playlist/xpl")
+        assert error is None and info["title"] == "My List"
+        assert len(info["entries"]) == 250 and info["entries"][0]["url"].endswith("/video/x0")
+        assert [c[1].get("page") for c in api if c[0].endswith("/videos")] == [1, 2, 3]
+
+    def test_batch_chunks_by_page_limit(self, api):
+        found = DailymotionDownloader().get_videos_batch([f"x{i}" for i in range(150)])
+        assert len(found) == 150 and len(api) == 2
+
+    def test_many_video_info_is_bounded(self, monkeypatch):
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def slow(self, url):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return {"id": url}, None
+        monkeypatch.setattr(DailymotionDownloader, "get_video_info", slow)
+        urls = [f"https://dai.ly/x{i}" for i in range(12)]
+        results = DailymotionDownloader().get_many_video_info(urls, max_workers=3)
+        assert len(results) == 12 and peak[0] <= 3
+
+
+class TestFetcherIntegration:
+    """Dailymotion lists through FastFetcher."""
+
+    def test_playlist_check_caches_entries(self, api, temp_dir):
+        fetcher = FastFetcher(cache_path=os.path.join(temp_dir, "cache.db"))
+        info, error = fetcher.fetch("https://www.dailymotion.com/playlist/xpl")
+        assert error is None and len(info["entries"]) == 250
+        assert fetcher._get_cached("https://dai.ly/x42")["title"] == "Video 42"
+
+    def test_batch_falls_back_to_metadata_for_unlisted(self, api, monkeypatch, temp_dir):
+        monkeypatch.setattr(DailymotionDownloader, "get_video_info",
+                            lambda self, url: ({"id": "xhidden", "title": "Hidden", "duration": 5}, None))
+        fetcher = FastFetcher(cache_path=os.path.join(temp_dir, "cache.db"))
+        found = fetcher._fetch_dailymotion_batch(["https://dai.ly/x1", "https://www.dailymotion.com/video/xhidden"])
+        assert found["https://dai.ly/x1"]["title"] == "Video 1"
+        assert found["https://www.dailymotion.com/video/xhidden"]["title"] == "Hidden"
+
+    def test_batch_fallback_tolerates_other_id_spelling(self, api, monkeypatch, temp_dir):
+        """Metadata answering with an id unlike the URL's still maps back to every spelling."""
+        monkeypatch.setattr(DailymotionDownloader, "get_video_info",
+                            lambda self, url: ({"id": "XHIDDEN-2", "title": "Hidden", "duration": 5}, None))
+        fetcher = FastFetcher(cache_path=os.path.join(temp_dir, "cache.db"))
+        urls = ["https://www.dailymotion.com/video/xhidden", "https://dai.ly/xhidden"]
+        found = fetcher._fetch_dailymotion_batch(urls)
+        assert all(found[u]["title"] == "Hidden" for u in urls)
@@ -0,0 +1,58 @@
+"""
+Tests for direct_media.py module.
+"""
+import pytest
+
+# Import the module under test
+from modules import direct_media
+from modules.direct_media import detect_media_kind, kind_from_content_type, guess_extension
+
+
+class TestDetectMediaKind:
+    """Tests for detect_media_kind (pattern only, no network)."""
+
+    def test_progressive_extensions(self):
+        """Plain media files are progressive."""
+        assert detect_media_kind("https://cdn.example.com/a/video.mp4") == direct_media.KIND_PROGRESSIVE
+        assert detect_media_kind("https://cdn.example.com/a/clip.WEBM?sig=abc") == direct_media.KIND_PROGRESSIVE
+
+    def test_hls_manifest(self):
+        """.m3u8 is HLS."""
+        assert detect_media_kind("https://cdn.example.com/live/master.m3u8?token=1") == direct_media.KIND_HLS
+
+    def test_dash_manifest(self):
+        """.mpd is DASH."""
+        assert detect_media_kind("https://cdn.example.com/vod/manifest.mpd") == direct_media.KIND_DASH
+
+    def test_query_mime_hint(self):
+        """CDN links with mime_type in query are progressive."""
+        url = "https://v26-web.douyinvod.com/abc/def/?a=6383&mime_type=video_mp4&qs=0"
+        assert detect_media_kind(url) == direct_media.KIND_PROGRESSIVE
+
+    def test_page_urls_are_not_media(self):
+        """Watch pages must go through extraction."""
+        assert detect_media_kind("https://www.youtube.com/watch?v=dQw4w9WgXcQ") is None
+        assert detect_media_kind("https://example.com/video.mp4.html") is None
+
+    def test_invalid_input(self):
+        """Empty and non-http input is not media."""
+        assert detect_media_kind("") is None
+        assert detect_media_kind(None) is None
+        assert detect_media_kind("file:///tmp/a.mp4") is None
+
+
+class TestContentType:
+    """Tests for kind_from_content_type and guess_extension."""
+
+    def test_content_types(self):
+        assert kind_from_content_type("video/mp4") == direct_media.KIND_PROGRESSIVE
+        assert kind_from_content_type("application/vnd.apple.mpegurl; charset=utf-8") == direct_media.KIND_HLS
+        assert kind_from_content_type("application/dash+xml") == direct_media.KIND_DASH
+        assert kind_from_content_type("text/html") is None
+        assert kind_from_content_type("") is None
+
+    def test_guess_extension(self):
+        assert guess_extension("https://x.com/a.webm") == "webm"
+        assert guess_extension("https://x.com/play?id=1", "audio/mpeg") == "mp3"
+        assert guess_extension("https://x.com/play?id=1") == "mp4"
+        assert guess_extension("https://x.com/a.m3u8", kind=direct_media.KIND_HLS) == "mp4"
@@ -0,0 +1,93 @@
+"""
+Tests for douyin_api.py module.
+"""
+import json
+from urllib.parse import quote
+
+import pytest
+
+from modules import douyin_api
+from modules.douyin_api import DouyinDownloader, parse_render_data, parse_router_data
+
+AWEME = "7300000000000000001"
+VIDEO_URL = f"https://www.douyin.com/video/{AWEME}"
+
+ROUTER = {"loaderData": {"video_(id)/page": {"videoInfoRes": {"item_list": [{
+    "aweme_id": AWEME,
+    "desc": "Hello #fyp",
+    "author": {"nickname": "Alice"},
+    "video": {"play_addr": {"url_list": ["https://aweme.snssdk.com/aweme/v1/playwm/?video_id=v0"]},
+              "cover": {"url_list": ["https://p3/cover.jpg"]}, "duration": 15300},
+}]}}}}
+ROUTER_HTML = f"<html><script>window._ROUTER_DATA = {json.dumps(ROUTER)}</script></html>"
+
+RENDER = {"app": {"videoDetail": {"awemeId": AWEME, "desc": "Web title", "authorInfo": {"nickname": "Bob"},
+                                  "video": {"playAddr": [{"src": "//v26-web.douyinvod.com/v.mp4"}],
+                                            "cover": "https://p3/web.jpg", "duration": 8000}}}}
+RENDER_HTML = f'<script id="RENDER_DATA" type="application/json">{quote(json.dumps(RENDER))}</script>'
+
+
+class FakeResponse:
+    def __init__(self, text, status=200):
+        self.text = text
+        self.status_code = status
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    """Serves share/web pages from a dict and records the requested URLs."""
+    served = {}
+    calls = []
+
+    def get(url, **kwargs):
+        calls.append(url)
+        return FakeResponse(served.get(url, "<html></html>"))
+    monkeypatch.setattr(douyin_api.http_client, "get", get)
+    return served, calls
+
+
+class TestParsers:
+    """Tests for embedded JSON extraction."""
+
+    def test_router_data(self):
+        info = parse_router_data(ROUTER_HTML)
+        assert info["id"] == AWEME and info["uploader"] == "Alice"
+        assert "/play/" in info["url"] and "/playwm/" not in info["url"]
+        assert info["duration"] == 15.3 and info["thumbnail"] == "https://p3/cover.jpg"
+
+    def test_render_data(self):
+        info = parse_render_data(RENDER_HTML)
+        assert info["url"] == "https://v26-web.douyinvod.com/v.mp4"
+        assert info["desc"] == "Web title" and info["duration"] == 8
+
+    def test_missing_or_broken(self):
+        assert parse_router_data("<html></html>") is None
+        assert parse_router_data("<script>window._ROUTER_DATA = {oops}</script>") is None
+        assert parse_render_data(None) is None
+
+
+class TestResolver:
+    """Tests for HTTP-first resolution."""
+
+    def test_http_without_browser(self, pages, monkeypatch):
+        served, calls = pages
+        served[douyin_api.SHARE_PAGE.format(AWEME)] = ROUTER_HTML
+        monkeypatch.setattr(DouyinDownloader, "_fetch_browser", lambda self, url: pytest.fail("browser launched"))
+        dd = DouyinDownloader()
+        info, error = dd.get_video_info(VIDEO_URL)
+        assert error is None and info["title"] == "Hello" and info["extractor_key"] == "Douyin (HTTP)"
+        assert dd.get_video_info(VIDEO_URL + "?previous_page=app")[0] == info
+        assert len(calls) == 1
+
+    def test_web_page_when_share_page_empty(self, pages):
+        served, calls = pages
+        served[douyin_api.WEB_PAGE.format(AWEME)] = RENDER_HTML
+        info, _ = DouyinDownloader().get_video_info(VIDEO_URL)
+        assert info["uploader"] == "Bob" and len(calls) == 2
+
+    def test_browser_fallback(self, pages, monkeypatch):
+        used = []
+        monkeypatch.setattr(DouyinDownloader, "_fetch_browser",
+                            lambda self, url: (used.append(url) or {"title": "B", "url": "https://cdn/b.mp4"}, None))
+        info, error = DouyinDownloader().get_video_info(VIDEO_URL)
+        assert error is None and info["title"] == "B" and used == [VIDEO_URL]
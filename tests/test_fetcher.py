@@ -15,7 +15,7 @@ class TestFastFetcherPlatformIdentification:
     @pytest.fixture
     def fetcher(self):
         """Create a FastFetcher instance."""
-        return FastFetcher(cache_size=10)
+        return FastFetcher(cache_size=10, persist_cache=False)
     
     # YouTube Tests
     def test_identify_youtube_watch_url(self, fetcher):
@@ -99,7 +99,7 @@ class TestFastFetcherYouTubeIdExtraction:
     
     @pytest.fixture
     def fetcher(self):
-        return FastFetcher(cache_size=10)
+        return FastFetcher(cache_size=10, persist_cache=False)
     
     def test_extract_id_from_watch_url(self, fetcher):
         """Extract ID from standard watch URL."""
@@ -133,8 +133,8 @@ class TestFastFetcherCache:
     """Tests for FastFetcher caching mechanism."""
     
     @pytest.fixture
-    def fetcher(self):
-        return FastFetcher(cache_size=3)
+    def fetcher(self, temp_dir):
+        return FastFetcher(cache_size=3, cache_path=os.path.join(temp_dir, "cache.db"))
     
     def test_cache_initially_empty(self, fetcher):
         """Cache should be empty on initialization."""
@@ -145,17 +145,17 @@ class TestFastFetcherCache:
         info = {"title": "Test Video", "id": "test123"}
         fetcher._add_to_cache("https://example.com/video1", info)
         assert len(fetcher._cache) == 1
-        assert "https://example.com/video1" in fetcher._cache
+        assert fetcher._get_cached("https://example.com/video1") is not None
     
     def test_cache_retrieval(self, fetcher):
         """Test retrieving cached items."""
         info = {"title": "Test Video", "id": "test123"}
         fetcher._add_to_cache("https://example.com/video1", info)
-        cached = fetcher._cache.get("https://example.com/video1")
+        cached = fetcher._get_cached("https://example.com/video1")
         assert cached == info
     
     def test_cache_size_limit(self, fetcher):
-        """Test cache respects size limit."""
+        """Test in-memory cache respects size limit."""
         for i in range(5):
             fetcher._add_to_cache(f"https://example.com/video{i}", {"id": f"test{i}"})
         # Cache size is 3, should not exceed
@@ -166,3 +166,219 @@ class TestFastFetcherCache:
         fetcher._add_to_cache("https://example.com/video1", {"id": "test1"})
         fetcher.clear_cache()
         assert len(fetcher._cache) == 0
+        assert fetcher._get_cached("https://example.com/video1") is None
+    
+    def test_youtube_spellings_share_entry(self, fetcher):
+        """Different URL spellings of one YouTube video hit the same entry."""
+        fetcher._add_to_cache("https://youtu.be/dQw4w9WgXcQ", {"title": "Rick"})
+        assert fetcher._get_cached("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=30")["title"] == "Rick"
+        assert fetcher._get_cached("https://youtube.com/shorts/dQw4w9WgXcQ")["title"] == "Rick"
+    
+    def test_canonical_keys(self, fetcher):
+        """Canonical keys are (platform, id)."""
+        assert fetcher._canonical_key("https://www.bilibili.com/video/BV1xx411c7mu?spm=1") == ("BILIBILI", "BV1xx411c7mu")
+        assert fetcher._canonical_key("https://www.bilibili.com/video/BV1xx411c7mu?p=3") == ("BILIBILI", "BV1xx411c7mu_p3")
+        assert fetcher._canonical_key("https://dai.ly/x8test") == ("DAILYMOTION", "x8test")
+        assert fetcher._canonical_key("https://www.youtube.com/playlist?list=PLabc") == ("YOUTUBE_PLAYLIST", "PLabc")
+    
+    def test_cache_survives_restart(self, temp_dir):
+        """Entries are persisted to disk and visible to a new instance."""
+        path = os.path.join(temp_dir, "cache.db")
+        FastFetcher(cache_path=path)._add_to_cache("https://youtu.be/dQw4w9WgXcQ", {"title": "Persisted", "formats": [1, 2]})
+        cached = FastFetcher(cache_path=path)._get_cached("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        assert cached["title"] == "Persisted"
+        assert "formats" not in cached
+    
+    def test_concurrent_fetches_single_flight(self, fetcher, monkeypatch):
+        """Concurrent fetches of the same video run the tiers once."""
+        import threading
+        import time
+        calls = []
+        
+        def slow_fetch(url, platform, timeout):
+            calls.append(url)
+            time.sleep(0.2)
+            return {"title": "Once"}, None
+        
+        monkeypatch.setattr(fetcher, "_fetch_uncached", slow_fetch)
+        results = []
+        threads = [threading.Thread(target=lambda u=u: results.append(fetcher.fetch(u)))
+                   for u in ("https://youtu.be/dQw4w9WgXcQ", "https://www.youtube.com/watch?v=dQw4w9WgXcQ")]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        assert len(calls) == 1
+        assert all(info["title"] == "Once" for info, _ in results)
+
+
+class TestFastFetcherHedging:
+    """Tests for hedged tier racing in FastFetcher.fetch."""
+    
+    @pytest.fixture
+    def fetcher(self):
+        return FastFetcher(cache_size=10, persist_cache=False)
+    
+    def test_slow_tier1_is_hedged_by_tier2(self, fetcher, monkeypatch):
+        """A hanging Tier 1 should not delay the Tier 2 result."""
+        import time
+        monkeypatch.setattr(fetcher, "_hedge_delay", lambda platform, tier_no=1: 0.05)
+        monkeypatch.setattr(fetcher, "_fetch_youtube_oembed", lambda url, timeout=10: (time.sleep(2), (None, "late"))[1])
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_flat", lambda url, timeout=30: ({"title": "From Tier 2"}, None))
+        start = time.monotonic()
+        info, error = fetcher.fetch("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        assert info["title"] == "From Tier 2"
+        assert error is None
+        assert time.monotonic() - start < 1.0
+    
+    def test_tier1_failure_promotes_next_tier(self, fetcher, monkeypatch):
+        """A failing Tier 1 should start Tier 2 without waiting for the hedge delay."""
+        monkeypatch.setattr(fetcher, "_hedge_delay", lambda platform, tier_no=1: 10)
+        monkeypatch.setattr(fetcher, "_fetch_youtube_oembed", lambda url, timeout=10: (None, "HTTP 404"))
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_flat", lambda url, timeout=30: ({"title": "Flat"}, None))
+        info, error = fetcher.fetch("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        assert info["title"] == "Flat"
+    
+    def test_hedge_follows_routed_order(self, fetcher, monkeypatch):
+        """With Tier 2 routed first, a slow Tier 2 is still hedged (by Tier 1)."""
+        import time
+        monkeypatch.setattr(fetcher._router, "order", lambda domain, items, key: list(reversed(items)))
+        monkeypatch.setattr(fetcher, "_hedge_delay", lambda platform, tier_no=1: 0.05)
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_flat", lambda url, timeout=30: (time.sleep(2), (None, "late"))[1])
+        monkeypatch.setattr(fetcher, "_fetch_youtube_oembed", lambda url, timeout=10: ({"title": "From Tier 1"}, None))
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_full", lambda url, timeout=60: pytest.fail("Tier 3 raced"))
+        start = time.monotonic()
+        info, _ = fetcher.fetch("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        assert info["title"] == "From Tier 1"
+        assert time.monotonic() - start < 1.0
+    
+    def test_losing_tier_is_cancelled(self, fetcher, monkeypatch):
+        """Once Tier 1 wins, the racing Tier 2 sees the cancel and is not recorded as a failure."""
+        import threading
+        import time
+        from modules import fetcher as fetcher_module
+        stopped = threading.Event()
+
+        def slow_flat(url, timeout=30):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                if fetcher_module._tier_cancelled():
+                    stopped.set()
+                    return None, "Cancelled"
+                time.sleep(0.01)
+            return {"title": "Too late"}, None
+        monkeypatch.setattr(fetcher, "_hedge_delay", lambda platform, tier_no=1: 0.05)
+        monkeypatch.setattr(fetcher, "_fetch_youtube_oembed", lambda url, timeout=10: (time.sleep(0.3), ({"title": "T1"}, None))[1])
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_flat", slow_flat)
+        before = fetcher._router.stats("youtube.com", "fetch:yt-dlp flat")
+        info, _ = fetcher.fetch("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        assert info["title"] == "T1"
+        assert stopped.wait(2)
+        time.sleep(0.05)
+        assert fetcher._router.stats("youtube.com", "fetch:yt-dlp flat") == before
+        assert ("YOUTUBE", 2) not in fetcher.get_latency_stats()
+
+    def test_cancelled_ytdlp_stops_before_next_request(self, monkeypatch):
+        """yt-dlp instances made for a tier refuse new requests once the race is decided."""
+        import threading
+        import yt_dlp
+        from modules import fetcher as fetcher_module
+        event = threading.Event()
+        monkeypatch.setattr(fetcher_module._tier_state, "cancel", event, raising=False)
+        ydl = fetcher_module._new_ydl(yt_dlp, {"quiet": True})
+        event.set()
+        with pytest.raises(yt_dlp.utils.DownloadCancelled):
+            ydl.urlopen("https://example.com/")
+    
+    def test_all_tiers_fail_returns_last_error(self, fetcher, monkeypatch):
+        """When every tier fails, fetch returns (None, error)."""
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_flat", lambda url, timeout=30: (None, "flat failed"))
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_full", lambda url, timeout=60: (None, "full failed"))
+        info, error = fetcher.fetch("https://example.com/video")
+        assert info is None
+        assert error == "full failed"
+    
+    def test_latency_is_recorded(self, fetcher, monkeypatch):
+        """Each finished tier should record a latency sample."""
+        monkeypatch.setattr(fetcher, "_fetch_bilibili_api", lambda url, timeout=10: ({"title": "B"}, None))
+        fetcher.fetch("https://www.bilibili.com/video/BV1xx411c7mu")
+        stats = fetcher.get_latency_stats()
+        assert ("BILIBILI", 1) in stats
+        assert stats[("BILIBILI", 1)][1] == 1.0
+    
+    def test_hedge_delay_adapts_to_latency(self, fetcher):
+        """Hedge delay follows recorded Tier 1 latency within bounds."""
+        assert fetcher._hedge_delay("YOUTUBE") == FastFetcher.HEDGE_DELAY_DEFAULT
+        for _ in range(10):
+            fetcher._record_latency("YOUTUBE", 1, 0.5, True)
+        assert fetcher._hedge_delay("YOUTUBE") == pytest.approx(0.6)
+        for _ in range(10):
+            fetcher._record_latency("YOUTUBE", 1, 30.0, True)
+        assert fetcher._hedge_delay("YOUTUBE") == FastFetcher.HEDGE_DELAY_MAX
+
+
+class TestFastFetcherRouting:
+    """Tests for learned per-domain tier order."""
+    
+    @pytest.fixture
+    def fetcher(self):
+        return FastFetcher(cache_size=10, hedged=False, persist_cache=False)
+    
+    def test_dead_tier_skipped(self, fetcher, monkeypatch):
+        """A tier that keeps failing for a domain is not tried again."""
+        calls = []
+        monkeypatch.setattr(fetcher, "_fetch_youtube_oembed", lambda url, timeout=10: calls.append("oembed") or (None, "403"))
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_flat", lambda url, timeout=30: ({"title": "Flat"}, None))
+        for i in range(6):
+            fetcher.fetch(f"https://www.youtube.com/watch?v=dQw4w9WgXc{i}")
+        assert 0 < calls.count("oembed") < 6
+    
+    def test_full_extraction_stays_last(self, fetcher, monkeypatch):
+        """Routing never puts Tier 3 ahead of a live Tier 1/2."""
+        monkeypatch.setattr(fetcher._router, "order", lambda domain, items, key: list(reversed(items)))
+        tiers = fetcher._build_tiers("https://www.youtube.com/watch?v=dQw4w9WgXcQ", "YOUTUBE", 10)
+        assert [t[0] for t in fetcher._route_tiers("https://www.youtube.com/watch?v=dQw4w9WgXcQ", tiers)] == [2, 1, 3]
+    
+    def test_outcomes_recorded_per_domain(self, fetcher, monkeypatch):
+        monkeypatch.setattr(fetcher, "_fetch_ytdlp_flat", lambda url, timeout=30: ({"title": "Flat"}, None))
+        fetcher.fetch("https://vimeo.com/123")
+        assert fetcher._router.stats("vimeo.com", "fetch:yt-dlp flat")["n"] == 1
+
+
+class TestFastFetcherFetchMany:
+    """Tests for FastFetcher.fetch_many bulk lookups."""
+    
+    @pytest.fixture
+    def fetcher(self):
+        return FastFetcher(cache_size=50, persist_cache=False)
+    
+    def test_results_streamed_and_deduplicated(self, fetcher, monkeypatch):
+        """Each distinct URL is fetched once and reported through on_result."""
+        fetched = []
+        monkeypatch.setattr(fetcher, "fetch", lambda url, timeout=10: (fetched.append(url), ({"title": url[-3:]}, None))[1])
+        streamed = []
+        urls = ["https://example.com/a01", "https://example.com/a02", "https://example.com/a01", ""]
+        results = fetcher.fetch_many(urls, on_result=lambda u, i, e: streamed.append(u))
+        assert sorted(fetched) == ["https://example.com/a01", "https://example.com/a02"]
+        assert sorted(streamed) == sorted(fetched)
+        assert results["https://example.com/a02"][0]["title"] == "a02"
+    
+    def test_cache_hits_skip_fetch(self, fetcher, monkeypatch):
+        """Cached videos are answered without a fetch."""
+        fetcher._add_to_cache("https://youtu.be/dQw4w9WgXcQ", {"title": "Cached"})
+        monkeypatch.setattr(fetcher, "fetch", lambda url, timeout=10: pytest.fail("should not fetch"))
+        results = fetcher.fetch_many(["https://www.youtube.com/watch?v=dQw4w9WgXcQ"])
+        assert results["https://www.youtube.com/watch?v=dQw4w9WgXcQ"][0]["title"] == "Cached"
+    
+    def test_batch_platform_uses_batch_endpoint(self, fetcher, monkeypatch):
+        """Dailymotion ids are resolved in one batch; misses fall back to fetch()."""
+        batches = []
+        
+        def fake_batch(urls, timeout=10):
+            batches.append(list(urls))
+            return {u: {"title": "DM"} for u in urls if "x1" in u}
+        
+        fetcher._batch_fetchers["DAILYMOTION"] = fake_batch
+        monkeypatch.setattr(fetcher, "fetch", lambda url, timeout=10: (None, "missing"))
+        results = fetcher.fetch_many(["https://dai.ly/x1", "https://www.dailymotion.com/video/x2"])
+        assert len(batches) == 1
+        assert results["https://dai.ly/x1"][0]["title"] == "DM"
+        assert results["https://www.dailymotion.com/video/x2"] == (None, "missing")
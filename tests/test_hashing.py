@@ -0,0 +1,84 @@
+"""
+Tests for hashing.py module.
+"""
+import os
+import hashlib
+
+from modules import hashing, updater
+from modules.hashing import StreamHasher
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+        self.headers = {"Content-Length": str(len(body))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *a):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=65536):
+        for i in range(0, len(self.body), 3):
+            yield self.body[i:i + 3]
+
+
+class TestStreamHasher:
+    """Tests for the inline hasher."""
+
+    def test_matches_one_shot_hash(self):
+        hasher = StreamHasher()
+        for chunk in (b"abc", b"", b"defgh"):
+            hasher.update(chunk)
+        assert hasher.hexdigest() == hashlib.blake2b(b"abcdefgh", digest_size=32).hexdigest()
+        assert hasher.value().startswith("blake2b-256:") and hasher.count == 8
+
+    def test_resync_after_partial_write(self, temp_dir):
+        path = os.path.join(temp_dir, "part.bin")
+        with open(path, "wb") as f:
+            f.write(b"abcdef")
+        hasher = StreamHasher()
+        hasher.update(b"abc")  # the next chunk hit the disk but never reached the hasher
+        hasher.resync(path)
+        hasher.update(b"gh")
+        assert hasher.hexdigest() == hashlib.blake2b(b"abcdefgh", digest_size=32).hexdigest()
+
+    def test_verify_and_sidecar(self, temp_dir):
+        path = os.path.join(temp_dir, "video.mp4")
+        with open(path, "wb") as f:
+            f.write(b"media")
+        value = hashing.file_hash(path)
+        assert hashing.verify(path, value)
+        sidecar = hashing.write_sidecar(path, value)
+        with open(sidecar, encoding="utf-8") as f:
+            assert f.read() == f"{value.split(':')[1]}  video.mp4\n"
+        with open(path, "ab") as f:
+            f.write(b"!")
+        assert not hashing.verify(path, value)
+        assert hashing.write_sidecar(path, "sha256:00") is None
+
+
+class TestUpdaterDigest:
+    """The updater checks the published asset digest while downloading."""
+
+    def _checker(self, monkeypatch, body, digest):
+        url = "https://github.com/o/r/releases/download/v9/app-portable.zip"
+        checker = updater.UpdateChecker()
+        checker.latest_release = {"assets": [{"browser_download_url": url, "digest": digest}]}
+        monkeypatch.setattr(updater.http_client, "get", lambda *a, **k: FakeResponse(body))
+        return checker, url
+
+    def test_matching_digest(self, monkeypatch):
+        body = b"zip-bytes"
+        checker, url = self._checker(monkeypatch, body, "sha256:" + hashlib.sha256(body).hexdigest())
+        path = checker.download_update(url)
+        assert path and os.path.exists(path)
+        os.remove(path)
+
+    def test_mismatch_discards_file(self, monkeypatch):
+        checker, url = self._checker(monkeypatch, b"tampered", "sha256:" + "0" * 64)
+        assert checker.download_update(url) is None
@@ -0,0 +1,150 @@
+"""
+Tests for hls_downloader.py module.
+"""
+import os
+import sys
+import pytest
+
+from modules import hls_downloader
+from modules.hls_downloader import has_relative_uris, parse_playlist, select_variant, HLSDownloader, HLSUnsupported
+
+MASTER = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360,CODECS="avc1.4d401e,mp4a.40.2"
+360/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2500000,RESOLUTION=1280x720
+720/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=5000000,RESOLUTION=1920x1080
+1080/index.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-TARGETDURATION:4
+#EXT-X-MEDIA-SEQUENCE:7
+#EXTINF:4.0,
+seg0.ts
+#EXT-X-KEY:METHOD=AES-128,URI="key.bin",IV=0x000102030405060708090a0b0c0d0e0f
+#EXTINF:4.0,
+https://cdn2.example.com/seg1.ts
+#EXT-X-ENDLIST
+"""
+
+
+class TestParsePlaylist:
+    """Tests for parse_playlist and select_variant."""
+
+    def test_master_variants(self):
+        p = parse_playlist(MASTER, "https://cdn.example.com/v/master.m3u8")
+        assert p["is_master"]
+        assert [v["height"] for v in p["variants"]] == [360, 720, 1080]
+        assert p["variants"][1]["url"] == "https://cdn.example.com/v/720/index.m3u8"
+
+    def test_select_variant_cap(self):
+        variants = parse_playlist(MASTER, "https://x/")["variants"]
+        assert select_variant(variants, 720)["height"] == 720
+        assert select_variant(variants, 2160)["height"] == 1080
+        assert select_variant(variants, 240)["height"] == 360
+
+    def test_media_segments_keys_and_sequence(self):
+        p = parse_playlist(MEDIA, "https://cdn.example.com/v/index.m3u8")
+        assert p["endlist"] and not p["is_master"]
+        segs = p["segments"]
+        assert [s["seq"] for s in segs] == [7, 8]
+        assert segs[0]["url"] == "https://cdn.example.com/v/seg0.ts"
+        assert segs[0]["key"] is None
+        assert segs[1]["key"]["uri"] == "https://cdn.example.com/v/key.bin"
+
+    def test_byterange(self):
+        text = "#EXTM3U\n#EXTINF:2,\n#EXT-X-BYTERANGE:100@0\nall.ts\n#EXTINF:2,\n#EXT-X-BYTERANGE:50\nall.ts\n#EXT-X-ENDLIST\n"
+        segs = parse_playlist(text, "https://x/")["segments"]
+        assert segs[0]["byterange"] == (0, 100)
+        assert segs[1]["byterange"] == (100, 50)
+
+    def test_sample_aes_unsupported(self):
+        with pytest.raises(HLSUnsupported):
+            parse_playlist('#EXTM3U\n#EXT-X-KEY:METHOD=SAMPLE-AES,URI="k"\n#EXTINF:1,\na.ts\n', "https://x/")
+
+
+    def test_relative_uri_detection(self):
+        assert has_relative_uris(MEDIA)
+        absolute = "#EXTM3U\n#EXT-X-MAP:URI=\"https://c/init.mp4\"\n#EXTINF:2,\nhttps://c/a.ts\n#EXT-X-ENDLIST\n"
+        assert not has_relative_uris(absolute)
+        assert has_relative_uris(absolute.replace("https://c/init.mp4", "init.mp4"))
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="fake muxer is a POSIX script")
+class TestDownload:
+    """End-to-end with fake network and a fake FFmpeg that copies stdin to the output."""
+
+    @pytest.fixture
+    def fake_ffmpeg(self, temp_dir):
+        path = os.path.join(temp_dir, "ffmpeg")
+        with open(path, "w") as f:
+            f.write(f"#!{sys.executable}\nimport sys, shutil\n"
+                    "shutil.copyfileobj(sys.stdin.buffer, open(sys.argv[-1], 'wb'))\n")
+        os.chmod(path, 0o755)
+        return path
+
+    def test_segments_written_in_order_and_decrypted(self, fake_ffmpeg, temp_dir, monkeypatch):
+        from yt_dlp.aes import aes_cbc_encrypt_bytes
+        key = b"k" * 16
+        iv = bytes(range(16))
+        plain1 = b"SEGMENT-ONE-DATA"
+        cipher1 = aes_cbc_encrypt_bytes(plain1 + bytes([16] * 16), key, iv)  # PKCS7, full pad block
+        bodies = {
+            "https://cdn.example.com/v/index.m3u8": MEDIA.encode(),
+            "https://cdn.example.com/v/seg0.ts": b"SEGMENT-ZERO",
+            "https://cdn2.example.com/seg1.ts": cipher1,
+            "https://cdn.example.com/v/key.bin": key,
+        }
+
+        class Resp:
+            def __init__(self, body): self.content = body
+            def raise_for_status(self): pass
+
+        monkeypatch.setattr(hls_downloader.http_client, "get", lambda url, **kw: Resp(bodies[url]))
+        out = os.path.join(temp_dir, "out.ts")
+        progress = []
+        ok, msg = HLSDownloader(fake_ffmpeg, max_workers=4).download(
+            "https://cdn.example.com/v/index.m3u8", out, progress_callback=progress.append)
+        assert ok, msg
+        with open(out, "rb") as f:
+            assert f.read() == b"SEGMENT-ZERO" + plain1
+        assert progress and progress[-1] > 90
+
+    def test_live_playlist_rejected(self, fake_ffmpeg, temp_dir):
+        live = "#EXTM3U\n#EXTINF:4,\nseg0.ts\n"
+        with pytest.raises(HLSUnsupported):
+            HLSDownloader(fake_ffmpeg).download("https://x/live.m3u8", os.path.join(temp_dir, "o.ts"), text=live)
+
+    def test_engine_cancel_kills_muxer(self, fake_ffmpeg, temp_dir, monkeypatch):
+        """The muxer is registered as the engine's current process, so cancel() stops it at once."""
+        import threading
+        import time
+        from modules.core import DownloaderEngine
+        release = threading.Event()
+
+        class Resp:
+            content = b"SEGMENT"
+            def raise_for_status(self): pass
+
+        def get(url, **kw):
+            if url.endswith("seg1.ts"):
+                release.wait(5)  # a slow segment
+            return Resp()
+        monkeypatch.setattr(hls_downloader.http_client, "get", get)
+        engine = DownloaderEngine(ffmpeg_path=fake_ffmpeg)
+        result = []
+        worker = threading.Thread(target=lambda: result.append(engine._download_hls_native(
+            "https://cdn.example.com/v/index.m3u8", os.path.join(temp_dir, "out.ts"), text=MEDIA.replace(
+                '#EXT-X-KEY:METHOD=AES-128,URI="key.bin",IV=0x000102030405060708090a0b0c0d0e0f\n', ""))))
+        worker.start()
+        deadline = time.monotonic() + 5
+        while engine.current_process is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        proc = engine.current_process
+        assert proc is not None
+        engine.cancel()
+        assert proc.wait(2) is not None
+        release.set()
+        worker.join(5)
+        assert result[0][0] is False and engine.current_process is None
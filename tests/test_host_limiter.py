@@ -0,0 +1,83 @@
+"""
+Tests for host_limiter.py module.
+"""
+import threading
+import pytest
+
+from modules import host_limiter
+from modules.host_limiter import HostLimiter, throttle_status
+
+
+class TestAIMD:
+    """Tests for additive increase / multiplicative decrease."""
+
+    def test_grows_slowly_on_success(self):
+        lim = HostLimiter("a.example", initial=4)
+        for _ in range(4):
+            lim.on_success()
+        assert 4.9 < lim.limit < 5.1
+
+    def test_halves_and_pauses_on_throttle(self):
+        lim = HostLimiter("a.example", initial=8)
+        delay = lim.observe(429)
+        assert lim.limit == 4
+        assert delay == pytest.approx(host_limiter.BASE_BACKOFF)
+        assert lim.backoff_remaining() > 0
+
+    def test_one_decrease_per_event(self):
+        """Throttles from other in-flight requests during the pause do not halve again."""
+        lim = HostLimiter("upos.bilivideo.com", initial=8)
+        lim.observe(403)
+        lim.observe(403)
+        lim.observe(412)
+        assert lim.limit == 4
+
+    def test_retry_after_honoured_and_capped(self):
+        lim = HostLimiter("a.example")
+        assert lim.observe(429, "7") == pytest.approx(7)
+        lim2 = HostLimiter("b.example")
+        assert lim2.observe(429, "99999") == host_limiter.MAX_RETRY_AFTER
+
+    def test_never_below_min(self):
+        lim = HostLimiter("a.example", initial=1)
+        lim.on_throttled(retry_after=0)
+        assert lim.limit == host_limiter.MIN_LIMIT
+
+    def test_success_ignored_while_backing_off(self):
+        lim = HostLimiter("a.example", initial=4)
+        lim.on_throttled(retry_after=5)
+        lim.on_success()
+        assert lim.limit == 2
+
+
+class TestSlots:
+    """Tests for the concurrency gate."""
+
+    def test_blocks_at_limit(self):
+        lim = HostLimiter("a.example", initial=1)
+        assert lim.acquire()
+        got = []
+        t = threading.Thread(target=lambda: got.append(lim.acquire()))
+        t.start()
+        t.join(0.2)
+        assert not got
+        lim.release()
+        t.join(2)
+        assert got == [True]
+
+    def test_acquire_cancelled(self):
+        lim = HostLimiter("a.example", initial=1)
+        lim.acquire()
+        assert lim.acquire(cancel_check=lambda: True) is False
+
+
+class TestHelpers:
+    """Tests for module helpers."""
+
+    def test_shared_per_host(self):
+        assert host_limiter.get("https://api.x-test.com/a") is host_limiter.get("https://API.x-test.com/b")
+
+    def test_throttle_status(self):
+        assert throttle_status("HTTP Error 429: Too Many Requests") == 429
+        assert throttle_status("ERROR: [bilibili] HTTP Error 412: Precondition Failed") == 412
+        assert throttle_status("video id 14035 not found") is None
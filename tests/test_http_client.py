@@ -0,0 +1,104 @@
+"""
+Tests for http_client.py module.
+"""
+import pytest
+from unittest.mock import MagicMock
+
+from modules import http_client
+
+
+class TestSharedSession:
+    """Tests for the process-wide session."""
+
+    def test_session_is_shared(self):
+        """Every caller gets the same pooled session."""
+        assert http_client.get_session() is http_client.get_session()
+
+    def test_adapter_pool_and_retries(self):
+        """HTTPS adapter is pooled and retries gateway errors on idempotent methods."""
+        adapter = http_client.get_session().get_adapter("https://api.bilibili.com/")
+        assert adapter._pool_maxsize == http_client.POOL_SIZE
+        assert 503 in adapter.max_retries.status_forcelist
+        assert "POST" not in adapter.max_retries.allowed_methods
+
+    def test_session_does_not_keep_cookies(self):
+        """Server cookies are rejected so one platform's login never leaks into another."""
+        import requests
+        from requests.cookies import extract_cookies_to_jar
+        session = http_client.get_session()
+        req = requests.Request("GET", "https://www.example.com/").prepare()
+        raw = MagicMock()
+        raw._original_response.msg.get_all.return_value = ["sid=abc; Path=/"]
+        extract_cookies_to_jar(session.cookies, req, raw)
+        assert len(session.cookies) == 0
+
+
+class TestApiRequest:
+    """Tests for api_request routing."""
+
+    def test_http1_when_http2_disabled(self, monkeypatch):
+        """Without http2 the shared requests session is used."""
+        calls = []
+        monkeypatch.setattr(http_client, "request", lambda method, url, **kw: calls.append((method, url, kw)) or "resp")
+        http_client.configure(http2=False)
+        assert http_client.api_request("GET", "https://x.com/api", params={"a": 1}) == "resp"
+        assert calls[0][0] == "GET"
+        assert calls[0][2]["params"] == {"a": 1}
+
+    def test_http2_falls_back_when_unavailable(self, monkeypatch):
+        """Enabling http2 without httpx installed still works over HTTP/1.1."""
+        monkeypatch.setattr(http_client, "_get_h2_client", lambda: None)
+        monkeypatch.setattr(http_client, "request", lambda method, url, **kw: "resp")
+        http_client.configure(http2=True)
+        try:
+            assert http_client.api_request("GET", "https://x.com/api") == "resp"
+        finally:
+            http_client.configure(http2=False)
+
+
+class TestHostLimiting:
+    """Tests for the host_limiter integration."""
+
+    def test_throttled_response_reported(self, monkeypatch):
+        """A 429 halves the host's concurrency limit."""
+        from modules import host_limiter
+        resp = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        monkeypatch.setattr(http_client, "get_session", lambda: MagicMock(request=lambda *a, **kw: resp))
+        lim = host_limiter.get("https://limited.example.com/")
+        before = lim.limit
+        assert http_client.get("https://limited.example.com/api") is resp
+        assert lim.limit == max(host_limiter.MIN_LIMIT, before / 2)
+        assert lim.in_flight == 0
+
+    def test_streamed_response_holds_slot_until_closed(self, monkeypatch):
+        """A streamed download occupies its host slot for the whole body, not just the headers."""
+        from modules import host_limiter
+
+        class Resp:
+            """Like requests.Response: leaving the with-block calls close()."""
+            status_code, headers = 200, {}
+            def close(self): pass
+            def __enter__(self): return self
+            def __exit__(self, *a): self.close()
+        resp = Resp()
+        monkeypatch.setattr(http_client, "get_session", lambda: MagicMock(request=lambda *a, **kw: resp))
+        lim = host_limiter.get("https://stream.example.com/")
+        with http_client.get("https://stream.example.com/v.mp4", stream=True):
+            assert lim.in_flight == 1
+        assert lim.in_flight == 0
+        resp.close()  # closing twice releases once
+        assert lim.in_flight == 0
+
+    def test_403_only_counts_on_known_hosts(self, monkeypatch):
+        """Geo-block/expired-link 403s and probe 403s do not shrink the limit."""
+        from modules import host_limiter
+        resp = MagicMock(status_code=403, headers={})
+        monkeypatch.setattr(http_client, "get_session", lambda: MagicMock(request=lambda *a, **kw: resp))
+        other = host_limiter.get("https://geo.example.com/")
+        bili = host_limiter.get("https://cn-gd.bilivideo.com/")
+        before_other, before_bili = other.limit, bili.limit
+        http_client.get("https://geo.example.com/v")
+        http_client.head("https://cn-gd.bilivideo.com/probe")
+        assert other.limit == before_other and bili.limit == before_bili
+        http_client.get("https://cn-gd.bilivideo.com/v.m4s")
+        assert bili.limit < before_bili
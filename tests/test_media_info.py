@@ -0,0 +1,76 @@
+"""
+Tests for media_info.py module.
+"""
+import os
+import pytest
+
+from modules.media_info import MediaInfo
+from modules.fetcher import FastFetcher
+
+RAW = {
+    "id": "dQw4w9WgXcQ",
+    "title": "Rick",
+    "uploader": "RickAstleyVEVO",
+    "duration": 212,
+    "duration_string": "3:32",
+    "_fetcher_tier": 3,
+    "formats": [{"format_id": str(i), "url": "https://x/" + "a" * 500} for i in range(50)],
+    "http_headers": {"User-Agent": "x"},
+    "subtitles": {"en": [{"ext": "vtt", "url": "https://s/en", "name": "English"}]},
+    "automatic_captions": {f"l{i}": [{"ext": "vtt", "url": "https://s/" + "b" * 300}] for i in range(120)},
+}
+
+
+class TestMediaInfo:
+    """Tests for the compact record."""
+
+    def test_only_used_fields_kept(self):
+        info = MediaInfo.from_info(RAW)
+        assert info["title"] == "Rick" and info.get("_fetcher_tier") == 3
+        assert "formats" not in info and info.get("http_headers") is None
+        assert not hasattr(info, "__dict__")
+
+    def test_subtitles_reduced_to_names(self):
+        info = MediaInfo.from_info(RAW)
+        assert info.get("subtitles") == {"en": [{"name": "English"}]}
+        assert len(info.get("automatic_captions")) == 120
+        assert "url" not in str(info.to_dict())
+
+    def test_dict_style_defaults(self):
+        info = MediaInfo.from_info({"title": "T"})
+        assert info.get("uploader", "Unknown") == "Unknown"
+        assert info.get("subtitles", {}) == {}
+        assert "entries" not in info
+        with pytest.raises(KeyError):
+            info["thumbnail"]
+
+    def test_playlist_entries_compacted(self):
+        info = MediaInfo.from_info({"title": "PL", "entries": [RAW, None, {"url": "u2", "title": "Two"}]})
+        entries = info["entries"]
+        assert [e.get("title") for e in entries] == ["Rick", "Two"]
+        assert all(isinstance(e, MediaInfo) for e in entries)
+
+    def test_full_uses_loader(self):
+        calls = []
+        info = MediaInfo.from_info({"title": "T", "webpage_url": "https://youtu.be/x"},
+                                   loader=lambda url: (calls.append(url) or RAW, None))
+        assert info.full()["formats"]
+        assert calls == ["https://youtu.be/x"]
+        assert MediaInfo.from_info({"title": "T"}).full() is None
+
+
+class TestFetcherCompaction:
+    """FastFetcher stores and returns compact records."""
+
+    def test_cache_holds_compact_record(self, temp_dir):
+        fetcher = FastFetcher(cache_path=os.path.join(temp_dir, "cache.db"))
+        fetcher._add_to_cache("https://youtu.be/dQw4w9WgXcQ", RAW)
+        cached = fetcher._get_cached("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        assert isinstance(cached, MediaInfo) and "formats" not in cached
+
+    def test_disk_entries_come_back_compact(self, temp_dir):
+        path = os.path.join(temp_dir, "cache.db")
+        FastFetcher(cache_path=path)._add_to_cache("https://youtu.be/dQw4w9WgXcQ", RAW)
+        cached = FastFetcher(cache_path=path)._get_cached("https://youtu.be/dQw4w9WgXcQ")
+        assert isinstance(cached, MediaInfo)
+        assert cached.get("subtitles") == {"en": [{"name": "English"}]}
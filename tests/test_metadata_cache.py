@@ -0,0 +1,26 @@
+"""
+Tests for metadata_cache.py module.
+"""
+import os
+
+from modules.metadata_cache import MetadataCache
+
+
+class TestDiskStore:
+    """Tests for what survives a restart."""
+
+    def _restart(self, temp_dir):
+        return MetadataCache(db_path=os.path.join(temp_dir, "meta.db"))
+
+    def test_signed_stream_url_not_persisted(self, temp_dir):
+        """A TikTok CDN link stays in memory only; the rest of the info survives."""
+        cache = self._restart(temp_dir)
+        key = ("TIKTOK", "7300000000000000001")
+        cache.put(key, {"title": "Clip", "url": "https://v16.tiktokcdn.com/v.mp4?x-expires=1"})
+        assert cache.get(key)["url"].startswith("https://v16")
+        assert self._restart(temp_dir).get(key) == {"title": "Clip"}
+
+    def test_other_platforms_keep_url(self, temp_dir):
+        key = ("YOUTUBE", "dQw4w9WgXcQ")
+        self._restart(temp_dir).put(key, {"title": "Video", "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"})
+        assert self._restart(temp_dir).get(key)["url"] == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
@@ -0,0 +1,129 @@
+"""
+Tests for mirror_selector.py module.
+"""
+import os
+import pytest
+
+from modules import hashing, mirror_selector
+from modules.mirror_selector import MirrorSelector, host_of
+
+
+class FakeResponse:
+    """Minimal streamed response for http_client.get."""
+
+    def __init__(self, body, status=200, headers=None, fail_after=None):
+        self.body = body
+        self.status_code = status
+        self.headers = headers or {"Content-Length": str(len(body))}
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *a):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size=65536):
+        sent = 0
+        for i in range(0, len(self.body), 4):
+            if self.fail_after is not None and sent >= self.fail_after:
+                raise ConnectionError("reset")
+            sent += 4
+            yield self.body[i:i + 4]
+
+
+@pytest.fixture
+def selector(temp_dir):
+    return MirrorSelector(stats_path=os.path.join(temp_dir, "cdn_hosts.json"))
+
+
+class TestRanking:
+    """Tests for history-based ranking."""
+
+    def test_single_url_not_probed(self, selector, monkeypatch):
+        """One candidate needs no probe."""
+        monkeypatch.setattr(selector, "_probe", lambda u, h: pytest.fail("probed"))
+        assert selector.rank(["https://a.bilivideo.com/x.m4s"]) == ["https://a.bilivideo.com/x.m4s"]
+
+    def test_history_order_and_failures_last(self, selector):
+        """Faster hosts first, unknown hosts next, failing hosts last."""
+        selector.record("fast.example", 10_000_000, 1)
+        selector.record("slow.example", 100_000, 1)
+        selector.record_failure("bad.example")
+        urls = ["https://bad.example/v", "https://new.example/v", "https://slow.example/v", "https://fast.example/v"]
+        assert [host_of(u) for u in selector.rank(urls, probe=False)] == \
+            ["fast.example", "slow.example", "new.example", "bad.example"]
+
+    def test_history_persisted(self, selector, temp_dir):
+        """Host stats survive a restart."""
+        selector.record("fast.example", 1_000_000, 1)
+        selector.save()
+        again = MirrorSelector(stats_path=selector.stats_path)
+        assert again.expected_speed("fast.example") == pytest.approx(1_000_000)
+
+    def test_concurrent_saves_leave_valid_file(self, selector):
+        """Parallel saves replace the file whole; no temp file is left behind."""
+        import threading
+        for i in range(200):
+            selector.record(f"cdn{i}.example", 1_000_000, 1)
+        threads = [threading.Thread(target=selector.save) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        again = MirrorSelector(stats_path=selector.stats_path)
+        assert again.expected_speed("cdn199.example") == pytest.approx(1_000_000)
+        assert not os.path.exists(selector.stats_path + ".tmp")
+
+    def test_probe_picks_fastest(self, selector, monkeypatch):
+        """Probe results override history order."""
+        speeds = {"https://a.example/v": 100, "https://b.example/v": 900}
+        monkeypatch.setattr(selector, "_probe", lambda u, h: speeds[u])
+        assert selector.rank(list(speeds))[0] == "https://b.example/v"
+
+
+class TestDownload:
+    """Tests for mirror failover with Range resume."""
+
+    def test_resume_on_next_mirror(self, selector, temp_dir, monkeypatch):
+        """A mirror dying mid-transfer is resumed on the next one."""
+        body = b"0123456789abcdef"
+        requests_seen = []
+
+        def fake_get(url, headers=None, **kw):
+            requests_seen.append((host_of(url), headers.get("Range")))
+            if "a.example" in url:
+                return FakeResponse(body, fail_after=8)
+            start = int(headers["Range"].split("=")[1].rstrip("-"))
+            return FakeResponse(body[start:], status=206,
+                                headers={"Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"})
+
+        monkeypatch.setattr(mirror_selector.http_client, "get", fake_get)
+        dest = os.path.join(temp_dir, "out.m4s")
+        ok = selector.download(["https://a.example/v", "https://b.example/v"], dest, probe=False)
+        assert ok
+        with open(dest, "rb") as f:
+            assert f.read() == body
+        assert requests_seen == [("a.example", None), ("b.example", "bytes=8-")]
+
+    def test_all_mirrors_fail(self, selector, temp_dir, monkeypatch):
+        """Returns False when no mirror works."""
+        monkeypatch.setattr(mirror_selector.http_client, "get", lambda url, **kw: FakeResponse(b"", status=403))
+        assert not selector.download(["https://a.example/v", "https://b.example/v"],
+                                     os.path.join(temp_dir, "out.m4s"), probe=False)
+
+    def test_hash_across_mirror_switch(self, selector, temp_dir, monkeypatch):
+        """The inline hash covers the whole file even when a mirror restarts from 0."""
+        body = b"0123456789abcdef"
+
+        def fake_get(url, headers=None, **kw):
+            # a dies after 8 bytes, b ignores Range and resends everything
+            return FakeResponse(body, fail_after=8 if "a.example" in url else None)
+
+        monkeypatch.setattr(mirror_selector.http_client, "get", fake_get)
+        dest = os.path.join(temp_dir, "out.m4s")
+        hasher = hashing.StreamHasher()
+        assert selector.download(["https://a.example/v", "https://b.example/v"], dest, probe=False, hasher=hasher)
+        assert hasher.value() == hashing.file_hash(dest) and hasher.count == len(body)
@@ -0,0 +1,104 @@
+"""
+Tests for process_worker.py module.
+
+Workers run a small fake engine from this file, so no network or yt-dlp
+download is involved; each test still spawns real processes.
+"""
+import os
+import time
+import pytest
+
+from modules import process_worker
+from modules.process_worker import WorkerPool
+
+FAKE_ENGINE = "tests.test_process_worker:FakeEngine"
+
+
+class FakeEngine:
+    """Stand-in for DownloaderEngine inside the worker process."""
+
+    def __init__(self, ffmpeg_path=None):
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def download_single(self, task, settings, callbacks):
+        self.is_cancelled = False
+        action = task.get("action")
+        if action == "crash":
+            os._exit(3)
+        if action == "hang":
+            while not self.is_cancelled:
+                callbacks["on_progress"](101, "waiting")
+                time.sleep(0.05)
+            return False, "Đã hủy", None
+        for per in (10, 50, 100):
+            callbacks["on_progress"](per, f"{per}%")
+        callbacks["on_status"]("done")
+        return True, "Success", {"url": task["url"], "pid": os.getpid()}
+
+
+@pytest.fixture
+def pool():
+    p = WorkerPool(1, engine_spec=FAKE_ENGINE)
+    yield p
+    p.shutdown()
+
+
+def collect():
+    events = []
+    return events, {"on_progress": lambda per, msg: events.append(("p", per)),
+                    "on_status": lambda msg: events.append(("s", msg))}
+
+
+class TestWorkerPool:
+    """Tests for running tasks in worker processes."""
+
+    def test_result_and_events_relayed(self, pool):
+        events, callbacks = collect()
+        success, msg, hist = pool.run({"url": "u1"}, {}, callbacks)
+        assert success and msg == "Success" and hist["url"] == "u1"
+        assert hist["pid"] != os.getpid()
+        assert events[-1] == ("s", "done")
+        assert ("p", 100) in events
+
+    def test_worker_is_reused(self, pool):
+        _, callbacks = collect()
+        first = pool.run({"url": "u1"}, {}, callbacks)[2]["pid"]
+        second = pool.run({"url": "u2"}, {}, callbacks)[2]["pid"]
+        assert first == second
+
+    def test_crash_fails_only_that_task(self, pool):
+        _, callbacks = collect()
+        success, msg, hist = pool.run({"url": "u1", "action": "crash"}, {}, callbacks)
+        assert not success and "exit code 3" in msg and hist is None
+        assert pool.run({"url": "u2"}, {}, callbacks)[0]
+
+    def test_cancel(self, pool):
+        _, callbacks = collect()
+        started = time.monotonic()
+        result = pool.run({"url": "u1", "action": "hang"}, {}, callbacks,
+                          cancel_check=lambda: time.monotonic() - started > 0.5)
+        assert result == (False, "Đã hủy", None)
+        assert pool.run({"url": "u2"}, {}, callbacks)[0]
+
+
+class TestEmitter:
+    """Tests for progress coalescing on the worker side."""
+
+    class Conn:
+        def __init__(self):
+            self.sent = []
+
+        def send(self, item):
+            self.sent.append(item)
+
+    def test_progress_coalesced_latest_kept(self):
+        conn = self.Conn()
+        emitter = process_worker._Emitter(conn, 1)
+        for per in range(1, 60):
+            emitter.progress(per, "x")
+        assert len(conn.sent) < 10
+        emitter.flush()
+        assert conn.sent[-1] == ("p", 1, 59, "x")
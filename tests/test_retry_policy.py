@@ -0,0 +1,70 @@
+"""
+Tests for retry_policy.py module.
+"""
+import pytest
+
+from modules import retry_policy
+from modules.retry_policy import classify, is_hopeless, RetryPlan
+
+
+class TestClassify:
+    """Tests for error classification."""
+
+    @pytest.mark.parametrize("message,expected", [
+        ("ERROR: [youtube] xyz: Video unavailable. This video has been removed by the uploader", "ERR_NOT_FOUND"),
+        ("HTTP Error 404: Not Found", "ERR_NOT_FOUND"),
+        ("Private video. Sign in if you've been granted access to this video", "ERR_PRIVATE"),
+        ("The uploader has not made this video available in your country", "ERR_GEO"),
+        ("This video is DRM protected", "ERR_DRM"),
+        ("Premieres in 3 hours", "ERR_LIVE_PENDING"),
+        ("HTTP Error 429: Too Many Requests", "ERR_RATE_LIMIT"),
+        ("HTTP Error 403: Forbidden", "ERR_FORBIDDEN"),
+        ("Sign in to confirm you're not a bot. Use --cookies-from-browser", "ERR_BOT"),
+        ("Sign in to confirm your age", "ERR_COOKIE"),
+        ("Could not copy Chrome cookie database", "ERR_COOKIE"),
+        ("Unsupported URL: https://example.com/page", "ERR_UNSUPPORTED"),
+        ("<urlopen error [Errno -3] Temporary failure in name resolution>", "ERR_NETWORK"),
+        ("Read timed out", "ERR_NETWORK"),
+        ("something odd happened", "ERR_UNKNOWN"),
+        ("ERROR: ffmpeg not found. Please install or provide the path using --ffmpeg-location", "ERR_SYSTEM"),
+        ("You have requested merging of multiple formats but ffmpeg is not installed", "ERR_SYSTEM"),
+        ("ERROR: ffprobe and ffmpeg not found", "ERR_SYSTEM"),
+        ("[Errno 28] No space left on device", "ERR_SYSTEM"),
+    ])
+    def test_classes(self, message, expected):
+        assert classify(message) == expected
+
+    def test_ffmpeg_postprocessing_error_is_retryable(self):
+        """A failing ffmpeg run is not a missing binary: fallbacks still get their chance."""
+        for message in ("ERROR: Postprocessing: ffmpeg exited with code 1",
+                        "ERROR: Postprocessing: Conversion failed! (FFmpegMergerPP)"):
+            cls = classify(message)
+            assert cls != "ERR_SYSTEM" and not is_hopeless(cls)
+            assert RetryPlan().allows(cls, retry_policy.NO_COOKIES)
+
+    def test_hopeless(self):
+        assert is_hopeless("ERR_NOT_FOUND")
+        assert is_hopeless("ERR_GEO")
+        assert not is_hopeless("ERR_UNKNOWN")
+
+
+class TestRetryPlan:
+    """Tests for strategy gating, backoff and budget."""
+
+    def test_strategies_per_class(self):
+        plan = RetryPlan()
+        assert plan.allows("ERR_UNSUPPORTED", retry_policy.BROWSER)
+        assert not plan.allows("ERR_UNSUPPORTED", retry_policy.OAUTH)
+        assert not plan.allows("ERR_NOT_FOUND", retry_policy.BROWSER)
+        assert plan.allows("ERR_COOKIE", retry_policy.NO_COOKIES)
+
+    def test_backoff_schedule_exhausts(self):
+        plan = RetryPlan()
+        assert [plan.retry_delay("ERR_NETWORK") for _ in range(4)] == [2, 5, 10, None]
+        assert plan.retry_delay("ERR_BOT") is None
+
+    def test_budget_blocks_expensive_only(self):
+        plan = RetryPlan(budget=0)
+        plan.started -= 1
+        assert not plan.allows("ERR_UNKNOWN", retry_policy.BROWSER)
+        assert plan.allows("ERR_UNKNOWN", retry_policy.NO_COOKIES)
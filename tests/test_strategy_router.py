@@ -0,0 +1,82 @@
+"""
+Tests for strategy_router.py module.
+"""
+import os
+import time
+import pytest
+
+from modules import strategy_router
+from modules.strategy_router import StrategyRouter
+
+
+@pytest.fixture
+def router(temp_dir):
+    return StrategyRouter(path=os.path.join(temp_dir, "routes.json"))
+
+
+class TestOrdering:
+    """Tests for learned ordering."""
+
+    def test_default_order_without_history(self, router):
+        assert router.order("a.com", ["ytdlp", "browser"]) == ["ytdlp", "browser"]
+
+    def test_best_strategy_first(self, router):
+        for _ in range(3):
+            router.record("a.com", "ytdlp", False)
+            router.record("a.com", "browser", True, 5)
+        assert router.order("a.com", ["ytdlp", "browser"])[0] == "browser"
+        assert router.order("b.com", ["ytdlp", "browser"])[0] == "ytdlp"
+
+    def test_faster_wins_on_equal_success(self, router):
+        router.record("a.com", "post", True, 8)
+        router.record("a.com", "get", True, 0.5)
+        assert router.order("a.com", ["post", "get"]) == ["get", "post"]
+
+    def test_dead_dropped_but_never_empty(self, router):
+        for _ in range(5):
+            router.record("a.com", "tier1", False)
+        assert router.order("a.com", ["tier1", "tier2"]) == ["tier2"]
+        assert router.order("a.com", ["tier1"]) == ["tier1"]
+
+    def test_dead_reprobed_after_interval(self, router, monkeypatch):
+        for _ in range(5):
+            router.record("a.com", "tier1", False)
+        assert not router.should_try("a.com", "tier1")
+        later = time.time() + strategy_router.REPROBE_AFTER + 1
+        monkeypatch.setattr(strategy_router.time, "time", lambda: later)
+        assert router.should_try("a.com", "tier1")
+
+    def test_periodic_default_order(self, router):
+        router.record("a.com", "get", True, 0.1)
+        orders = [router.order("a.com", ["post", "get"]) for _ in range(strategy_router.REPROBE_EVERY)]
+        assert orders[-1] == ["post", "get"]
+        assert orders[0] == ["get", "post"]
+
+    def test_keyed_items(self, router):
+        tiers = [(1, "api"), (2, "flat")]
+        for _ in range(4):
+            router.record("a.com", "api", False)
+        assert router.order("a.com", tiers, key=lambda t: t[1]) == [(2, "flat")]
+
+
+class TestPersistence:
+    """Tests for the JSON store."""
+
+    def test_roundtrip(self, router):
+        router.record("a.com", "browser", True, 3)
+        router.save()
+        again = StrategyRouter(path=router.path)
+        assert again.stats("a.com", "browser")["n"] == 1
+
+    def test_concurrent_saves_leave_valid_file(self, router):
+        """Parallel saves replace the file whole; no temp file is left behind."""
+        import json
+        import threading
+        for i in range(200):
+            router.record(f"site{i}.com", "browser", True, 1)
+        threads = [threading.Thread(target=router.save) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        with open(router.path, encoding="utf-8") as f:
+            assert len(json.load(f)) == 200
+        assert not os.path.exists(router.path + ".tmp")
@@ -0,0 +1,150 @@
+"""
+Tests for subscriptions.py module.
+"""
+import os
+import pytest
+
+from modules import subscriptions
+from modules.subscriptions import SubscriptionManager
+
+CHANNEL = "https://www.youtube.com/channel/UCuAXFkgsw1L7xaCfnd5JJOw"
+HANDLE = "https://www.youtube.com/@somechannel"
+PLAYLIST = "https://www.youtube.com/playlist?list=PLabc"
+BILI_SPACE = "https://space.bilibili.com/123/video"
+
+FEED_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+ <entry><yt:videoId>vid00000003</yt:videoId><title>Three</title>
+  <link rel="alternate" href="https://www.youtube.com/watch?v=vid00000003"/></entry>
+ <entry><yt:videoId>vid00000002</yt:videoId><title>Two</title>
+  <link rel="alternate" href="https://www.youtube.com/watch?v=vid00000002"/></entry>
+</feed>"""
+
+
+def item(i):
+    return {"id": f"v{i}", "url": f"https://x/{i}", "title": str(i)}
+
+
+class FakeFeed:
+    """Conditional-GET feed stub: answers 304 when the caller sends the current ETag."""
+
+    def __init__(self, items):
+        self.items = items
+        self.etag = "e1"
+        self.calls = []
+
+    def __call__(self, url, etag=None, last_modified=None):
+        self.calls.append(etag)
+        if etag == self.etag:
+            return 304, [], etag, last_modified
+        return 200, list(self.items), self.etag, None
+
+
+class FakeFlat:
+    """Flat-extraction stub that counts how far it was iterated."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.pulled = 0
+
+    def __call__(self, url, limit):
+        for entry in self.entries[:limit]:
+            self.pulled += 1
+            yield entry
+
+
+@pytest.fixture
+def path(temp_dir):
+    return os.path.join(temp_dir, "subs.json")
+
+
+class TestFeeds:
+    """Tests for YouTube feed helpers."""
+
+    def test_feed_url_for_channel_and_handle(self):
+        assert subscriptions.youtube_feed_url(CHANNEL).endswith("channel_id=UCuAXFkgsw1L7xaCfnd5JJOw")
+        page = '<link rel="canonical" href="https://www.youtube.com/channel/UCuAXFkgsw1L7xaCfnd5JJOw">'
+        assert subscriptions.youtube_feed_url(HANDLE, lambda url: page).endswith("UCuAXFkgsw1L7xaCfnd5JJOw")
+        assert subscriptions.youtube_feed_url(BILI_SPACE) is None
+
+    def test_parse_feed(self):
+        items = subscriptions.parse_feed(FEED_XML)
+        assert [i["id"] for i in items] == ["vid00000003", "vid00000002"]
+        assert items[0]["title"] == "Three"
+
+    def test_videos_tab(self):
+        assert subscriptions._videos_tab(HANDLE) == HANDLE + "/videos"
+        assert subscriptions._videos_tab(PLAYLIST) == PLAYLIST
+
+
+class TestSync:
+    """Tests for incremental sync."""
+
+    def test_first_sync_is_baseline(self, path):
+        feed = FakeFeed([item(3), item(2), item(1)])
+        mgr = SubscriptionManager(path=path, feed_fetcher=feed, flat_entries=FakeFlat([]))
+        mgr.add(CHANNEL)
+        assert mgr.sync_one(CHANNEL) == []
+        assert mgr.list()[0]["seen"] == ["v3", "v2", "v1"]
+
+    def test_backfill(self, path):
+        feed = FakeFeed([item(3), item(2), item(1)])
+        mgr = SubscriptionManager(path=path, feed_fetcher=feed)
+        mgr.add(CHANNEL, backfill=2)
+        assert [i["id"] for i in mgr.sync_one(CHANNEL)] == ["v2", "v3"]
+
+    def test_only_new_items_oldest_first(self, path):
+        feed = FakeFeed([item(2), item(1)])
+        mgr = SubscriptionManager(path=path, feed_fetcher=feed)
+        mgr.add(CHANNEL)
+        mgr.sync_one(CHANNEL)
+        feed.items, feed.etag = [item(4), item(3), item(2), item(1)], "e2"
+        assert [i["id"] for i in mgr.sync_one(CHANNEL)] == ["v3", "v4"]
+
+    def test_unchanged_feed_uses_etag(self, path):
+        feed = FakeFeed([item(1)])
+        mgr = SubscriptionManager(path=path, feed_fetcher=feed)
+        mgr.add(CHANNEL)
+        mgr.sync_one(CHANNEL)
+        assert mgr.sync_one(CHANNEL) == []
+        assert feed.calls == [None, "e1"]
+
+    def test_full_feed_window_catches_up_with_flat(self, path, monkeypatch):
+        monkeypatch.setattr(subscriptions, "FEED_SIZE", 2)
+        feed = FakeFeed([item(1)])
+        flat = FakeFlat([{"id": f"v{i}", "url": f"https://x/{i}"} for i in (5, 4, 3, 2, 1, 0)])
+        mgr = SubscriptionManager(path=path, feed_fetcher=feed, flat_entries=flat)
+        mgr.add(CHANNEL)
+        mgr.sync_one(CHANNEL)
+        feed.items, feed.etag = [item(5), item(4)], "e2"
+        assert [i["id"] for i in mgr.sync_one(CHANNEL)] == ["v2", "v3", "v4", "v5"]
+        assert flat.pulled == 5  # stopped at the first known id
+
+    def test_flat_early_stop_for_other_sites(self, path):
+        flat = FakeFlat([{"id": "b2"}, {"id": "b1"}])
+        mgr = SubscriptionManager(path=path, flat_entries=flat)
+        mgr.add(BILI_SPACE)
+        mgr.sync_one(BILI_SPACE)
+        flat.entries = [{"id": f"b{i}", "url": f"https://b/{i}"} for i in (4, 3, 2, 1)]
+        flat.pulled = 0
+        assert [i["id"] for i in mgr.sync_one(BILI_SPACE)] == ["b3", "b4"]
+        assert flat.pulled == 3
+
+    def test_playlist_new_items_at_end(self, path):
+        flat = FakeFlat([{"id": "p1"}, {"id": "p2"}])
+        mgr = SubscriptionManager(path=path, flat_entries=flat, feed_fetcher=FakeFeed([]))
+        mgr.add(PLAYLIST)
+        mgr.sync_one(PLAYLIST)
+        flat.entries = [{"id": "p1"}, {"id": "p2"}, {"id": "p3", "url": "https://x/p3"}]
+        assert [i["id"] for i in mgr.sync_one(PLAYLIST)] == ["p3"]
+
+    def test_state_persists_and_sync_all(self, path):
+        feed = FakeFeed([item(1)])
+        mgr = SubscriptionManager(path=path, feed_fetcher=feed)
+        mgr.add(CHANNEL)
+        mgr.sync_all()
+        feed.items, feed.etag = [item(2), item(1)], "e2"
+        again = SubscriptionManager(path=path, feed_fetcher=feed)
+        found = []
+        results = again.sync_all(on_new=lambda url, items: found.extend(items))
+        assert [i["id"] for i in results[CHANNEL]] == ["v2"] and found == results[CHANNEL]
@@ -0,0 +1,123 @@
+"""
+Tests for tiktok_api.py module.
+"""
+import time
+import threading
+import pytest
+
+from modules import tiktok_api
+from modules.tiktok_api import TikTokDownloader, link_expiry, parse_user
+from modules.strategy_router import StrategyRouter
+
+VIDEO = "https://www.tiktok.com/@someone/video/7234567890123456789"
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeTikWM:
+    """Records calls; answers `limited` rate-limit errors first, then real data."""
+
+    def __init__(self, play="https://v16.tiktokcdn.com/v.mp4", limited=0, pages=None):
+        self.play = play
+        self.limited = limited
+        self.pages = pages or {}
+        self.calls = []
+        self.times = []
+
+    def __call__(self, method, url, params=None, headers=None, data=None, timeout=None):
+        self.calls.append((method, url, dict(data or params or {})))
+        self.times.append(time.monotonic())
+        if self.limited:
+            self.limited -= 1
+            return FakeResponse({"code": -1, "msg": "Free Api Limit: 1 request/second."})
+        if url.endswith("user/posts"):
+            cursor = data["cursor"]
+            videos, next_cursor = self.pages[cursor]
+            return FakeResponse({"code": 0, "data": {"videos": videos, "cursor": next_cursor, "hasMore": next_cursor is not None}})
+        return FakeResponse({"code": 0, "data": {"id": "7234567890123456789", "title": "Clip", "play": self.play,
+                                                  "cover": "/cover.jpg", "duration": 12, "author": {"nickname": "N"}}})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(tiktok_api.host_limiter, "report", lambda *a, **k: 0)
+    return TikTokDownloader(router=StrategyRouter(persist=False), interval=0.05)
+
+
+def install(monkeypatch, fake):
+    monkeypatch.setattr(tiktok_api.http_client, "api_request", fake)
+    return fake
+
+
+class TestHelpers:
+    """Tests for URL helpers."""
+
+    def test_parse_user(self):
+        assert parse_user("https://www.tiktok.com/@some.one") == "some.one"
+        assert parse_user("https://www.tiktok.com/@some.one?lang=en") == "some.one"
+        assert parse_user(VIDEO) is None
+
+    def test_link_expiry(self):
+        assert link_expiry("https://cdn/v.mp4?x-expires=1700000000&sig=a") == 1700000000
+        assert link_expiry("https://cdn/v.mp4") is None
+
+
+class TestResolver:
+    """Tests for caching, pacing and rate-limit retries."""
+
+    def test_cached_per_video_id(self, client, monkeypatch):
+        fake = install(monkeypatch, FakeTikWM())
+        info, error = client.get_video_info(VIDEO)
+        assert error is None and info["thumbnail"] == "https://www.tikwm.com/cover.jpg"
+        again, _ = client.get_video_info("https://www.tiktok.com/@other/video/7234567890123456789?is_from_webapp=1")
+        assert again == info and len(fake.calls) == 1
+
+    def test_expired_links_not_reused(self, client, monkeypatch):
+        soon = int(time.time()) + 30
+        fake = install(monkeypatch, FakeTikWM(play=f"https://v16.tiktokcdn.com/v.mp4?x-expires={soon}"))
+        client.get_video_info(VIDEO)
+        client.get_video_info(VIDEO)
+        assert len(fake.calls) == 2
+
+    def test_invalidate(self, client, monkeypatch):
+        fake = install(monkeypatch, FakeTikWM())
+        client.get_video_info(VIDEO)
+        client.invalidate(VIDEO)
+        client.get_video_info(VIDEO)
+        assert len(fake.calls) == 2
+
+    def test_rate_limit_is_retried(self, client, monkeypatch):
+        fake = install(monkeypatch, FakeTikWM(limited=2))
+        info, error = client.get_video_info(VIDEO)
+        assert error is None and info["title"] == "Clip" and len(fake.calls) == 3
+
+    def test_requests_are_paced_and_single_flight(self, client, monkeypatch):
+        fake = install(monkeypatch, FakeTikWM())
+        urls = [VIDEO] * 3 + [f"https://www.tiktok.com/@u/video/72345678901234567{i}0" for i in range(3)]
+        threads = [threading.Thread(target=client.get_video_info, args=(u,)) for u in urls]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        assert len(fake.calls) == 4
+        gaps = [b - a for a, b in zip(fake.times, fake.times[1:])]
+        assert min(gaps) >= 0.04
+
+
+class TestUserPosts:
+    """Tests for profile pagination."""
+
+    def test_pages_followed_and_videos_cached(self, client, monkeypatch):
+        video = lambda i: {"video_id": f"7{i:018d}", "title": f"V{i}", "play": f"https://cdn/{i}.mp4", "duration": 61}
+        fake = install(monkeypatch, FakeTikWM(pages={0: ([video(1), video(2)], 5), 5: ([video(3)], None)}))
+        info, error = client.list_user_videos("https://www.tiktok.com/@someone")
+        assert error is None and [e["id"][-1] for e in info["entries"]] == ["1", "2", "3"]
+        assert info["entries"][0]["url"] == "https://www.tiktok.com/@someone/video/7000000000000000001"
+        assert [c[2]["cursor"] for c in fake.calls] == [0, 5]
+        cached, _ = client.get_video_info("https://www.tiktok.com/@someone/video/7000000000000000003")
+        assert cached["url"] == "https://cdn/3.mp4" and len(fake.calls) == 2
@@ -0,0 +1,82 @@
+"""
+Tests for transfer_tuner.py module.
+"""
+import os
+import pytest
+
+from modules.transfer_tuner import TransferTuner, site_key, START_FRAGMENTS, MIN_SAMPLE_BYTES
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def tuner(temp_dir):
+    return TransferTuner(state_path=os.path.join(temp_dir, "transfer_tuning.json"))
+
+
+class TestSiteKey:
+    """Tests for site_key."""
+
+    def test_strips_common_prefixes(self):
+        assert site_key("https://www.youtube.com/watch?v=x") == "youtube.com"
+        assert site_key("https://m.facebook.com/v/1") == "facebook.com"
+        assert site_key("https://vimeo.com/1") == "vimeo.com"
+
+
+class TestTuning:
+    """Tests for the hill-climbing and backoff rules."""
+
+    def test_starts_conservative(self, tuner):
+        session = tuner.start("example.com")
+        assert session.options["concurrent_fragment_downloads"] == START_FRAGMENTS
+        assert session.options["http_chunk_size"] > 0
+
+    def test_ramps_up_while_faster(self, tuner):
+        tuner.report("example.com", 4, 2 * MB)
+        assert tuner.fragments_for("example.com") == 6
+        tuner.report("example.com", 6, 3 * MB)
+        assert tuner.fragments_for("example.com") == 8
+
+    def test_steps_back_when_slower_and_stays_when_flat(self, tuner):
+        tuner.report("example.com", 4, 4 * MB)
+        tuner.report("example.com", 6, 2 * MB)
+        assert tuner.fragments_for("example.com") == 5
+        tuner.report("example.com", 5, 2 * MB)
+        assert tuner.fragments_for("example.com") == 5
+
+    def test_throttle_halves_and_caps(self, tuner):
+        tuner.report_throttled("example.com", 8)
+        assert tuner.fragments_for("example.com") == 4
+        for _ in range(5):
+            tuner.report("example.com", tuner.fragments_for("example.com"), 100 * MB)
+        assert tuner.fragments_for("example.com") <= 7
+
+    def test_persisted(self, tuner):
+        tuner.report("example.com", 4, 2 * MB)
+        again = TransferTuner(state_path=tuner.state_path)
+        assert again.fragments_for("example.com") == 6
+
+
+class TestSession:
+    """Tests for progress-hook integration."""
+
+    def test_fragmented_download_reports(self, tuner):
+        session = tuner.start("example.com")
+        session.on_progress({"status": "downloading", "fragment_index": 1, "fragment_count": 10})
+        session.on_progress({"status": "finished", "downloaded_bytes": 20 * MB, "elapsed": 5})
+        assert tuner.fragments_for("example.com") == START_FRAGMENTS + 2
+
+    def test_small_or_unfragmented_ignored(self, tuner):
+        session = tuner.start("example.com")
+        session.on_progress({"status": "finished", "downloaded_bytes": 20 * MB, "elapsed": 5})
+        session.fragmented = True
+        session.on_progress({"status": "finished", "downloaded_bytes": MIN_SAMPLE_BYTES - 1, "elapsed": 5})
+        assert tuner.fragments_for("example.com") == START_FRAGMENTS
+        assert not os.path.exists(tuner.state_path)
+
+    def test_error_429_backs_off(self, tuner):
+        session = tuner.start("example.com")
+        session.on_error(Exception("HTTP Error 429: Too Many Requests"))
+        assert tuner.fragments_for("example.com") == START_FRAGMENTS // 2
+        session.on_error(Exception("Unsupported URL"))
+        assert tuner.fragments_for("example.com") == START_FRAGMENTS // 2
@@ -0,0 +1,107 @@
+"""
+Tests for url_router.py module.
+"""
+import os
+import threading
+import pytest
+
+from modules import url_router
+from modules.url_router import ShortLinkResolver
+
+
+class TestIdentify:
+    """Tests for platform identification."""
+
+    def test_platforms(self):
+        assert url_router.identify("https://youtu.be/dQw4w9WgXcQ") == "YOUTUBE"
+        assert url_router.identify("https://b23.tv/abc123") == "BILIBILI"
+        assert url_router.identify("https://vm.tiktok.com/ZMabc/") == "TIKTOK"
+        assert url_router.identify("https://www.iesdouyin.com/share/video/7123456789/") == "DOUYIN"
+        assert url_router.identify("https://x.com/user/status/123") == "TWITTER"
+        assert url_router.identify("https://www.facebook.com/stories/123") == "FACEBOOK_STORY"
+        assert url_router.identify("https://example.com/video") == "OTHER"
+
+    def test_host_not_substring(self):
+        """Platform names inside the path or a lookalike host don't match."""
+        assert url_router.identify("https://example.com/?next=youtube.com") == "OTHER"
+        assert url_router.identify("https://notbilibili.com/video/BV1xx411c7mu") == "OTHER"
+
+
+class TestCanonicalKey:
+    """Tests for canonical keys and archive ids."""
+
+    def test_spellings_share_key(self, sample_youtube_urls):
+        assert {url_router.canonical_key(u) for u in sample_youtube_urls} == {("YOUTUBE", "dQw4w9WgXcQ")}
+
+    def test_bilibili_short_with_id_is_parsed_offline(self, sample_bilibili_urls):
+        assert {url_router.canonical_key(u) for u in sample_bilibili_urls} == {("BILIBILI", "BV1xx411c7mu")}
+        assert not url_router.needs_resolve("https://b23.tv/BV1xx411c7mu")
+
+    def test_params(self):
+        route = url_router.parse("https://www.bilibili.com/video/BV1xx411c7mu?p=2&spm_id_from=x")
+        assert route.params == {"p": "2"}
+        assert url_router.canonical_key("https://www.youtube.com/playlist?list=PLabc") == ("YOUTUBE_PLAYLIST", "PLabc")
+
+    def test_unknown_url_drops_tracking(self):
+        key = url_router.canonical_key("https://Example.com/v/1/?utm_source=x&id=5")
+        assert key == ("URL", "example.com/v/1?id=5")
+
+    def test_archive_id(self):
+        assert url_router.archive_id("https://www.tiktok.com/@u/video/7234567890123") == "tiktok 7234567890123"
+        assert url_router.archive_id("https://example.com/video") is None
+
+
+class TestShortLinkResolver:
+    """Tests for short-link resolution and caching."""
+
+    @pytest.fixture
+    def resolver(self, temp_dir, monkeypatch):
+        calls = []
+        r = ShortLinkResolver(path=os.path.join(temp_dir, "links.json"))
+
+        def follow(url, timeout):
+            calls.append(url)
+            return "https://www.tiktok.com/@u/video/7234567890123?is_from_webapp=1&sender_device=pc"
+        monkeypatch.setattr(r, "_follow", follow)
+        r.calls = calls
+        return r
+
+    def test_resolves_once_and_cleans(self, resolver):
+        first = resolver.resolve("https://vm.tiktok.com/ZMabc/")
+        second = resolver.resolve("https://vm.tiktok.com/ZMabc/")
+        assert first == second == "https://www.tiktok.com/@u/video/7234567890123"
+        assert len(resolver.calls) == 1
+
+    def test_regular_urls_untouched(self, resolver):
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        assert resolver.resolve(url) == url
+        assert resolver.calls == []
+
+    def test_cache_persists(self, resolver):
+        resolver.resolve("https://vm.tiktok.com/ZMabc/")
+        again = ShortLinkResolver(path=resolver.path)
+        assert again.resolve("https://vm.tiktok.com/ZMabc/").endswith("/video/7234567890123")
+
+    def test_concurrent_callers_share_lookup(self, resolver, monkeypatch):
+        gate = threading.Event()
+        original = resolver._follow
+
+        def slow(url, timeout):
+            gate.wait(2)
+            return original(url, timeout)
+        monkeypatch.setattr(resolver, "_follow", slow)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve("https://vm.tiktok.com/ZMabc/")))
+                   for _ in range(4)]
+        for t in threads: t.start()
+        gate.set()
+        for t in threads: t.join()
+        assert len(set(results)) == 1 and len(resolver.calls) == 1
+
+    def test_failure_returns_input(self, temp_dir, monkeypatch):
+        r = ShortLinkResolver(path=os.path.join(temp_dir, "links.json"))
+
+        def fail(url, timeout):
+            raise OSError("offline")
+        monkeypatch.setattr(r, "_follow", fail)
+        assert r.resolve("https://v.douyin.com/abc/") == "https://v.douyin.com/abc/"
@@ -68,3 +68,28 @@ class TestTimeToSeconds:
         assert time_to_seconds("99:59:59") == 359999
         # Single digit
         assert time_to_seconds("1:2:3") == 3723  # 1*3600 + 2*60 + 3
+
+
+class TestParseRangeSpec:
+    """Tests for parse_range_spec function."""
+
+    def test_all_and_empty(self):
+        from modules.utils import parse_range_spec
+        assert parse_range_spec("all", 3) == [1, 2, 3]
+        assert parse_range_spec("", 3) == [1, 2, 3]
+        assert parse_range_spec(None, 2) == [1, 2]
+
+    def test_ranges_and_singles(self):
+        from modules.utils import parse_range_spec
+        assert parse_range_spec("1-3,5", 10) == [1, 2, 3, 5]
+        assert parse_range_spec("8-", 10) == [8, 9, 10]
+        assert parse_range_spec("5,2,2", 10) == [2, 5]
+
+    def test_out_of_bounds_clamped(self):
+        from modules.utils import parse_range_spec
+        assert parse_range_spec("4-99", 5) == [4, 5]
+        assert parse_range_spec("42", 5) == [1, 2, 3, 4, 5]
+
+    def test_invalid_means_all(self):
+        from modules.utils import parse_range_spec
+        assert parse_range_spec("abc-d", 3) == [1, 2, 3]
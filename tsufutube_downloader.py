@@ -1,5 +1,9 @@
 import sys
 import os
+import multiprocessing
+
+# Frozen builds: spawned download workers re-run this exe; let them start before any app code runs
+multiprocessing.freeze_support()
 
 # [FIX] Force CWD to App Directory (Fix System32 PermissionError)
 if getattr(sys, 'frozen', False):
@@ -16,10 +16,12 @@ from modules.core import DownloaderEngine
 from modules.fetcher import get_fetcher
 from modules.data import THEMES, TIPS_CONTENT
 from modules.constant import APP_TITLE, APP_SLOGAN, REPO_API_URL, VERSION, APP_VERSION
-from modules.utils import resource_path, time_to_seconds, set_autostart_registry
+from modules.utils import resource_path, time_to_seconds, set_autostart_registry, parse_range_spec
 from modules.config import ConfigManager
 from modules.time_spinbox import TimeSpinbox
 from modules.updater import UpdateChecker, check_update_async
+from modules import bulk_import
+from modules import subscriptions
 
 # Lazy Import Wrapper for Tray
 HAS_PYSTRAY = False
@@ -69,6 +71,15 @@ class YoutubeDownloaderApp(ctk.CTk):
             "use_archive": False,
             "geo_bypass_country": "None",
             "proxy_url": "",
+            "use_http2": False,
+            "adaptive_fragments": True,
+            "process_workers": 0,
+            "bbdown_multi_thread": True,
+            "bbdown_aria2c": False,
+            "hash_sidecar": False,
+            "bandwidth_limit_kb": 0,
+            "bandwidth_host_limits_kb": {},
+            "bandwidth_schedule": [],
             "config_path": self.config_mgr.config_dir,
         }
         
@@ -131,8 +142,18 @@ class YoutubeDownloaderApp(ctk.CTk):
 
         self.engine = DownloaderEngine(ffmpeg_final_path)
         
+        # Shared HTTP pool for API clients (HTTP/2 only if httpx[http2] is installed)
+        from modules import http_client
+        http_client.configure(http2=self.settings.get("use_http2", False))
+        
         # [OPTIMIZED] Initialize FastFetcher for video info
         self.fetcher = get_fetcher()
+        # Queue items waiting for a title; flushed as one fetch_many batch
+        self._queue_fetch_pending = []
+        self._queue_fetch_scheduled = False
+        # One long-lived worker runs the batches, so at most one fetch_many pool is active
+        self._queue_fetch_jobs = queue.Queue()
+        self._queue_fetch_worker = None
         
         # --- 2. WINDOW CONFIG ---
         # --- 2. WINDOW CONFIG ---
@@ -617,6 +638,9 @@ class YoutubeDownloaderApp(ctk.CTk):
         ctk.CTkLabel(q_row, text=self.T("lbl_queue"), font=("Segoe UI", 12, "bold")).pack(side="left")
         ctk.CTkButton(q_row, text=self.T("btn_add_queue"), command=self.add_to_queue, width=80, height=25).pack(side="right")
         ctk.CTkButton(q_row, text=self.T("btn_del_queue"), command=self.remove_from_queue, width=80, height=25, fg_color="#d32f2f", hover_color="#b71c1c").pack(side="right", padx=5)
+        ctk.CTkButton(q_row, text=self.T("btn_import_queue"), command=self.import_urls_from_file, width=80, height=25, fg_color="#455A64").pack(side="right")
+        ctk.CTkButton(q_row, text=self.T("btn_sync_subs"), command=self.sync_subscriptions, width=80, height=25, fg_color="#455A64").pack(side="right", padx=5)
+        ctk.CTkButton(q_row, text=self.T("btn_subscribe"), command=self.subscribe_current_url, width=80, height=25, fg_color="#455A64").pack(side="right")
         
         # Treeview (Native TTK inside CTk Frame)
         tree_frame = ctk.CTkFrame(misc_card)
@@ -1070,6 +1094,10 @@ class YoutubeDownloaderApp(ctk.CTk):
     def paste_link(self):
         try:
             txt = self.clipboard_get()
+            # Several links at once -> bulk import into the queue
+            if len(bulk_import.extract_urls(txt)) > 1:
+                self.import_urls_from_text(txt)
+                return
             clean_url = self._extract_url(txt)
             self.url_var.set(clean_url)
             self.start_check_link_info(clean_url)
@@ -1175,6 +1203,8 @@ class YoutubeDownloaderApp(ctk.CTk):
                 is_playlist = True
             elif 'playlist' in url or 'list=' in url:
                 is_playlist = True
+            elif info.get('page_count', 1) > 1:
+                is_playlist = True  # Bilibili multi-part video
             
             # Extract info
             title = info.get('title', 'Unknown')
@@ -1284,10 +1314,10 @@ class YoutubeDownloaderApp(ctk.CTk):
         try:
             if cancel_event.is_set():
                 return
-            import urllib.request
-            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-            with urllib.request.urlopen(req, timeout=5) as response:
-                data = response.read()
+            from modules import http_client
+            response = http_client.get(url, timeout=5)
+            response.raise_for_status()
+            data = response.content
             if not cancel_event.is_set():
                 self.after(0, lambda: self._update_thumbnail(data))
         except Exception as e:
@@ -1422,15 +1452,11 @@ class YoutubeDownloaderApp(ctk.CTk):
     def add_placeholder(self, entry, text):
         entry.configure(placeholder_text=text)
     
-    def add_to_queue(self):
-        """Add URL to queue with background info fetch if title not available"""
-        url = self.url_var.get().strip()
-        if not url: return
-
-        # SNAPSHOT SETTINGS
-        task_settings = {
+    def _snapshot_task(self, url, title="Loading..."):
+        """Queue task for url with the current download options."""
+        return {
             "url": url,
-            "title": self.fetched_title if self.fetched_title else "Loading...",
+            "title": title,
             "dtype": self.type_var.get(),
             "download_sub": self.sub_var.get(),
             "subs": self.selected_sub_langs if self.sub_var.get() else [],
@@ -1451,6 +1477,14 @@ class YoutubeDownloaderApp(ctk.CTk):
             "browser_source": self.browser_var.get() if hasattr(self, 'browser_var') else "none",
             "name": self.name_var.get().strip(),
         }
+
+    def add_to_queue(self):
+        """Add URL to queue with background info fetch if title not available"""
+        url = self.url_var.get().strip()
+        if not url: return
+
+        # SNAPSHOT SETTINGS
+        task_settings = self._snapshot_task(url, self.fetched_title if self.fetched_title else "Loading...")
         
         # Use cached resolved info if available and URL matches
         if self.fetched_title and getattr(self, 'last_checked_url', '') == url:
@@ -1471,10 +1505,9 @@ class YoutubeDownloaderApp(ctk.CTk):
             
             self.queue_tree.insert("", "end", values=(self.fetched_title + extra, url))
         else:
-            idx = len(self.download_queue)
             self.download_queue.append(task_settings)
-            self.queue_tree.insert("", "end", values=("⏳ Loading...", url))
-            threading.Thread(target=self._bg_fetch_queue_title, args=(url, idx, self.queue_tree.get_children()[-1]), daemon=True).start()
+            tree_id = self.queue_tree.insert("", "end", values=("⏳ Loading...", url))
+            self._schedule_queue_fetch(url, task_settings, tree_id)
 
     def _parse_time(self, t_str):
         try:
@@ -1484,17 +1517,117 @@ class YoutubeDownloaderApp(ctk.CTk):
             return parts[0]
         except: return 0
 
-    def _bg_fetch_queue_title(self, url, idx, tree_id):
-        """Background thread to fetch title for queue item"""
+    # ==========================
+    # BULK IMPORT
+    # ==========================
+    IMPORT_CHUNK = 250  # Treeview rows inserted per UI tick
+
+    def import_urls_from_file(self):
+        path = filedialog.askopenfilename(title=self.T("btn_import_queue"),
+                                          filetypes=[("URL list", "*.txt *.csv *.json"), ("All files", "*.*")])
+        if not path: return
+        self._start_prepare_import(lambda: bulk_import.read_file(path))
+
+    def import_urls_from_text(self, text):
+        self._start_prepare_import(lambda: bulk_import.extract_urls(text))
+
+    def _start_prepare_import(self, load):
+        """UI thread: snapshot queue + history keys, then parse/dedupe in the background."""
+        existing = [t.get("url") for t in self.download_queue]
+        existing += [h.get("key") or h.get("url") for h in self.history_data]
+        threading.Thread(target=self._bg_prepare_import, args=(load, existing), daemon=True).start()
+
+    def _bg_prepare_import(self, load, existing):
+        """Background thread: parse + dedupe against the snapshot, then hand rows to the UI in chunks."""
         try:
-            info = self.engine.fetch_info(url)
-            title = info.get('title', 'Unknown') if info else 'Unknown'
-            # Update data and UI
-            if idx < len(self.download_queue):
-                self.download_queue[idx]['title'] = title
-            self.after(0, lambda: self._update_queue_item(tree_id, title, url))
-        except:
-            self.after(0, lambda: self._update_queue_item(tree_id, "Error", url))
+            urls = load()
+        except Exception as e:
+            self.after(0, lambda: messagebox.showerror("Error", str(e)))
+            return
+        new_urls, skipped = bulk_import.dedupe(urls, existing)
+        print(f"[Import] {len(urls)} URLs read, {len(new_urls)} new, {skipped} duplicates skipped")
+        self.after(0, lambda: self._start_import(new_urls, skipped))
+
+    def _start_import(self, urls, skipped):
+        if not urls:
+            self.status_label.configure(text=self.T("msg_import_done").format(0, skipped))
+            return
+        # One options snapshot for the whole import; per-video cut times/names make no sense here
+        template = dict(self._snapshot_task(""), cut_mode=False, start_time=0, end_time=0, name="")
+        self._insert_import_chunk(list(bulk_import.chunks(urls, self.IMPORT_CHUNK)), template, len(urls), skipped)
+
+    def _insert_import_chunk(self, pending, template, total, skipped):
+        """Insert one chunk of rows, then yield to the event loop before the next one."""
+        if not pending:
+            self.status_label.configure(text=self.T("msg_import_done").format(total, skipped))
+            return
+        for url in pending.pop(0):
+            task = dict(template, url=url)
+            self.download_queue.append(task)
+            tree_id = self.queue_tree.insert("", "end", values=("⏳ Loading...", url))
+            self._schedule_queue_fetch(url, task, tree_id)
+        self.status_label.configure(text=self.T("msg_import_progress").format(total - sum(map(len, pending)), total))
+        self.after(1, lambda: self._insert_import_chunk(pending, template, total, skipped))
+
+    def subscribe_current_url(self):
+        """Remember the channel/playlist in the URL box; later syncs enqueue only its new videos."""
+        url = self.url_var.get().strip()
+        if not url: return
+        subscriptions.get_manager().add(url, title=self.fetched_title or None)
+        self.status_label.configure(text=self.T("msg_subscribed").format(url))
+
+    def sync_subscriptions(self):
+        self.status_label.configure(text=self.T("msg_sync_running"))
+
+        def load():
+            results = subscriptions.get_manager().sync_all()
+            return [item["url"] for items in results.values() for item in items if item.get("url")]
+        self._start_prepare_import(load)
+
+    def _schedule_queue_fetch(self, url, task, tree_id):
+        """Collect unresolved queue items; a burst of adds becomes one fetch_many batch."""
+        self._queue_fetch_pending.append((url, task, tree_id))
+        if not self._queue_fetch_scheduled:
+            self._queue_fetch_scheduled = True
+            self.after(300, self._flush_queue_fetch)
+
+    def _flush_queue_fetch(self):
+        pending, self._queue_fetch_pending = self._queue_fetch_pending, []
+        self._queue_fetch_scheduled = False
+        if not pending:
+            return
+        self._queue_fetch_jobs.put(pending)
+        if self._queue_fetch_worker is None:
+            self._queue_fetch_worker = threading.Thread(target=self._bg_queue_fetch_worker, daemon=True)
+            self._queue_fetch_worker.start()
+
+    def _bg_queue_fetch_worker(self):
+        """Background thread (lives with the app): run queued title batches one at a time, merging any backlog."""
+        while True:
+            pending = self._queue_fetch_jobs.get()
+            while True:
+                try:
+                    pending += self._queue_fetch_jobs.get_nowait()
+                except queue.Empty:
+                    break
+            self._bg_fetch_queue_titles(pending)
+
+    def _bg_fetch_queue_titles(self, pending):
+        """Resolve titles for queued items (bounded pool inside fetcher)"""
+        by_url = {}
+        for url, task, tree_id in pending:
+            by_url.setdefault(url, []).append((task, tree_id))
+
+        def on_result(url, info, error):
+            title = info.get('title', 'Unknown') if info else 'Error'
+            for task, tree_id in by_url.get(url, []):
+                task['title'] = title
+                self.after(0, lambda t=tree_id, ti=title, u=url: self._update_queue_item(t, ti, u))
+
+        try:
+            self.fetcher.fetch_many(list(by_url), on_result=on_result)
+        except Exception as e:
+            print(f"Queue fetch error: {e}")
 
     def _update_queue_item(self, tree_id, title, url):
         try:
@@ -2302,8 +2435,20 @@ class YoutubeDownloaderApp(ctk.CTk):
             task = task_queue.pop(0) # Get first
             ctx['is_cut'] = task.get("cut_mode", False) # Update context for callbacks
             
+            # --- BILIBILI MULTI-PART: one task, parts downloaded in parallel by the engine ---
+            # (only BV videos with several parts; collections/favorites/spaces expand below)
+            bili_parts = False
+            if task.get("is_plist", False) and self.engine._identify_platform(task["url"]) == "BILIBILI":
+                pages = self.engine.get_bilibili_multipart(task["url"], self.settings)
+                if pages:
+                    bili_parts = True
+                    task = dict(task)
+                    if len(pages) > 20 and not task.get("parts"):
+                        task["parts"] = self._ask_playlist_range(len(pages)) or "all"
+                    on_status_callback(self.T("status_expanded_playlist").format(len(parse_range_spec(task.get("parts"), len(pages)))))
+            
             # --- PLAYLIST EXPANSION LOGIC ---
-            if task.get("is_plist", False):
+            if task.get("is_plist", False) and not bili_parts:
                 on_status_callback(self.T("status_analyzing_playlist"))
                 pl_info = self.engine.extract_playlist_flat(task["url"])
                 
@@ -2317,24 +2462,8 @@ class YoutubeDownloaderApp(ctk.CTk):
                         r_str = self._ask_playlist_range(total)
                         if not r_str: r_str = "all" # Default to all if canceled/empty? Or cancel?
                         
-                        # Parse Range
-                        try:
-                            subset = []
-                            r_str = r_str.lower().strip()
-                            if r_str == "all":
-                                subset = entries
-                            else:
-                                parts = r_str.split(',')
-                                for p in parts:
-                                    if '-' in p:
-                                        s, e = map(int, p.split('-'))
-                                        subset.extend(entries[max(0, s-1):min(total, e)])
-                                    elif p.strip().isdigit():
-                                        idx = int(p.strip())
-                                        if 1 <= idx <= total: subset.append(entries[idx-1])
-                            if subset: selected_entries = subset
-                        except:
-                            pass # Fallback to all
+                        # Parse Range (invalid input falls back to all)
+                        selected_entries = [entries[i - 1] for i in parse_range_spec(r_str, total)]
                     
                     # Convert to indiv tasks and PREPEND to queue
                     new_subtasks = []
@@ -2361,11 +2490,13 @@ class YoutubeDownloaderApp(ctk.CTk):
 
             if success: 
                 success_count += 1
-                if history_item: 
-                    self.after(0, lambda h=history_item: self.add_to_history(h))
-                    if self.open_finished_var.get() and history_item.get("path"):
-                        file_path = history_item["path"]
-                        self.after(0, lambda p=file_path: self._safe_open_file_on_main_thread(p))
+                # Multi-part downloads return one history item per file
+                items = history_item if isinstance(history_item, list) else [history_item] if history_item else []
+                for h in items:
+                    self.after(0, lambda h=h: self.add_to_history(h))
+                if items and self.open_finished_var.get() and items[0].get("path"):
+                    file_path = items[0]["path"]
+                    self.after(0, lambda p=file_path: self._safe_open_file_on_main_thread(p))
             else:
                 fail_count += 1
                 failed_links.append(f"{task.get('title', self.T('val_unknown'))} -> {msg}")